@@ -1,6 +1,11 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Chamado, InventarioExcel, ChatMessage
+from .busca import buscar_chamados
+from .importacao import esquecer_hash_inventario
+from .inventario import invalidar_inventario, inventario_ativo
+from .motivos import invalidar_catalogo
+from .models import CustomUser, Chamado, ImportacaoInventario, InventarioExcel, ChatMessage, Motivo, VersaoInventario
 
 
 @admin.register(CustomUser)
@@ -48,6 +53,16 @@ class ChamadoAdmin(admin.ModelAdmin):
     readonly_fields = ('aberto_por', 'aberto_em', 'fechado_por', 'fechado_em', 'duracao')
     date_hierarchy = 'aberto_em'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Busca textual (tsvector + GIN no PostgreSQL) em vez de ILIKE em cada coluna
+        if not search_term.strip():
+            return queryset, False
+        resultados = buscar_chamados(queryset, search_term)
+        # Mais relevantes primeiro, a menos que o usuário tenha ordenado por uma coluna
+        if ORDER_VAR not in request.GET:
+            resultados = resultados.order_by('-relevancia', *queryset.query.order_by)
+        return resultados, False
+
     def duracao_formatada(self, obj):
         if obj.duracao:
             total_seconds = int(obj.duracao.total_seconds())
@@ -70,6 +85,66 @@ class InventarioExcelAdmin(admin.ModelAdmin):
     list_display = ('loja', 'regional', 'lider', 'data', 'criado_em')
     search_fields = ('loja', 'regional', 'lider')
 
+    exclude = ('versao',)
+
+    def get_queryset(self, request):
+        # Só a versão ativa; as antigas são apagadas pela limpeza em segundo plano
+        return inventario_ativo()
+
+    # Edições pelo admin também remontam o índice em memória (chamados/inventario.py)
+    # e fazem o próximo envio da planilha ser importado mesmo que o arquivo seja o mesmo
+    def save_model(self, request, obj, form, change):
+        if obj.versao_id is None:
+            obj.versao = VersaoInventario.objects.filter(ativa=True).first()
+        super().save_model(request, obj, form, change)
+        esquecer_hash_inventario()
+        invalidar_inventario()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        esquecer_hash_inventario()
+        invalidar_inventario()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        esquecer_hash_inventario()
+        invalidar_inventario()
+
+
+@admin.register(ImportacaoInventario)
+class ImportacaoInventarioAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'nome_original', 'criado_por', 'criado_em', 'linhas', 'novas', 'alteradas', 'removidas')
+    list_filter = ('status', 'modo')
+    search_fields = ('nome_original', 'erro')
+
+    # Histórico: quem cria e atualiza é a fila (chamados/fila_importacao.py)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Motivo)
+class MotivoAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'fixo', 'usos')
+    list_filter = ('fixo',)
+    search_fields = ('nome',)
+    readonly_fields = ('usos',)
+
+    # Renomear, excluir ou mudar `fixo` altera o catálogo em memória (chamados/motivos.py)
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidar_catalogo()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidar_catalogo()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidar_catalogo()
+
 
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
@@ -4,3 +4,5 @@ class ChamadosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chamados'
 
+    def ready(self):
+        from . import signals  # noqa: F401 (registra os receivers)
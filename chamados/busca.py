@@ -0,0 +1,63 @@
+import re
+from functools import reduce
+from operator import and_, or_
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+# ------------------------------
+# Busca textual de chamados
+# ------------------------------
+# PostgreSQL: a coluna Chamado.busca (tsvector) é mantida por um trigger criado
+# na migração 0021, com a configuração CONFIG_BUSCA (português + unaccent) e
+# índice GIN. Pesos: A = regional/loja/líder, B = motivo/outro_motivo, C = observação.
+# Outros bancos (SQLite de testes): icontains em cada campo, com relevância
+# calculada pela soma dos pesos dos campos que batem.
+
+CONFIG_BUSCA = 'portugues_sem_acento'
+
+PESOS_CAMPOS = {
+    'regional': 1.0,
+    'loja': 1.0,
+    'lider': 1.0,
+    'motivo': 0.4,
+    'outro_motivo': 0.4,
+    'observacao': 0.2,
+}
+
+
+def termos_busca(texto):
+    """Palavras do texto digitado (sem operadores/pontuação)."""
+    return re.findall(r'\w+', (texto or '').lower())
+
+
+def buscar_chamados(qs, texto):
+    """
+    Filtra `qs` pelos termos de `texto` (todos precisam aparecer, por prefixo)
+    e anota `relevancia`. A ordenação fica por conta de quem pagina.
+    """
+    termos = termos_busca(texto)
+    if not termos:
+        return qs.annotate(relevancia=Value(0.0, output_field=FloatField())).none()
+
+    if connection.vendor == 'postgresql':
+        # "impress:* & balanc:*" — cada termo casa por prefixo, já sem acento/radicalizado
+        consulta = SearchQuery(
+            ' & '.join(f'{termo}:*' for termo in termos), config=CONFIG_BUSCA, search_type='raw'
+        )
+        # float8: o valor volta idêntico no cursor (ts_rank devolve float4)
+        return qs.filter(busca=consulta).annotate(
+            relevancia=Cast(SearchRank(F('busca'), consulta), FloatField())
+        )
+
+    filtro = reduce(and_, (
+        reduce(or_, (Q(**{f'{campo}__icontains': termo}) for campo in PESOS_CAMPOS))
+        for termo in termos
+    ))
+    relevancia = reduce(lambda a, b: a + b, (
+        Case(When(**{f'{campo}__icontains': termo}, then=Value(peso)), default=Value(0.0))
+        for termo in termos
+        for campo, peso in PESOS_CAMPOS.items()
+    ))
+    return qs.filter(filtro).annotate(relevancia=Cast(relevancia, FloatField()))
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import time
+from django.core.cache import caches
+from django.db import transaction
+
+# ------------------------------
+# Cache dos gráficos do dashboard
+# ------------------------------
+# As chaves combinam (tipo do gráfico, filtros normalizados, versão dos dados).
+# A versão muda a cada save/delete de Chamado (ver signals.py), então entradas
+# antigas deixam de ser lidas e saem por LRU/TTL (configurado em CACHES['graficos']).
+# A versão só muda depois do commit, e quem renderiza lê a versão antes de
+# agregar: gráficos feitos com dados antigos nunca são gravados na versão nova.
+
+CHAVE_VERSAO = 'graficos:versao'
+
+
+def _cache():
+    return caches['graficos']
+
+
+def versao_dados():
+    """Versão atual dos dados de Chamado. Recriada se tiver sido expulsa do cache."""
+    versao = _cache().get(CHAVE_VERSAO)
+    if versao is None:
+        _cache().add(CHAVE_VERSAO, time.time_ns(), None)
+        versao = _cache().get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar_graficos():
+    """Nova versão após o commit; todos os gráficos em cache ficam obsoletos."""
+    transaction.on_commit(lambda: _cache().set(CHAVE_VERSAO, time.time_ns(), None))
+
+
+def normalizar_filtros(filtros):
+    """Hash estável de um dict de filtros (listas ordenadas, vazios descartados)."""
+    normalizado = {}
+    for chave, valor in filtros.items():
+        if isinstance(valor, (list, tuple, set)):
+            valor = sorted(str(v) for v in valor)
+        if valor in (None, '', []):
+            continue
+        normalizado[chave] = valor
+    texto = json.dumps(normalizado, sort_keys=True, default=str)
+    return hashlib.md5(texto.encode('utf-8')).hexdigest()
+
+
+def chave_grafico(tipo, filtros, versao=None):
+    if versao is None:
+        versao = versao_dados()
+    return f'grafico:{tipo}:{normalizar_filtros(filtros)}:{versao}'
+
+
+def obter_graficos(tipos, filtros, versao=None):
+    """Retorna {tipo: base64} apenas para os gráficos já renderizados."""
+    if versao is None:
+        versao = versao_dados()
+    chaves = {chave_grafico(tipo, filtros, versao): tipo for tipo in tipos}
+    encontrados = _cache().get_many(list(chaves))
+    return {chaves[chave]: valor for chave, valor in encontrados.items()}
+
+
+def salvar_graficos(plots, filtros, versao=None):
+    """`versao`: a lida antes de agregar os dados que geraram `plots`."""
+    if versao is None:
+        versao = versao_dados()
+    _cache().set_many({chave_grafico(tipo, filtros, versao): valor for tipo, valor in plots.items()})
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from functools import wraps
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+# ------------------------------
+# GET condicional (ETag / Last-Modified)
+# ------------------------------
+# A "marca d'água" de um modelo é (último atualizado_em, total de linhas), lida
+# do banco numa consulta só: criar/editar muda o máximo e excluir muda o total,
+# inclusive quando a alteração vem de outro processo ou de um update/delete em
+# massa (que não passam pelos signals). Com If-None-Match igual, a view nem
+# chega a rodar e a resposta é um 304 vazio.
+
+
+def marca_dados(*modelos):
+    """[(ultima_alteracao, total), ...] de cada modelo (MAX + COUNT numa consulta por modelo)."""
+    marcas = []
+    for modelo in modelos:
+        marca = modelo.objects.order_by().aggregate(ultima=Max('atualizado_em'), total=Count('pk'))
+        marcas.append((marca['ultima'], marca['total']))
+    return marcas
+
+
+def condicional(*modelos, por_sessao=False, marca_func=None):
+    """
+    Decorator de views GET: ETag/Last-Modified a partir da marca de `modelos`.
+    O ETag também considera URL + query string, usuário/papel e o dia atual
+    (períodos como ?tipo=semana mudam com a data). `por_sessao` inclui a sessão,
+    para páginas HTML com token CSRF. `marca_func(request)` substitui a consulta
+    da marca quando ela já é conhecida em memória (ex.: índice do inventário).
+    """
+    def marca(request):
+        if not hasattr(request, '_marca_dados'):
+            request._marca_dados = marca_func(request) if marca_func else marca_dados(*modelos)
+        return request._marca_dados
+
+    def etag(request, *args, **kwargs):
+        usuario = request.user if request.user.is_authenticated else None
+        partes = [
+            request.get_full_path(),
+            getattr(usuario, 'pk', None),
+            getattr(usuario, 'papel', ''),
+            timezone.localdate().isoformat(),
+            [(ultima.isoformat() if ultima else '', total) for ultima, total in marca(request)],
+        ]
+        if por_sessao:
+            partes += [request.session.session_key or '', len(get_messages(request))]
+        return hashlib.md5(json.dumps(partes, default=str).encode()).hexdigest()
+
+    def ultima_alteracao(request, *args, **kwargs):
+        datas = [ultima for ultima, _ in marca(request) if ultima]
+        return max(datas) if datas else None
+
+    def decorator(view):
+        view_condicional = condition(etag_func=etag, last_modified_func=ultima_alteracao)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view_condicional(request, *args, **kwargs)
+            # Sempre revalida com o servidor (sem cache heurístico em proxies/navegador)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+
+    return decorator
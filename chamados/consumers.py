@@ -1,8 +1,10 @@
-from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.generic.websocket import AsyncJsonWebsocketConsumer, AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 import json
 import uuid
 
+from .quadro import GRUPO_QUADRO
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     admins_online = {}
@@ -300,4 +302,61 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # Remove 'alert' se existir (usuário não precisa)
         clean_payload = {k: v for k, v in event.items() if k != "alert"}
 
-        await self.send(text_data=json.dumps(clean_payload))
\ No newline at end of file
+        await self.send(text_data=json.dumps(clean_payload))
+
+
+class QuadroChamadosConsumer(AsyncJsonWebsocketConsumer):
+    """Quadro de chamados: repassa os eventos publicados por Chamado.save() (ver quadro.py)."""
+
+    async def connect(self):
+        if not self.scope["user"].is_authenticated:
+            await self.close()
+            return
+        await self.channel_layer.group_add(GRUPO_QUADRO, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(GRUPO_QUADRO, self.channel_name)
+
+    # === HANDLERS DE EVENTOS ===
+    async def chamado_evento(self, event):
+        await self.send_json({
+            "evento": event["evento"],
+            "chamado": event["chamado"],
+        })
+
+
+class ImportacaoInventarioConsumer(AsyncJsonWebsocketConsumer):
+    """Progresso de uma importação do inventário (ver fila_importacao.py), só para admins."""
+
+    async def connect(self):
+        # Importado aqui: o routing é carregado antes do django.setup() (asgi.py)
+        from .fila_importacao import grupo_importacao
+
+        user = self.scope["user"]
+        if not user.is_authenticated or getattr(user, 'papel', '') != 'admin':
+            await self.close()
+            return
+        self.group_name = grupo_importacao(self.scope['url_route']['kwargs']['pk'])
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        # Estado atual: a importação pode ter avançado (ou terminado) antes da conexão
+        dados = await database_sync_to_async(self.estado_atual)()
+        if dados:
+            await self.send_json(dados)
+
+    def estado_atual(self):
+        from .fila_importacao import dados_importacao
+        from .models import ImportacaoInventario
+
+        importacao = ImportacaoInventario.objects.filter(pk=self.scope['url_route']['kwargs']['pk']).first()
+        return dados_importacao(importacao) if importacao else None
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    # === HANDLERS DE EVENTOS ===
+    async def importacao_progresso(self, event):
+        await self.send_json(event["importacao"])
@@ -0,0 +1,429 @@
+import atexit
+import io
+import base64
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db.models import Avg, Case, Count, DurationField, ExpressionWrapper, F, Q, Sum, When
+
+from .cache_graficos import obter_graficos, salvar_graficos
+
+
+# ------------------------------
+# Agregações (feitas no banco)
+# ------------------------------
+
+# Motivo exibido nos gráficos: "OUTRO" usa o texto digitado em outro_motivo
+MOTIVO_GRAFICO = Case(
+    When(
+        Q(motivo='OUTRO') & Q(outro_motivo__isnull=False) & ~Q(outro_motivo=''),
+        then=F('outro_motivo'),
+    ),
+    default=F('motivo'),
+)
+
+
+def contar_por(qs, campo, medida=None):
+    """Retorna [(valor, quantidade), ...] do maior para o menor, via GROUP BY."""
+    linhas = (
+        qs.exclude(**{f'{campo}__isnull': True})
+        .values_list(campo)
+        .annotate(total=medida or Count('id'))
+        .order_by('-total', campo)
+    )
+    return [(valor, total) for valor, total in linhas if total]
+
+
+def tempo_medio_por_motivo(qs):
+    """Retorna [(motivo, minutos), ...] em ordem crescente de tempo médio."""
+    duracao = ExpressionWrapper(F('fechado_em') - F('aberto_em'), output_field=DurationField())
+    linhas = (
+        qs.filter(fechado_em__isnull=False)
+        .exclude(motivo__isnull=True)
+        .values_list('motivo')
+        .annotate(media=Avg(duracao))
+        .order_by('media', 'motivo')
+    )
+    return [(motivo, media.total_seconds() / 60) for motivo, media in linhas if media is not None]
+
+
+def agregar_resumo(qs):
+    """
+    Mesmas séries de agregar_chamados(), lidas de ResumoDiarioChamado
+    (algumas centenas de linhas por período em vez do histórico de chamados).
+    """
+    qs = qs.order_by()
+    quantidade = Sum('quantidade')
+    status = contar_por(qs, 'status', quantidade)
+
+    tempos = (
+        qs.values_list('motivo')
+        .annotate(soma=Sum('tempo_total'), n=Sum('com_tempo'))
+        .filter(n__gt=0)
+    )
+    tempo_medio = sorted(
+        ((motivo, soma.total_seconds() / 60 / n) for motivo, soma, n in tempos),
+        key=lambda item: (item[1], item[0]),
+    )
+
+    return {
+        'total': sum(total for _, total in status),
+        'status': status,
+        'regionais': contar_por(qs, 'regional', quantidade),
+        'lideres': contar_por(qs, 'lider', quantidade),
+        'motivos': contar_por(qs.annotate(motivo_grafico=MOTIVO_GRAFICO), 'motivo_grafico', quantidade),
+        'tempo_medio': tempo_medio,
+    }
+
+
+def agregar_chamados(qs):
+    """
+    Calcula as séries usadas pelo dashboard a partir de um queryset de Chamado.
+    Nenhuma linha de chamado é carregada em Python: apenas os totais agrupados.
+
+    As views usam agregar_resumo(); esta fica como implementação de referência,
+    direto da tabela de chamados: os testes conferem o resumo diário contra ela
+    e serve para auditar o resumo no shell (ex.: antes de `reconstruir_resumo`).
+    """
+    qs = qs.order_by()
+    status = contar_por(qs, 'status')
+    return {
+        'total': sum(total for _, total in status),
+        'status': status,
+        'regionais': contar_por(qs, 'regional'),
+        'lideres': contar_por(qs, 'lider'),
+        'motivos': contar_por(qs.annotate(motivo_grafico=MOTIVO_GRAFICO), 'motivo_grafico'),
+        'tempo_medio': tempo_medio_por_motivo(qs),
+    }
+
+
+# ------------------------------
+# Séries prontas para desenhar
+# ------------------------------
+
+def serie_pizza(serie):
+    """Top 5 + fatia "Outros" com o restante."""
+    top = list(serie[:5])
+    outros = sum(total for _, total in serie[5:])
+    if outros > 0:
+        top.append(("Outros", outros))
+    return top
+
+
+def serie_barras(serie):
+    """Top 10 em ordem crescente (o gráfico inverte o eixo)."""
+    return sorted(serie[:10], key=lambda item: item[1])
+
+
+def dados_graficos(agregado, incluir_tempo_medio=True):
+    """Séries (labels/valores) dos gráficos, para o navegador desenhar."""
+    series = {
+        'status': serie_pizza(agregado['status']),
+        'lideres': serie_barras(agregado['lideres']),
+        'motivos': serie_barras(agregado['motivos']),
+        'regionais': serie_barras(agregado['regionais']),
+    }
+    if incluir_tempo_medio:
+        series['tempo_medio'] = [(motivo, round(minutos, 1)) for motivo, minutos in agregado['tempo_medio']]
+    return {
+        tipo: {'labels': [str(rotulo) for rotulo, _ in serie], 'valores': [valor for _, valor in serie]}
+        for tipo, serie in series.items()
+    }
+
+
+# ------------------------------
+# Gráficos
+# ------------------------------
+# matplotlib/seaborn custam segundos e dezenas de MB para importar; só são
+# carregados quando um PNG é de fato renderizado (não no boot nem no login).
+
+def carregar_pyplot():
+    """Importa matplotlib (backend Agg) e seaborn sob demanda. Retorna (plt, sns)."""
+    import matplotlib
+    matplotlib.use("Agg")  # backend sem GUI
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+def imagem_para_png(fig):
+    plt, _ = carregar_pyplot()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def imagem_para_base64(fig):
+    return base64.b64encode(imagem_para_png(fig)).decode("utf-8")
+
+
+def exportar_figura(fig, formato):
+    """formato='base64' (padrão dos templates) ou 'png' (bytes, usado pelo pool)."""
+    return imagem_para_png(fig) if formato == 'png' else imagem_para_base64(fig)
+
+
+def gerar_grafico_pie(serie, titulo, icone="ChartPie", formato='base64'):
+    if not serie:
+        return None
+
+    from matplotlib import patheffects as path_effects
+
+    plt, sns = carregar_pyplot()
+    top = serie_pizza(serie)
+    rotulos = [rotulo for rotulo, _ in top]
+    valores = [total for _, total in top]
+    colors = sns.color_palette("husl", len(top))
+
+    fig, ax = plt.subplots(figsize=(6, 6), facecolor='white')
+    wedges, texts, autotexts = ax.pie(
+        valores,
+        labels=rotulos,
+        autopct=lambda p: f'{p:.1f}%' if p > 3 else '',
+        startangle=90,
+        colors=colors,
+        wedgeprops=dict(width=0.4, edgecolor='white', linewidth=2),
+        textprops=dict(color="black", fontsize=9, weight='medium')
+    )
+
+    # Estiliza % com fundo de contraste
+    for autotext in autotexts:
+        if autotext.get_text():
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+            autotext.set_fontsize(9)
+            autotext.set_path_effects([
+                path_effects.Stroke(linewidth=2, foreground='black'),
+                path_effects.Normal()
+            ])
+
+    ax.set_title(f"{titulo}", fontsize=14, weight='bold', pad=20, loc='center')
+
+    fig.patch.set_facecolor('#f8fafc')
+    ax.set_facecolor('#f8fafc')
+
+    plt.tight_layout()
+    return exportar_figura(fig, formato)
+
+
+def gerar_grafico_bar(serie, titulo, icone="ChartBar", formato='base64'):
+    if not serie:
+        return None
+
+    plt, sns = carregar_pyplot()
+    top = serie_barras(serie)
+    rotulos = [str(rotulo) for rotulo, _ in top]
+    valores = [total for _, total in top]
+    colors = sns.color_palette("viridis", len(top))
+
+    fig, ax = plt.subplots(figsize=(8, 5), facecolor='white')
+
+    bars = ax.barh(rotulos, valores, color=colors, height=0.7, edgecolor='white', linewidth=1)
+
+    ax.set_xlabel("Quantidade", fontsize=11, weight='600')
+    ax.set_title(titulo, fontsize=14, weight='bold', pad=20)
+
+    # Grid suave
+    ax.grid(axis='x', alpha=0.3, linestyle='--', linewidth=0.7)
+    ax.set_axisbelow(True)
+
+    # Números dentro da barra
+    for bar, val in zip(bars, valores):
+        if val > 0:
+            ax.text(
+                val - (val * 0.02), bar.get_y() + bar.get_height() / 2,
+                str(int(val)),
+                va='center', ha='right', color='white', fontweight='bold', fontsize=10
+            )
+
+    ax.invert_yaxis()
+    plt.tight_layout()
+    fig.patch.set_facecolor('#f8fafc')
+    ax.set_facecolor('#f8fafc')
+
+    return exportar_figura(fig, formato)
+
+
+def gerar_grafico_tempo_medio(serie, titulo="Tempo Médio de Suporte", formato='base64'):
+    if not serie:
+        return None
+
+    plt, sns = carregar_pyplot()
+    rotulos = [str(motivo) for motivo, _ in serie]
+    valores = [minutos for _, minutos in serie]
+    colors = sns.color_palette("mako", len(serie))
+
+    fig, ax = plt.subplots(figsize=(8, 6), facecolor='white')
+    bars = ax.barh(rotulos, valores, color=colors, height=0.7, edgecolor='white')
+
+    ax.set_xlabel("Minutos", fontsize=11, weight='600')
+    ax.set_title(titulo, fontsize=14, weight='bold', pad=20)
+
+    ax.grid(axis='x', alpha=0.3, linestyle='--')
+    ax.set_axisbelow(True)
+
+    # Números com fundo
+    for bar, val in zip(bars, valores):
+        ax.text(
+            val + 2, bar.get_y() + bar.get_height()/2,
+            f"{val:.0f} min",
+            va='center', ha='left', color='#1f2937', fontweight='bold', fontsize=10
+        )
+
+    ax.invert_yaxis()
+    plt.tight_layout()
+    fig.patch.set_facecolor('#f8fafc')
+    ax.set_facecolor('#f8fafc')
+
+    return exportar_figura(fig, formato)
+
+
+# tipo -> (função, série em agregar_resumo(), título)
+GRAFICOS = {
+    'status': (gerar_grafico_pie, 'status', 'Status dos Chamados'),
+    'lideres': (gerar_grafico_bar, 'lideres', 'Principais Líderes'),
+    'motivos': (gerar_grafico_bar, 'motivos', 'Principais Motivos'),
+    'regionais': (gerar_grafico_bar, 'regionais', 'Chamados por Regional'),
+    'tempo_medio': (gerar_grafico_tempo_medio, 'tempo_medio', 'Tempo Médio de Suporte'),
+}
+
+
+# ------------------------------
+# Pool de processos para renderização
+# ------------------------------
+# O pyplot não é thread-safe e segura o GIL, então os gráficos independentes
+# são renderizados em processos separados (spawn, sem herdar conexões/threads).
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def workers_graficos():
+    """DASHBOARD_WORKERS_GRAFICOS; None = automático (1 por gráfico, limitado às CPUs)."""
+    workers = getattr(settings, 'DASHBOARD_WORKERS_GRAFICOS', None)
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = min(len(GRAFICOS), cpus) if cpus > 1 else 0
+    return workers
+
+
+def timeout_graficos():
+    """DASHBOARD_TIMEOUT_GRAFICOS: segundos de espera pelo pool antes de renderizar aqui mesmo."""
+    return getattr(settings, 'DASHBOARD_TIMEOUT_GRAFICOS', 30)
+
+
+def _inicializar_worker():
+    """Pré-aquece o worker: backend Agg, paletas do seaborn e cache de fontes."""
+    from matplotlib import font_manager
+
+    plt, sns = carregar_pyplot()
+    for nome in ("husl", "viridis", "mako"):
+        sns.color_palette(nome, 10)
+    font_manager.findfont(font_manager.FontProperties(family='sans-serif', weight='bold'))
+    fig, ax = plt.subplots()
+    ax.text(0, 0, "aquecimento", fontweight='bold')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _aquecer():
+    return os.getpid()
+
+
+def _renderizar_png(tipo, serie, titulo):
+    """Executado no worker: devolve os bytes do PNG."""
+    funcao = GRAFICOS[tipo][0]
+    return funcao(serie, titulo, formato='png')
+
+
+def pool_graficos():
+    """Pool compartilhado, criado e aquecido no primeiro uso. None se desativado."""
+    global _pool
+    workers = workers_graficos()
+    if workers < 2:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_worker,
+            )
+            for _ in range(workers):
+                _pool.submit(_aquecer)
+        return _pool
+
+
+def encerrar_pool_graficos():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(encerrar_pool_graficos)
+
+
+def renderizar_graficos(tarefas):
+    """
+    Renderiza {tipo: (serie, titulo)} e retorna {tipo: base64}.
+    Usa o pool quando há mais de um gráfico; sem pool (ou se ele quebrar ou
+    passar de timeout_graficos()), renderiza em série o que ainda faltar.
+    """
+    pool = pool_graficos() if len(tarefas) > 1 else None
+    plots = {}
+
+    if pool is not None:
+        limite = time.monotonic() + timeout_graficos()
+        try:
+            futuros = {
+                tipo: pool.submit(_renderizar_png, tipo, serie, titulo)
+                for tipo, (serie, titulo) in tarefas.items()
+            }
+            for tipo, futuro in futuros.items():
+                png = futuro.result(timeout=max(0, limite - time.monotonic()))
+                plots[tipo] = base64.b64encode(png).decode("utf-8") if png else None
+            return plots
+        except TimeoutError:
+            print(f"[ERRO] Pool de gráficos sem resposta em {timeout_graficos()}s; renderizando no processo")
+            encerrar_pool_graficos()
+        except BrokenProcessPool:
+            encerrar_pool_graficos()
+
+    for tipo, (serie, titulo) in tarefas.items():
+        if tipo not in plots:
+            plots[tipo] = GRAFICOS[tipo][0](serie, titulo)
+    return plots
+
+
+def gerar_graficos(agregado, incluir_tempo_medio=True, filtros=None, versao=None):
+    """
+    Gera os gráficos do dashboard (base64) a partir de agregar_resumo() (ou agregar_chamados()).
+    Com `filtros`, reaproveita/salva os PNGs no cache versionado (cache_graficos);
+    `versao` é a de versao_dados() lida ANTES de agregar, para que gráficos de
+    dados antigos não sejam gravados sob uma versão mais nova.
+    Os que faltam são renderizados em paralelo no pool de processos.
+    """
+    tipos = [tipo for tipo in GRAFICOS if incluir_tempo_medio or tipo != 'tempo_medio']
+
+    plots = obter_graficos(tipos, filtros, versao) if filtros is not None else {}
+    tarefas = {}
+    for tipo in tipos:
+        if tipo in plots:
+            continue
+        _, serie, titulo = GRAFICOS[tipo]
+        tarefas[tipo] = (agregado[serie], titulo)
+
+    novos = renderizar_graficos(tarefas) if tarefas else {}
+
+    if novos and filtros is not None:
+        salvar_graficos(novos, filtros, versao)
+
+    plots.update(novos)
+    return {tipo: plots[tipo] for tipo in tipos}
@@ -0,0 +1,141 @@
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Case, CharField, DurationField, F, Q, TextField, Value, When
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+
+# ------------------------------
+# Exportação dos chamados para Excel
+# ------------------------------
+# Antes: lista de dicts com todos os chamados → DataFrame → df.to_excel, ou seja
+# três cópias do período inteiro na memória e nada saindo até o fim.
+# Agora o queryset é percorrido com .iterator(chunk_size=...) e cada linha vai
+# direto para o xlsxwriter em modo constant_memory, que grava linha a linha num
+# arquivo temporário. A view devolve esse arquivo com FileResponse (streaming):
+# a memória fica a mesma para um dia ou um ano de chamados.
+# A consulta não carrega instâncias de Chamado: é um values_list só com as
+# colunas marcadas, e motivo "OUTRO (...)", nomes de quem abriu/fechou e a
+# duração saem prontos do SQL. Exportar duas colunas lê só essas duas.
+
+CAMPOS_EXPORTACAO = {
+    'id': 'ID',
+    'regional': 'Regional',
+    'loja': 'Loja',
+    'lider': 'Líder',
+    'motivo': 'Motivo',
+    'abertura': 'Abertura',
+    'fechamento': 'Fechamento',
+    'aberto_por': 'Aberto por',
+    'fechado_por': 'Fechado por',
+    'status': 'Status',
+    'duracao': 'Duração',
+    'tempo_manual': 'Tempo Manual',
+    'observacao': 'Observação',
+}
+
+TAMANHO_LOTE_EXPORTACAO = 2000
+
+
+def nome_usuario(campo, sem_usuario):
+    """get_full_name() no banco: "nome sobrenome" sem espaços nas pontas."""
+    return Case(
+        When(**{f'{campo}__isnull': True}, then=Value(sem_usuario)),
+        default=Trim(Concat(f'{campo}__first_name', Value(' '), f'{campo}__last_name')),
+        output_field=CharField(),
+    )
+
+
+def data_hora(valor):
+    return valor.strftime('%d/%m/%Y %H:%M:%S') if valor else ''
+
+
+def horas_minutos(duracao):
+    total_minutos = int((duracao or timedelta(0)).total_seconds() // 60)
+    return f"{total_minutos // 60}h {total_minutos % 60}min"
+
+
+# O que cada coluna lê do banco. Só as colunas marcadas entram no SELECT
+# (values_list), com motivo, nomes e duração já montados no SQL
+EXPRESSOES_EXPORTACAO = {
+    'id': F('id'),
+    'regional': F('regional'),
+    'loja': F('loja'),
+    'lider': F('lider'),
+    # "OUTRO" com texto digitado sai como "OUTRO (texto)"
+    'motivo': Case(
+        When(
+            Q(motivo__iexact='OUTRO') & Q(outro_motivo__isnull=False) & ~Q(outro_motivo=''),
+            then=Concat(Value('OUTRO ('), 'outro_motivo', Value(')')),
+        ),
+        default=F('motivo'),
+        output_field=CharField(),
+    ),
+    'abertura': F('aberto_em'),
+    'fechamento': F('fechado_em'),
+    'aberto_por': nome_usuario('aberto_por', "Usuário excluído"),
+    'fechado_por': nome_usuario('fechado_por', ""),
+    'status': F('status'),
+    # Tempo manual (se diferente de zero) sobrescreve a duração calculada
+    'duracao': Coalesce(
+        NullIf('tempo_manual', Value(timedelta(0), output_field=DurationField())),
+        'duracao',
+        output_field=DurationField(),
+    ),
+    'tempo_manual': F('tempo_manual'),
+    'observacao': Coalesce('observacao', Value(''), output_field=TextField()),
+}
+
+# Formatação que fica no Python (datas e durações em texto, como antes)
+FORMATOS_EXPORTACAO = {
+    'abertura': data_hora,
+    'fechamento': data_hora,
+    'duracao': horas_minutos,
+    'tempo_manual': lambda tempo: str(tempo) if tempo else "",
+}
+
+
+def colunas_exportacao(campos):
+    """Campos pedidos (na ordem dos checkboxes) que existem; vazio = todos."""
+    if campos:
+        return [c for c in campos if c in CAMPOS_EXPORTACAO]
+    return list(CAMPOS_EXPORTACAO)
+
+
+def linhas_exportacao(chamados, colunas, tamanho_lote):
+    """Tuplas já formatadas, na ordem de `colunas`, lidas do banco em lotes."""
+    # Apelidos próprios: annotate não aceita nomes de campos do modelo
+    apelidos = {f'exportar_{campo}': EXPRESSOES_EXPORTACAO[campo] for campo in dict.fromkeys(colunas)}
+    consulta = chamados.annotate(**apelidos).values_list(*apelidos)
+    posicoes = {campo: i for i, campo in enumerate(dict.fromkeys(colunas))}
+    formatos = [(posicoes[campo], FORMATOS_EXPORTACAO.get(campo)) for campo in colunas]
+    for valores in consulta.iterator(chunk_size=tamanho_lote):
+        yield [formatar(valores[i]) if formatar else valores[i] for i, formatar in formatos]
+
+
+def exportar_chamados(chamados, colunas, tamanho_lote=None):
+    """
+    Grava os chamados numa planilha .xlsx temporária e devolve (arquivo, linhas),
+    com o arquivo já posicionado no início. Só o lote atual fica na memória.
+    """
+    import xlsxwriter
+
+    tamanho_lote = tamanho_lote or getattr(settings, 'EXPORTACAO_TAMANHO_LOTE', TAMANHO_LOTE_EXPORTACAO)
+
+    arquivo = tempfile.TemporaryFile()
+    pasta = xlsxwriter.Workbook(arquivo, {'constant_memory': True})
+    try:
+        aba = pasta.add_worksheet()
+        # Mesmo cabeçalho do df.to_excel
+        cabecalho = pasta.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        aba.write_row(0, 0, [CAMPOS_EXPORTACAO[c] for c in colunas], cabecalho)
+
+        linhas = 0
+        for valores in linhas_exportacao(chamados, colunas, tamanho_lote):
+            linhas += 1
+            aba.write_row(linhas, 0, valores)
+        pasta.close()
+    except Exception:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return arquivo, linhas
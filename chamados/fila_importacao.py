@@ -0,0 +1,246 @@
+import atexit
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .importacao import importar_planilha
+from .models import ImportacaoInventario
+
+# ------------------------------
+# Fila de importação do inventário
+# ------------------------------
+# O upload_excel só salva o arquivo e cria uma ImportacaoInventario; a leitura
+# e a gravação rodam numa thread de trabalho (uma por processo), fora do
+# request. O progresso (linhas lidas, status, resultado) vai pelo channel layer
+# para o grupo da importação; o ImportacaoInventarioConsumer repassa para a
+# página de upload. Quem grava e publica o progresso é uma thread à parte, com
+# conexão própria: a carga do inventário roda numa transação longa, e o sinal
+# de vida precisa ficar visível antes dela terminar. A constraint de `em_aberto` garante uma importação por vez
+# entre todos os processos; se o processo morrer no meio, a importação parada
+# há mais de IMPORTACAO_INVENTARIO_TIMEOUT segundos é marcada como erro.
+
+ARQUIVO_INVENTARIO = os.path.join('uploads', 'chamados.xlsx')
+INTERVALO_PROGRESSO = 0.5  # segundos entre avisos de progresso
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImportacaoEmAndamento(Exception):
+    """Já há uma importação na fila ou em andamento."""
+
+
+def grupo_importacao(pk):
+    return f'importacao_inventario_{pk}'
+
+
+def dados_importacao(importacao):
+    """O que a página de upload mostra da importação."""
+    return {
+        'id': importacao.pk,
+        'status': importacao.status,
+        'em_aberto': importacao.em_aberto,
+        'nome_original': importacao.nome_original,
+        'linhas_lidas': importacao.linhas_lidas,
+        'linhas': importacao.linhas,
+        'novas': importacao.novas,
+        'alteradas': importacao.alteradas,
+        'removidas': importacao.removidas,
+        'inalteradas': importacao.inalteradas,
+        'modo': importacao.modo,
+        'segundos_espera': importacao.segundos_espera,
+        'segundos_gravacao': importacao.segundos_gravacao,
+        'segundos_total': importacao.segundos_total,
+        'erro': importacao.erro,
+    }
+
+
+def publicar_progresso(importacao):
+    """Envia o estado ao grupo da importação. Falha do Redis não interrompe a importação."""
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(grupo_importacao(importacao.pk), {
+            'type': 'importacao.progresso',
+            'importacao': dados_importacao(importacao),
+        })
+    except Exception as erro:
+        print(f"[ERRO] Importação #{importacao.pk}: não foi possível publicar o progresso: {erro}")
+
+
+def executor_importacao():
+    """Uma thread de trabalho por processo: as importações daqui rodam em série."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='importacao-inventario')
+        return _executor
+
+
+def encerrar_executor_importacao():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+atexit.register(encerrar_executor_importacao)
+
+
+def liberar_importacoes_paradas():
+    """Marca como erro a importação aberta sem sinal de vida há mais de IMPORTACAO_INVENTARIO_TIMEOUT."""
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'IMPORTACAO_INVENTARIO_TIMEOUT', 30 * 60))
+    for pk in ImportacaoInventario.objects.filter(em_aberto=True, atualizado_em__lt=limite).values_list('pk', flat=True):
+        # UPDATE condicional: se o sinal de vida chegou nesse meio tempo, não mexe
+        liberada = ImportacaoInventario.objects.filter(pk=pk, em_aberto=True, atualizado_em__lt=limite).update(
+            status='Erro',
+            em_aberto=False,
+            terminado_em=timezone.now(),
+            erro="Importação interrompida (o servidor reiniciou no meio?).",
+        )
+        if liberada:
+            publicar_progresso(ImportacaoInventario.objects.get(pk=pk))
+
+
+def enfileirar_importacao(arquivo, usuario):
+    """
+    Salva o upload em uploads/chamados.xlsx e agenda a importação para depois
+    do commit. Levanta ImportacaoEmAndamento se já houver uma aberta.
+    """
+    liberar_importacoes_paradas()
+    try:
+        with transaction.atomic():
+            importacao = ImportacaoInventario.objects.create(
+                arquivo=os.path.join(settings.MEDIA_ROOT, ARQUIVO_INVENTARIO),
+                nome_original=getattr(arquivo, 'name', '') or '',
+                criado_por=usuario if usuario and usuario.is_authenticated else None,
+            )
+    except IntegrityError:
+        raise ImportacaoEmAndamento(
+            "⏳ Já existe uma importação do inventário em andamento. Aguarde ela terminar."
+        )
+
+    # Só uma importação aberta: ninguém mais está lendo o arquivo agora.
+    # O hash sai junto com a gravação (para pular reenvios do mesmo arquivo)
+    try:
+        os.makedirs(os.path.dirname(importacao.arquivo), exist_ok=True)
+        assinatura = hashlib.sha256()
+        with open(importacao.arquivo, "wb+") as destino:
+            for chunk in arquivo.chunks():
+                destino.write(chunk)
+                assinatura.update(chunk)
+        importacao.hash_arquivo = assinatura.hexdigest()
+        importacao.save(update_fields=['hash_arquivo'])
+    except Exception as erro:
+        finalizar_importacao(importacao, erro=f"Não foi possível salvar o arquivo: {erro}")
+        raise
+
+    transaction.on_commit(lambda: executor_importacao().submit(executar_importacao, importacao.pk))
+    return importacao
+
+
+def finalizar_importacao(importacao, resultado=None, erro=''):
+    importacao.em_aberto = False
+    importacao.terminado_em = timezone.now()
+    if resultado is not None:
+        importacao.status = 'Concluída'
+        importacao.linhas = resultado['linhas']
+        importacao.novas = resultado['novas']
+        importacao.alteradas = resultado['alteradas']
+        importacao.removidas = resultado['removidas']
+        importacao.inalteradas = resultado['inalteradas']
+        importacao.modo = resultado['modo']
+        importacao.backend = resultado['backend']
+        importacao.segundos_gravacao = resultado['segundos']
+    else:
+        importacao.status = 'Erro'
+        importacao.erro = str(erro)
+    importacao.save()
+    publicar_progresso(importacao)
+
+
+def acompanhar_importacao(importacao, parar):
+    """
+    Thread de progresso: a cada INTERVALO_PROGRESSO publica as linhas lidas e
+    renova atualizado_em (sinal de vida para liberar_importacoes_paradas).
+    Roda com a conexão própria da thread, em autocommit: a gravação do
+    inventário pode estar numa transação longa, e o progresso tem que aparecer
+    para os outros antes dela terminar (e sem travar a linha da importação).
+    """
+    try:
+        while not parar.wait(INTERVALO_PROGRESSO):
+            publicar_progresso(importacao)
+            try:
+                ImportacaoInventario.objects.filter(pk=importacao.pk, em_aberto=True).update(
+                    linhas_lidas=importacao.linhas_lidas, atualizado_em=timezone.now()
+                )
+            except Exception as erro:
+                print(f"[ERRO] Importação #{importacao.pk}: não foi possível gravar o progresso: {erro}")
+    finally:
+        connection.close()
+
+
+@contextmanager
+def acompanhando(importacao):
+    """acompanhar_importacao numa thread enquanto o bloco roda; para antes de sair."""
+    parar = threading.Event()
+    thread = threading.Thread(
+        target=acompanhar_importacao, args=(importacao, parar),
+        name=f'importacao-inventario-{importacao.pk}-progresso', daemon=True,
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        thread.join()
+
+
+def executar_importacao(pk):
+    """Roda na thread de trabalho: lê a planilha, grava e publica o progresso."""
+    try:
+        importacao = ImportacaoInventario.objects.get(pk=pk)
+        importacao.status = 'Em andamento'
+        importacao.iniciado_em = timezone.now()
+        importacao.save(update_fields=['status', 'iniciado_em', 'atualizado_em'])
+        publicar_progresso(importacao)
+
+        def progresso(linhas_lidas):
+            # Só anota: quem grava e publica é a thread de acompanhar_importacao
+            importacao.linhas_lidas = linhas_lidas
+
+        try:
+            with acompanhando(importacao):
+                resultado = importar_planilha(
+                    importacao.arquivo, progresso=progresso, hash_arquivo=importacao.hash_arquivo
+                )
+        except ValueError as erro:
+            finalizar_importacao(importacao, erro=erro)
+            return
+        except Exception as erro:
+            print(f"[ERRO] Importação #{pk} do inventário: {erro}")
+            finalizar_importacao(importacao, erro=f"Erro inesperado: {erro}")
+            return
+
+        importacao.linhas_lidas = resultado['linhas']
+        finalizar_importacao(importacao, resultado)
+        print(
+            f"[INFO] Inventário importado: {resultado['linhas']} linhas em "
+            f"{resultado['segundos']:.2f}s ({resultado['linhas_por_segundo']:.0f} linhas/s, "
+            f"{resultado['modo']}, {resultado['backend']})"
+        )
+    except Exception as erro:
+        print(f"[ERRO] Importação #{pk} do inventário: {erro}")
+    finally:
+        connection.close()
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache_graficos import invalidar_graficos
+from .models import Chamado, dia_local
+from .quadro import notificar_quadro
+from .resumo import CAMPOS_RESUMO, acumular, aplicar_deltas, contribuicao_resumo, novos_deltas
+
+# ------------------------------
+# Finalização em lote
+# ------------------------------
+# Um único UPDATE fecha todos os chamados ainda abertos da lista, calculando a
+# duração no banco. Como update() não passa pelo save(), aqui também são feitos
+# os efeitos colaterais do save(): resumo diário, cache dos gráficos,
+# atualizado_em/fechado_dia e eventos do quadro em tempo real. (O vetor de busca
+# é mantido pelo trigger do PostgreSQL.)
+
+FINALIZADO = 'finalizado'
+JA_FINALIZADO = 'ja_finalizado'
+NAO_ENCONTRADO = 'nao_encontrado'
+
+
+def finalizar_em_lote(ids, usuario, observacao=None, tempo_manual=None):
+    """
+    Finaliza os chamados `ids` numa transação. `observacao` (se informada)
+    substitui a de todos; `tempo_manual` (timedelta ou None) vale como duração.
+    Retorna {id: 'finalizado' | 'ja_finalizado' | 'nao_encontrado'}.
+    """
+    ids = sorted(set(ids))
+    agora = timezone.now()
+
+    with transaction.atomic():
+        # Trava as linhas (PostgreSQL) e guarda o estado anterior para o resumo
+        chamados = list(
+            Chamado.objects.select_for_update(of=('self',))
+            .filter(pk__in=ids)
+            .only('id', 'aberto_por', 'aberto_dia', *CAMPOS_RESUMO)
+            .order_by('id')
+        )
+        abertos = [chamado for chamado in chamados if chamado.status != 'Finalizado']
+
+        if abertos:
+            duracao = Coalesce(
+                Value(tempo_manual, output_field=DurationField()),
+                F('duracao'),
+                ExpressionWrapper(
+                    Value(agora, output_field=DateTimeField()) - F('aberto_em'), output_field=DurationField()
+                ),
+            )
+            campos = {
+                'status': 'Finalizado',
+                'fechado_por': usuario,
+                'fechado_em': agora,
+                'fechado_dia': dia_local(agora),
+                'tempo_manual': tempo_manual,
+                'duracao': duracao,
+                'atualizado_em': agora,
+            }
+            if observacao:
+                campos['observacao'] = observacao
+            Chamado.objects.filter(pk__in=[chamado.pk for chamado in abertos]).update(**campos)
+
+            # Resumo diário: um delta agregado para o lote inteiro
+            deltas = novos_deltas()
+            for chamado in abertos:
+                acumular(deltas, chamado._resumo_original, -1)
+                chamado.status, chamado.fechado_em = 'Finalizado', agora
+                acumular(deltas, contribuicao_resumo(chamado), +1)
+                notificar_quadro(chamado, 'finalizado')
+            aplicar_deltas(deltas)
+            invalidar_graficos()
+
+    resultados = {pk: NAO_ENCONTRADO for pk in ids}
+    resultados.update({chamado.pk: JA_FINALIZADO for chamado in chamados})
+    resultados.update({chamado.pk: FINALIZADO for chamado in abertos})
+    return resultados
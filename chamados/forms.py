@@ -1,6 +1,6 @@
 from django import forms
 from .models import Chamado, InventarioExcel
-import pandas as pd
+from .motivos import MOTIVOS_FIXOS
 
 # ------------------------------
 # Formulário de Login
@@ -14,9 +14,17 @@ class LoginForm(forms.Form):
 # Formulário de Chamado
 # ------------------------------
 
+class ChoiceFieldConjunto(forms.ChoiceField):
+    """ChoiceField validado por conjunto (hash) em vez de percorrer as choices."""
+    valores = frozenset()
+
+    def valid_value(self, value):
+        return value in self.valores
+
+
 class ChamadoForm(forms.ModelForm):
-    regional = forms.ChoiceField(label="Regional", choices=[], required=True)
-    loja = forms.ChoiceField(label="Loja", choices=[], required=True)
+    regional = ChoiceFieldConjunto(label="Regional", choices=[], required=True)
+    loja = ChoiceFieldConjunto(label="Loja", choices=[], required=True)
     lider = forms.CharField(label="Líder", required=True)  # mudou para CharField
     motivo = forms.ChoiceField(label="Motivo do Suporte", choices=[])
     outro_motivo = forms.CharField(label="Outro Motivo", required=False)
@@ -26,9 +34,11 @@ class ChamadoForm(forms.ModelForm):
         fields = ['regional', 'loja', 'lider', 'motivo', 'outro_motivo']
 
     def __init__(self, *args, **kwargs):
-        regionais = kwargs.pop('regionais', [])
-        lojas = kwargs.pop('lojas', [])
-        lideres = kwargs.pop('lideres', [])
+        # inventario: NivelInventario (chamados/inventario.py) com listas e conjuntos prontos
+        inventario = kwargs.pop('inventario', None)
+        regionais = kwargs.pop('regionais', inventario.regionais if inventario else [])
+        lojas = kwargs.pop('lojas', inventario.lojas if inventario else [])
+        lideres = kwargs.pop('lideres', inventario.lideres if inventario else [])
         motivos_db = kwargs.pop('motivos_db', [])
         initial = kwargs.get('initial', {})
         super().__init__(*args, **kwargs)
@@ -36,21 +46,13 @@ class ChamadoForm(forms.ModelForm):
         # Popula os ChoiceFields com opções do banco
         self.fields['regional'].choices = [('', 'Selecione uma Regional')] + [(r, r) for r in regionais]
         self.fields['loja'].choices = [('', 'Selecione uma Loja')] + [(l, l) for l in lojas]
+        self.fields['regional'].valores = inventario.conjunto_regionais if inventario else frozenset(regionais)
+        self.fields['loja'].valores = inventario.conjunto_lojas if inventario else frozenset(lojas)
         # Líder é CharField, então não precisa de choices
         # self.fields['lider'].choices = [(ld, ld) for ld in lideres]
 
-        motivos_fixos = [
-            ('', 'Selecione um Motivo'),
-            ('FALHA NA IMPRESSÃO', 'FALHA NA IMPRESSÃO'),
-            ('IMPRESSORA QUEIMADA', 'IMPRESSORA QUEIMADA'),
-            ('IMPRESSORA NÃO RECONHECE', 'IMPRESSORA NÃO RECONHECE'),
-            ('ROUTER NÃO FUNCIONA', 'ROUTER NÃO FUNCIONA'),
-            ('NOTEBOOK NÃO LIGA', 'NOTEBOOK NÃO LIGA'),
-            ('COLETOR NÃO CONECTA NA REDE', 'COLETOR NÃO CONECTA NA REDE'),
-            ('COLETOR NÃO TRANSMITE', 'COLETOR NÃO TRANSMITE'),
-            ('OUTRO', 'OUTRO')
-        ]
-        # Motivos fixos + motivos do banco, sem duplicar
+        motivos_fixos = [('', 'Selecione um Motivo')] + [(m, m) for m in MOTIVOS_FIXOS]
+        # Motivos fixos + aprendidos do catálogo (chamados/motivos.py), sem duplicar
         motivos_completos = motivos_fixos + [(m, m) for m in motivos_db if m not in dict(motivos_fixos)]
         self.fields['motivo'].choices = motivos_completos
 
@@ -0,0 +1,494 @@
+import csv
+import hashlib
+import itertools
+import os
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .inventario import invalidar_inventario
+from .models import InventarioExcel, VersaoInventario
+from .planilha import ler_colunas, ler_lotes
+
+# ------------------------------
+# Importação do inventário (Excel → InventarioExcel)
+# ------------------------------
+# A planilha é normalizada com operações vetorizadas do pandas (nada de
+# iterrows / pd.to_datetime por célula) e gravada em lotes como uma nova
+# VersaoInventario. Nada é apagado durante a carga: a versão nova só passa a
+# ser a ativa no commit (troca de ponteiro), então quem lê nunca espera nem vê
+# um inventário pela metade. As versões antigas são apagadas depois, em lotes,
+# numa thread de limpeza.
+# Reenvios da mesma planilha costumam mudar poucas linhas: nesse caso
+# sincronizar_inventario compara arquivo e versão ativa por (data, loja) com um
+# merge do pandas e grava só as diferenças, na própria versão ativa.
+# A planilha é lida em fluxo (planilha.ler_lotes), só com as colunas usadas;
+# numa carga completa os lotes vão direto para a gravação, sem juntar tudo.
+# No PostgreSQL (settings.INVENTARIO_IMPORTACAO = 'copy') as linhas vão por
+# COPY FROM STDIN, geradas em CSV sob demanda, sem montar objetos do ORM.
+# A versão ativa guarda o SHA-256 do arquivo e das linhas normalizadas que a
+# geraram: reenviar a mesma planilha não lê nem grava nada. O DataFrame
+# normalizado fica em cache em Parquet (se o pyarrow estiver instalado),
+# indexado pelo hash do arquivo, para releituras rápidas.
+
+COLUNAS_OBRIGATORIAS = ['LOJA', 'REGIONAL', 'LÍDER']
+TAMANHO_LOTE = 2000
+
+
+def ler_planilha(caminho):
+    """DataFrame bruto do Excel de inventário (cabeçalho na 3ª linha), todas as colunas."""
+    import pandas as pd
+    return pd.read_excel(caminho, header=2)
+
+
+def ler_inventario(caminho, motor=None, progresso=None):
+    """
+    Planilha → DataFrame normalizado, lendo só as colunas do inventário.
+    `progresso(linhas_lidas)` é chamado a cada lote lido.
+    """
+    return normalizar_inventario(ler_colunas(caminho, motor, progresso))
+
+
+def linhas_planilha(caminho, motor=None, progresso=None, assinatura=None):
+    """
+    Tuplas (loja, regional, lider, data) da planilha, normalizadas lote a lote.
+    `assinatura` (hashlib) recebe o hash das linhas, igual ao de calcular_hash_linhas.
+    """
+    lidas = 0
+    for lote in ler_lotes(caminho, motor=motor):
+        lidas += len(lote)
+        if progresso:
+            progresso(lidas)
+        normalizado = normalizar_inventario(lote)
+        if assinatura is not None:
+            atualizar_hash_linhas(assinatura, normalizado)
+        yield from linhas_normalizadas(normalizado)
+
+
+# ------------------------------
+# Hash e cache da planilha
+# ------------------------------
+
+def calcular_hash_arquivo(caminho):
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    assinatura = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            assinatura.update(bloco)
+    return assinatura.hexdigest()
+
+
+def atualizar_hash_linhas(assinatura, normalizado):
+    import pandas as pd
+    # Hash por linha: somar lote a lote dá o mesmo resultado que o DataFrame inteiro
+    assinatura.update(pd.util.hash_pandas_object(normalizado.astype(object), index=False).to_numpy().tobytes())
+
+
+def calcular_hash_linhas(normalizado):
+    """SHA-256 das linhas normalizadas (loja, regional, lider, data), na ordem da planilha."""
+    assinatura = hashlib.sha256()
+    atualizar_hash_linhas(assinatura, normalizado)
+    return assinatura.hexdigest()
+
+
+def arquivo_ja_importado(hash_arquivo):
+    """A versão ativa foi gerada exatamente por este arquivo?"""
+    return VersaoInventario.objects.filter(ativa=True, hash_arquivo=hash_arquivo).exclude(hash_arquivo='').exists()
+
+
+def esquecer_hash_inventario():
+    """O inventário mudou por fora de uma importação: o próximo envio não pode ser pulado."""
+    VersaoInventario.objects.filter(ativa=True).update(hash_arquivo='', hash_linhas='')
+
+
+def cache_disponivel():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def caminho_cache(hash_arquivo):
+    diretorio = getattr(settings, 'INVENTARIO_CACHE_DIR', None) or Path(settings.BASE_DIR) / 'cache' / 'inventario'
+    return Path(diretorio) / f'{hash_arquivo}.parquet'
+
+
+def ler_cache_inventario(hash_arquivo):
+    """DataFrame normalizado em cache para este arquivo, ou None."""
+    import pandas as pd
+
+    caminho = caminho_cache(hash_arquivo)
+    if not cache_disponivel() or not caminho.exists():
+        return None
+    try:
+        return pd.read_parquet(caminho)
+    except Exception as erro:
+        print(f"[ERRO] Cache do inventário ilegível ({caminho.name}): {erro}")
+        return None
+
+
+def gravar_cache_inventario(hash_arquivo, normalizado):
+    """Grava o DataFrame normalizado e mantém só os INVENTARIO_CACHE_MAX arquivos mais recentes."""
+    if not cache_disponivel():
+        return
+    caminho = caminho_cache(hash_arquivo)
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+        normalizado.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)  # quem lê nunca vê um arquivo pela metade
+
+        antigos = sorted(caminho.parent.glob('*.parquet'), key=lambda item: item.stat().st_mtime, reverse=True)
+        for antigo in antigos[getattr(settings, 'INVENTARIO_CACHE_MAX', 3):]:
+            antigo.unlink(missing_ok=True)
+    except Exception as erro:
+        print(f"[ERRO] Não foi possível gravar o cache do inventário: {erro}")
+
+
+def inventario_normalizado(caminho, hash_arquivo=None, motor=None, progresso=None):
+    """(DataFrame normalizado, hash do arquivo): do cache, se houver, ou lido da planilha."""
+    hash_arquivo = hash_arquivo or calcular_hash_arquivo(caminho)
+    normalizado = ler_cache_inventario(hash_arquivo)
+    if normalizado is None:
+        normalizado = ler_inventario(caminho, motor, progresso)
+        gravar_cache_inventario(hash_arquivo, normalizado)
+    elif progresso:
+        progresso(len(normalizado))
+    return normalizado, hash_arquivo
+
+
+def resultado_importacao(inicio, linhas, backend, modo, novas=0, alteradas=0, removidas=0, inalteradas=0):
+    segundos = time.perf_counter() - inicio
+    return {
+        'linhas': linhas,
+        'segundos': segundos,
+        'linhas_por_segundo': linhas / segundos if segundos else 0.0,
+        'backend': backend,
+        'modo': modo,
+        'novas': novas,
+        'alteradas': alteradas,
+        'removidas': removidas,
+        'inalteradas': inalteradas,
+    }
+
+
+def normalizar_inventario(df):
+    """
+    DataFrame bruto → colunas loja/regional/lider (texto sem espaços nas pontas)
+    e data (datetime.date ou None). Levanta ValueError se faltar coluna obrigatória.
+    """
+    import pandas as pd
+
+    df = df.rename(columns=lambda c: str(c).strip().upper()).rename(columns={'#': 'LOJA'})
+    for coluna in COLUNAS_OBRIGATORIAS:
+        if coluna not in df.columns:
+            raise ValueError(f"Coluna '{coluna}' não encontrada no Excel")
+
+    def texto(serie):
+        return serie.fillna('').astype(str).str.strip()
+
+    normalizado = pd.DataFrame({
+        'loja': texto(df['LOJA']),
+        'regional': texto(df['REGIONAL']),
+        'lider': texto(df['LÍDER']),
+    })
+
+    # A coluna "4" da planilha, quando existe, é a data de referência
+    coluna_data = '4' if '4' in df.columns else 'DATA' if 'DATA' in df.columns else None
+    if coluna_data:
+        datas = pd.to_datetime(df[coluna_data], errors='coerce')
+        normalizado['data'] = datas.dt.date.astype(object).where(datas.notna(), None)
+    else:
+        normalizado['data'] = None
+    return normalizado
+
+
+def backend_importacao():
+    """'copy' só vale no PostgreSQL; qualquer outro caso usa bulk_create."""
+    if getattr(settings, 'INVENTARIO_IMPORTACAO', 'copy') == 'copy' and connection.vendor == 'postgresql':
+        return 'copy'
+    return 'bulk_create'
+
+
+class LeitorCsv:
+    """Arquivo somente leitura que gera o CSV das linhas conforme o COPY pede."""
+
+    def __init__(self, linhas):
+        self.linhas = iter(linhas)
+        self.pendente = ''
+        self.escritor = csv.writer(self, quoting=csv.QUOTE_ALL, lineterminator='\n')
+
+    def write(self, texto):
+        # Chamado pelo csv.writer: acumula a linha formatada
+        self.pendente += texto
+
+    def read(self, tamanho=-1):
+        while tamanho < 0 or len(self.pendente) < tamanho:
+            linha = next(self.linhas, None)
+            if linha is None:
+                break
+            self.escritor.writerow(linha)
+        if tamanho < 0:
+            tamanho = len(self.pendente)
+        trecho, self.pendente = self.pendente[:tamanho], self.pendente[tamanho:]
+        return trecho
+
+
+def gravar_copy(linhas, versao):
+    """INSERT via COPY FROM STDIN (psycopg2 copy_expert). `linhas`: (loja, regional, lider, data)."""
+    agora = timezone.now().isoformat()
+    tabela = connection.ops.quote_name(InventarioExcel._meta.db_table)
+    sql = (
+        f"COPY {tabela} (versao_id, loja, regional, lider, data, criado_em, atualizado_em) "
+        f"FROM STDIN WITH (FORMAT csv, FORCE_NULL (data))"
+    )
+    total = 0
+
+    def registros():
+        nonlocal total
+        for loja, regional, lider, data in linhas:
+            total += 1
+            # QUOTE_ALL + FORCE_NULL: '' vira texto vazio, exceto em data (NULL)
+            yield versao.pk, loja, regional, lider, data.isoformat() if data else '', agora, agora
+
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, LeitorCsv(registros()), size=64 * 1024)
+    return total
+
+
+def gravar_bulk_create(linhas, versao, tamanho_lote=TAMANHO_LOTE):
+    # Monta os objetos lote a lote: só `tamanho_lote` instâncias em memória por vez
+    linhas = iter(linhas)
+    total = 0
+    while lote := list(itertools.islice(linhas, tamanho_lote)):
+        InventarioExcel.objects.bulk_create([
+            InventarioExcel(versao=versao, loja=loja, regional=regional, lider=lider, data=data)
+            for loja, regional, lider, data in lote
+        ])
+        total += len(lote)
+    return total
+
+
+def gravar_inventario(linhas, versao, tamanho_lote=TAMANHO_LOTE, backend=None):
+    """Insere as linhas (loja, regional, lider, data) na `versao` pelo backend configurado. Retorna quantas."""
+    if (backend or backend_importacao()) == 'copy':
+        return gravar_copy(linhas, versao)
+    return gravar_bulk_create(linhas, versao, tamanho_lote)
+
+
+def publicar_inventario(linhas, tamanho_lote=TAMANHO_LOTE, backend=None, coletar=True):
+    """
+    Grava `linhas` como uma nova versão e a torna a ativa no mesmo commit.
+    Com `coletar`, as versões antigas são apagadas em segundo plano após o commit.
+    Retorna a VersaoInventario publicada.
+    """
+    with transaction.atomic():
+        versao = VersaoInventario.objects.create()
+        versao.linhas = gravar_inventario(linhas, versao, tamanho_lote, backend)
+
+        # Troca de ponteiro: a única linha travada é a da versão que sai
+        VersaoInventario.objects.filter(ativa=True).update(ativa=False)
+        versao.ativa = True
+        versao.save(update_fields=['linhas', 'ativa'])
+
+        invalidar_inventario()
+        if coletar:
+            transaction.on_commit(coletar_em_segundo_plano)
+    return versao
+
+
+def coletar_versoes_antigas(tamanho_lote=TAMANHO_LOTE):
+    """
+    Apaga as versões inativas, em lotes curtos (cada DELETE trava poucas linhas
+    por pouco tempo). Versões ainda em carga não aparecem: não foram commitadas.
+    Retorna quantas linhas de inventário foram apagadas.
+    """
+    apagadas = 0
+    for versao_id in VersaoInventario.objects.filter(ativa=False).values_list('id', flat=True):
+        itens = InventarioExcel.objects.filter(versao_id=versao_id)
+        while ids := list(itens.values_list('id', flat=True)[:tamanho_lote]):
+            apagadas += InventarioExcel.objects.filter(pk__in=ids).delete()[0]
+        VersaoInventario.objects.filter(pk=versao_id, ativa=False).delete()
+    return apagadas
+
+
+def coletar_em_segundo_plano():
+    """Roda coletar_versoes_antigas numa thread, sem segurar a resposta do upload."""
+    def coletar():
+        try:
+            apagadas = coletar_versoes_antigas()
+            if apagadas:
+                print(f"[INFO] Limpeza do inventário: {apagadas} linhas de versões antigas apagadas")
+        except Exception as erro:
+            print(f"[ERRO] Limpeza de versões antigas do inventário: {erro}")
+        finally:
+            connection.close()
+
+    threading.Thread(target=coletar, name='limpeza-inventario', daemon=True).start()
+
+
+def linhas_normalizadas(normalizado):
+    """Tuplas (loja, regional, lider, data) da saída de normalizar_inventario."""
+    return zip(normalizado['loja'], normalizado['regional'], normalizado['lider'], normalizado['data'])
+
+
+def chaves_inventario(df):
+    """
+    Chave (data, loja, n) de cada linha: n numera as repetições da mesma
+    (data, loja) na ordem original, para linhas duplicadas também casarem 1 a 1.
+    """
+    import pandas as pd
+
+    df = df.assign(_data=pd.to_datetime(df['data']))
+    df['_n'] = df.groupby(['_data', 'loja'], dropna=False).cumcount()
+    return df
+
+
+def diferencas_inventario(normalizado, atual):
+    """
+    Merge vetorizado entre o arquivo (`normalizado`) e o banco (`atual`, com `id`).
+    Retorna (novas, alteradas, ids_removidos, inalteradas): novas/alteradas são
+    DataFrames com loja/regional/lider/data (alteradas também com o `id` do banco).
+    """
+    comparacao = chaves_inventario(normalizado.reset_index(drop=True)).merge(
+        chaves_inventario(atual),
+        on=['_data', 'loja', '_n'], how='outer', suffixes=('', '_atual'), indicator=True,
+    )
+    novas = comparacao[comparacao['_merge'] == 'left_only']
+    novas = novas.assign(data=novas['data'].astype(object).where(novas['data'].notna(), None))
+    removidas = comparacao.loc[comparacao['_merge'] == 'right_only', 'id']
+    em_ambos = comparacao[comparacao['_merge'] == 'both']
+    mudou = (em_ambos['regional'] != em_ambos['regional_atual']) | (em_ambos['lider'] != em_ambos['lider_atual'])
+    return novas, em_ambos[mudou], [int(pk) for pk in removidas], int((~mudou).sum())
+
+
+def sincronizar_inventario(normalizado, datas=None, tamanho_lote=TAMANHO_LOTE, backend=None):
+    """
+    Aplica na versão ativa só o que mudou em relação a `normalizado`: INSERT das
+    linhas novas, UPDATE das alteradas e DELETE das que sumiram. Com `datas`, a
+    comparação fica restrita a esses dias (o resto do inventário não é tocado).
+    Retorna {'novas', 'alteradas', 'removidas', 'inalteradas'}.
+    """
+    import pandas as pd
+
+    with transaction.atomic():
+        # Trava o ponteiro: outra importação espera esta terminar
+        versao = (
+            VersaoInventario.objects.select_for_update().filter(ativa=True).first()
+            or VersaoInventario.objects.create(ativa=True)
+        )
+        atual = InventarioExcel.objects.filter(versao=versao)
+        if datas is not None:
+            atual = atual.filter(data__in=datas)
+        atual = pd.DataFrame(
+            list(atual.order_by('id').values_list('id', 'loja', 'regional', 'lider', 'data')),
+            columns=['id', 'loja', 'regional', 'lider', 'data'],
+        )
+
+        novas, alteradas, removidas, inalteradas = diferencas_inventario(normalizado, atual)
+
+        if len(novas):
+            gravar_inventario(linhas_normalizadas(novas), versao, tamanho_lote, backend)
+        if len(alteradas):
+            agora = timezone.now()
+            InventarioExcel.objects.bulk_update(
+                [
+                    InventarioExcel(pk=int(pk), regional=regional, lider=lider, atualizado_em=agora)
+                    for pk, regional, lider in zip(alteradas['id'], alteradas['regional'], alteradas['lider'])
+                ],
+                ['regional', 'lider', 'atualizado_em'],
+                batch_size=tamanho_lote,
+            )
+        for inicio in range(0, len(removidas), tamanho_lote):
+            InventarioExcel.objects.filter(pk__in=removidas[inicio:inicio + tamanho_lote]).delete()
+
+        if len(novas) or len(alteradas) or removidas:
+            versao.linhas += len(novas) - len(removidas)
+            versao.hash_arquivo = versao.hash_linhas = ''
+            versao.save(update_fields=['linhas', 'hash_arquivo', 'hash_linhas'])
+            invalidar_inventario()
+
+    return {
+        'novas': len(novas),
+        'alteradas': len(alteradas),
+        'removidas': len(removidas),
+        'inalteradas': inalteradas,
+    }
+
+
+def importar_inventario(normalizado, tamanho_lote=TAMANHO_LOTE, backend=None, coletar=True, incremental=True):
+    """
+    Torna `normalizado` (saída de normalizar_inventario) o inventário inteiro.
+    `incremental`: grava só as diferenças (sincronizar_inventario); sem inventário
+    ativo, ou com incremental=False, publica uma versão nova completa.
+    Retorna {'linhas', 'segundos', 'linhas_por_segundo', 'backend', 'modo',
+    'novas', 'alteradas', 'removidas', 'inalteradas'}.
+    """
+    backend = backend or backend_importacao()
+    inicio = time.perf_counter()
+
+    anterior = VersaoInventario.objects.filter(ativa=True).values_list('linhas', flat=True).first()
+    if incremental and anterior:
+        modo = 'incremental'
+        mudancas = sincronizar_inventario(normalizado, None, tamanho_lote, backend)
+    else:
+        modo = 'completo'
+        versao = publicar_inventario(linhas_normalizadas(normalizado), tamanho_lote, backend, coletar)
+        mudancas = {'novas': versao.linhas, 'alteradas': 0, 'removidas': anterior or 0, 'inalteradas': 0}
+
+    return resultado_importacao(inicio, len(normalizado), backend, modo, **mudancas)
+
+
+def importar_planilha(caminho, tamanho_lote=TAMANHO_LOTE, backend=None, motor=None, coletar=True,
+                      incremental=True, progresso=None, hash_arquivo=None):
+    """
+    importar_inventario direto do arquivo. Se o arquivo (ou, depois de lido,
+    as linhas) for o mesmo que gerou a versão ativa, nada é gravado (modo
+    'inalterado'). Sem inventário ativo (ou com incremental=False) as linhas
+    vão da leitura para a gravação em lotes, sem montar o DataFrame inteiro.
+    Levanta ValueError (nada gravado) se faltar coluna.
+    `progresso(linhas_lidas)` acompanha a leitura (ver fila_importacao).
+    """
+    backend = backend or backend_importacao()
+    inicio = time.perf_counter()
+    hash_arquivo = hash_arquivo or calcular_hash_arquivo(caminho)
+    ativa = VersaoInventario.objects.filter(ativa=True).values('linhas', 'hash_arquivo', 'hash_linhas').first()
+    anterior = ativa['linhas'] if ativa else 0
+
+    # Mesmo arquivo da última importação: nem abre a planilha
+    if anterior and ativa['hash_arquivo'] == hash_arquivo:
+        return resultado_importacao(inicio, anterior, backend, 'inalterado', inalteradas=anterior)
+
+    if incremental and anterior:
+        # A leitura fica fora da transação: só a gravação das diferenças é atômica
+        normalizado, _ = inventario_normalizado(caminho, hash_arquivo, motor, progresso)
+        hash_linhas = calcular_hash_linhas(normalizado)
+        if hash_linhas == ativa['hash_linhas']:
+            # Arquivo diferente (ex.: aberto e salvo de novo no Excel), mesmas linhas
+            resultado = resultado_importacao(
+                inicio, len(normalizado), backend, 'inalterado', inalteradas=len(normalizado)
+            )
+            VersaoInventario.objects.filter(ativa=True).update(hash_arquivo=hash_arquivo)
+            return resultado
+        with transaction.atomic():
+            resultado = importar_inventario(normalizado, tamanho_lote, backend, coletar)
+            VersaoInventario.objects.filter(ativa=True).update(hash_arquivo=hash_arquivo, hash_linhas=hash_linhas)
+        return resultado
+
+    # Carga completa em fluxo: a leitura acontece dentro da transação de
+    # publicar_inventario (quem acompanha o progresso precisa de conexão própria)
+    with transaction.atomic():
+        assinatura = hashlib.sha256()
+        versao = publicar_inventario(
+            linhas_planilha(caminho, motor, progresso, assinatura), tamanho_lote, backend, coletar
+        )
+        VersaoInventario.objects.filter(pk=versao.pk).update(
+            hash_arquivo=hash_arquivo, hash_linhas=assinatura.hexdigest()
+        )
+    return resultado_importacao(
+        inicio, versao.linhas, backend, 'completo', novas=versao.linhas, removidas=anterior
+    )
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sys
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import InventarioExcel
+
+# ------------------------------
+# Índice do inventário em memória
+# ------------------------------
+# Os selects de regional/loja/líder (chamados_ativos, endpoints AJAX e a validação
+# do ChamadoForm) consultam este índice em vez de fazer DISTINCT em
+# InventarioExcel. Ele é montado com uma única leitura da tabela e guardado no
+# processo até a versão em cache mudar, o que acontece quando o inventário é
+# regravado (upload_excel, carregar_chamados_excel(sobrescrever=True), admin).
+# Os textos são internados: a mesma regional/loja/líder ocupa um só objeto.
+# Só as linhas da VersaoInventario ativa contam (inventario_ativo()).
+
+CHAVE_VERSAO = 'inventario:versao'
+
+# (versão, IndiceInventario) carregados neste processo
+_indice = (None, None)
+
+
+class NivelInventario:
+    """Regionais/lojas/líderes de uma data (ou do inventário inteiro), já ordenados."""
+
+    __slots__ = ('regionais', 'lojas', 'lideres', 'lojas_por_regional', 'lider_por_loja',
+                 'primeiro_lider', 'conjunto_regionais', 'conjunto_lojas', '_arvore')
+
+    def __init__(self, linhas):
+        # linhas: (regional, loja, lider) na ordem de gravação (id)
+        lojas_por_regional = {}
+        lider_por_loja = {}
+        lideres = set()
+        for regional, loja, lider in linhas:
+            lojas_por_regional.setdefault(regional, set()).add(loja)
+            # Mesmo critério do .first() anterior: o primeiro líder gravado para a loja
+            lider_por_loja.setdefault(loja, lider)
+            lideres.add(lider)
+
+        self.regionais = tuple(sorted(lojas_por_regional))
+        self.lojas = tuple(sorted(lider_por_loja))
+        self.lideres = tuple(sorted(lideres))
+        self.lojas_por_regional = {r: tuple(sorted(lojas)) for r, lojas in lojas_por_regional.items()}
+        self.lider_por_loja = lider_por_loja
+        self.primeiro_lider = linhas[0][2] if linhas else ''
+        self.conjunto_regionais = frozenset(self.regionais)
+        self.conjunto_lojas = frozenset(self.lojas)
+        self._arvore = None
+
+    def arvore(self):
+        """
+        (JSON, hash) da árvore regional → loja → líder, serializada uma vez por
+        versão: [[regional, [[loja, lider], ...]], ...]. Listas (e não objetos)
+        para o navegador manter a ordem mesmo com lojas numéricas.
+        """
+        if self._arvore is None:
+            arvore = [
+                [regional, [[loja, self.lider_por_loja[loja]] for loja in self.lojas_por_regional[regional]]]
+                for regional in self.regionais
+            ]
+            corpo = json.dumps(arvore, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._arvore = (corpo, hashlib.md5(corpo).hexdigest())
+        return self._arvore
+
+
+class IndiceInventario:
+    """Nível geral + um nível por data. `marca` é a marca d'água usada no ETag."""
+
+    def __init__(self, linhas, marca):
+        por_data = {}
+        todas = []
+        for data, regional, loja, lider in linhas:
+            linha = (sys.intern(regional), sys.intern(loja), sys.intern(lider))
+            todas.append(linha)
+            if data is not None:
+                por_data.setdefault(data, []).append(linha)
+
+        self.geral = NivelInventario(todas)
+        self.por_data = {data: NivelInventario(linhas_data) for data, linhas_data in por_data.items()}
+        self.marca = marca
+
+    def nivel(self, data=None):
+        """Nível da data (vazio se não houver inventário no dia) ou o geral sem data."""
+        if data is None:
+            return self.geral
+        return self.por_data.get(data) or NIVEL_VAZIO
+
+
+NIVEL_VAZIO = NivelInventario([])
+
+
+def versao_inventario():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar_inventario():
+    """Nova versão após o commit da gravação; o índice é remontado no próximo acesso."""
+    transaction.on_commit(lambda: cache.set(CHAVE_VERSAO, time.time_ns(), None))
+
+
+def inventario_ativo():
+    """Linhas da versão ativa do inventário (as demais são cargas antigas ou em andamento)."""
+    return InventarioExcel.objects.filter(versao__ativa=True)
+
+
+def montar_indice():
+    marca = inventario_ativo().order_by().aggregate(ultima=Max('atualizado_em'), total=Count('pk'))
+    linhas = inventario_ativo().order_by('id').values_list('data', 'regional', 'loja', 'lider')
+    return IndiceInventario(linhas.iterator(chunk_size=5000), [(marca['ultima'], marca['total'])])
+
+
+def indice_inventario():
+    """Índice da versão atual do inventário (montado uma vez por versão e processo)."""
+    global _indice
+    versao = versao_inventario()
+    if _indice[0] != versao:
+        _indice = (versao, montar_indice())
+    return _indice[1]
+
+
+def marca_inventario(request=None):
+    """Marca d'água do inventário para o decorator condicional, sem consultar o banco."""
+    return indice_inventario().marca
@@ -0,0 +1,126 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from chamados.importacao import (
+    TAMANHO_LOTE, coletar_versoes_antigas, importar_inventario, ler_planilha, normalizar_inventario,
+    publicar_inventario,
+)
+from chamados.inventario import inventario_ativo
+from chamados.models import InventarioExcel, VersaoInventario
+
+# ------------------------------
+# Benchmark da importação do inventário
+# ------------------------------
+# Compara o laço antigo do upload_excel (iterrows + pd.to_datetime por célula +
+# um INSERT em autocommit por linha) com importar_inventario (normalização
+# vetorizada + bulk_create em lotes numa transação) e, no PostgreSQL, com o
+# COPY FROM STDIN. Por último mede o reenvio da mesma planilha no modo
+# incremental (só diferenças). Todas gravam de verdade no banco; o inventário original é
+# republicado no final e as versões criadas na medição são apagadas.
+
+
+def importar_linha_a_linha(df):
+    """Cópia do laço que o upload_excel usava antes (só para comparação)."""
+    import pandas as pd
+
+    df = df.copy()
+    df.columns = [str(c).strip().upper() for c in df.columns]
+    if '#' in df.columns:
+        df.rename(columns={'#': 'LOJA'}, inplace=True)
+    if '4' in df.columns:
+        df['DATA'] = pd.to_datetime(df['4'], errors='coerce').dt.date
+    df = df[['LOJA', 'REGIONAL', 'LÍDER'] + (['DATA'] if 'DATA' in df.columns else [])].fillna('')
+
+    # Equivalente ao antigo "apaga tudo e insere": a versão já nasce ativa
+    InventarioExcel.objects.all().delete()
+    VersaoInventario.objects.filter(ativa=True).update(ativa=False)
+    versao = VersaoInventario.objects.create(ativa=True)
+    for _, row in df.iterrows():
+        data_valor = row.get('DATA')
+        if pd.isna(data_valor) or str(data_valor).strip() == "":
+            data_valor = None
+        else:
+            try:
+                data_valor = pd.to_datetime(data_valor).date()
+            except Exception:
+                data_valor = None
+        InventarioExcel.objects.create(
+            versao=versao,
+            loja=str(row.get('LOJA', '')).strip(),
+            regional=str(row.get('REGIONAL', '')).strip(),
+            lider=str(row.get('LÍDER', '')).strip(),
+            data=data_valor,
+        )
+    return len(df)
+
+
+def conteudo_inventario():
+    return sorted(inventario_ativo().values_list('loja', 'regional', 'lider', 'data'))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a importação do inventário linha a linha (antiga) com a vetorizada em lote. "
+        "Regrava InventarioExcel durante a medição e restaura o conteúdo original no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Planilha .xlsx de inventário (ex.: media/uploads/chamados.xlsx).")
+        parser.add_argument('--repeticoes', type=int, default=1, help="Execuções de cada versão (vale a melhor).")
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="batch_size do bulk_create.")
+        parser.add_argument('--sem-antigo', action='store_true', help="Mede só a versão em lote.")
+
+    def handle(self, *args, **options):
+        try:
+            bruto = ler_planilha(options['arquivo'])
+        except Exception as erro:
+            raise CommandError(f"Não foi possível ler {options['arquivo']}: {erro}")
+
+        originais = list(inventario_ativo().order_by('id').values_list('loja', 'regional', 'lider', 'data'))
+        self.stdout.write(f"{len(bruto)} linhas na planilha; {len(originais)} no inventário atual.")
+
+        try:
+            medidas = {}
+            if not options['sem_antigo']:
+                medidas['linha a linha (antigo)'] = self.medir(
+                    lambda: importar_linha_a_linha(bruto), options['repeticoes']
+                )
+                resultado_antigo = conteudo_inventario()
+
+            backends = ['bulk_create'] + (['copy'] if connection.vendor == 'postgresql' else [])
+            for backend in backends:
+                medidas[f'vetorizado + {backend}'] = self.medir(
+                    lambda: importar_inventario(
+                        normalizar_inventario(bruto), options['lote'], backend, coletar=False, incremental=False
+                    )['linhas'],
+                    options['repeticoes'],
+                )
+                if not options['sem_antigo'] and conteudo_inventario() != resultado_antigo:
+                    self.stdout.write(self.style.WARNING(f"{backend} gravou conteúdo diferente do laço antigo!"))
+
+            # Inventário já carregado com a mesma planilha: nada a gravar
+            medidas['incremental (mesma planilha)'] = self.medir(
+                lambda: importar_inventario(normalizar_inventario(bruto), options['lote'])['linhas'],
+                options['repeticoes'],
+            )
+        finally:
+            publicar_inventario(originais, coletar=False)
+            coletar_versoes_antigas()
+
+        base = next(iter(medidas.values()))[0]
+        for nome, (segundos, linhas) in medidas.items():
+            self.stdout.write(
+                f"{nome:<28} {segundos:8.3f}s  {linhas / segundos:10.0f} linhas/s  "
+                f"{base / segundos:6.1f}x"
+            )
+
+    def medir(self, funcao, repeticoes):
+        """(melhor tempo em segundos, linhas gravadas)."""
+        melhor, linhas = None, 0
+        for _ in range(max(1, repeticoes)):
+            inicio = time.perf_counter()
+            linhas = funcao()
+            decorrido = time.perf_counter() - inicio
+            melhor = decorrido if melhor is None else min(melhor, decorrido)
+        return melhor, linhas
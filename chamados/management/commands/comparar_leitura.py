@@ -0,0 +1,146 @@
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chamados.importacao import ler_inventario, ler_planilha, normalizar_inventario
+from chamados.planilha import calamine_disponivel, ler_lotes
+
+# ------------------------------
+# Benchmark da leitura da planilha de inventário
+# ------------------------------
+# Gera uma planilha sintética no formato do chamados.xlsx (35 colunas, cabeçalho
+# na 3ª linha, linhas separadoras de dia) e mede cada forma de leitura num
+# processo filho próprio: tempo e pico de memória (ru_maxrss) acima do que o
+# processo já ocupava ao começar.
+
+COLUNAS_EXTRAS = 31  # o chamados.xlsx real tem 35 colunas; 4 são usadas
+
+
+def gerar_planilha(caminho, linhas):
+    import xlsxwriter
+
+    pasta = xlsxwriter.Workbook(caminho, {'constant_memory': True})
+    aba = pasta.add_worksheet('OUT')
+    formato_data = pasta.add_format({'num_format': 'dd/mm/yyyy'})
+    aba.write_row(0, 8, ['TOTAL', linhas])
+    aba.write_row(1, 0, list(range(1, COLUNAS_EXTRAS + 5)))
+    aba.write_row(2, 0, ['#', 'SIGLA', 'Nº DA LOJA', 'DATA', 'REGIONAL', 'LÍDER']
+                  + [f'EXTRA {i}' for i in range(COLUNAS_EXTRAS - 2)])
+
+    aleatorio = random.Random(42)
+    dia = date(2025, 10, 1)
+    linha = 3
+    for i in range(linhas):
+        if i % 50 == 0:
+            # Separador de dia: só a data fora das colunas do inventário
+            dia += timedelta(days=1)
+            aba.write_datetime(linha, 6, dia, formato_data)
+            linha += 1
+        numero = aleatorio.randint(1, 999)
+        aba.write_row(linha, 0, [f'LJ{numero}', 'LJ', numero])
+        aba.write_datetime(linha, 3, dia, formato_data)
+        aba.write_row(linha, 4, [f'REGIONAL {numero % 12}', f'LIDER {numero % 40}']
+                      + [f'valor {aleatorio.random():.6f}' for _ in range(COLUNAS_EXTRAS - 2)])
+        linha += 1
+    pasta.close()
+
+
+def rss_atual_kb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def medir_filho(funcao, caminho, fila):
+    try:
+        base = rss_atual_kb()
+        inicio = time.perf_counter()
+        linhas = funcao(caminho)
+        segundos = time.perf_counter() - inicio
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+        fila.put((segundos, linhas, pico / 1024, None))
+    except Exception as erro:
+        fila.put((None, None, None, str(erro)))
+
+
+def pandas_read_excel(caminho):
+    return len(normalizar_inventario(ler_planilha(caminho)))
+
+
+def openpyxl_dataframe(caminho):
+    return len(ler_inventario(caminho, 'openpyxl'))
+
+
+def openpyxl_lotes(caminho):
+    return sum(len(normalizar_inventario(lote)) for lote in ler_lotes(caminho, motor='openpyxl'))
+
+
+def calamine_dataframe(caminho):
+    return len(ler_inventario(caminho, 'calamine'))
+
+
+def calamine_lotes(caminho):
+    return sum(len(normalizar_inventario(lote)) for lote in ler_lotes(caminho, motor='calamine'))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a leitura do inventário com pd.read_excel, openpyxl read_only e calamine "
+        "(se instalado) numa planilha sintética: tempo e pico de memória de cada motor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=100_000, help="Linhas da planilha sintética.")
+        parser.add_argument('--arquivo', help="Usa esta planilha em vez de gerar uma.")
+        parser.add_argument('--sem-pandas', action='store_true', help="Não mede o pd.read_excel (o mais lento).")
+
+    def handle(self, *args, **options):
+        caminho = options['arquivo']
+        temporario = None
+        if not caminho:
+            temporario = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+            temporario.close()
+            caminho = temporario.name
+            inicio = time.perf_counter()
+            gerar_planilha(caminho, options['linhas'])
+            self.stdout.write(
+                f"Planilha sintética: {options['linhas']} linhas, "
+                f"{os.path.getsize(caminho) / 1024 / 1024:.1f} MB em {time.perf_counter() - inicio:.1f}s"
+            )
+
+        medicoes = []
+        if not options['sem_pandas']:
+            medicoes.append(('pd.read_excel (tudo)', pandas_read_excel))
+        medicoes += [('openpyxl → DataFrame', openpyxl_dataframe), ('openpyxl em lotes', openpyxl_lotes)]
+        if calamine_disponivel():
+            medicoes += [('calamine → DataFrame', calamine_dataframe), ('calamine em lotes', calamine_lotes)]
+        else:
+            self.stdout.write(self.style.WARNING("python-calamine não instalado: medindo só pandas/openpyxl."))
+
+        contexto = get_context('fork')
+        try:
+            resultados = []
+            for nome, funcao in medicoes:
+                fila = contexto.Queue()
+                processo = contexto.Process(target=medir_filho, args=(funcao, caminho, fila))
+                processo.start()
+                segundos, linhas, pico_mb, erro = fila.get()
+                processo.join()
+                if erro:
+                    raise CommandError(f"{nome}: {erro}")
+                resultados.append((nome, segundos, linhas, pico_mb))
+        finally:
+            if temporario:
+                os.unlink(caminho)
+
+        base = resultados[0][1]
+        for nome, segundos, linhas, pico_mb in resultados:
+            self.stdout.write(
+                f"{nome:<24} {segundos:8.2f}s  {linhas / segundos:9.0f} linhas/s  "
+                f"{base / segundos:5.1f}x  pico +{pico_mb:7.1f} MB"
+            )
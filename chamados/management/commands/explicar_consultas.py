@@ -0,0 +1,177 @@
+import random
+import re
+import statistics
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from chamados.models import Chamado, ResumoDiarioChamado, dia_local
+from chamados.resumo import reconstruir_resumo
+
+# ------------------------------
+# Benchmark dos índices de Chamado / ResumoDiarioChamado
+# ------------------------------
+# Tudo roda numa transação desfeita no final: os chamados sintéticos somem e
+# os índices removidos para o "sem" voltam. Em PostgreSQL o DROP INDEX trava a
+# tabela até o fim do comando, então use só em desenvolvimento/homologação.
+# Cada estado (com/sem índices) tem uma passada de aquecimento descartada; depois
+# as rodadas alternam a ordem (com→sem, sem→com, ...) para nenhum dos dois pegar
+# sempre o cache já aquecido pelo outro, e o resumo usa a mediana das rodadas.
+
+REGIONAIS = [f'REGIONAL {n:02d}' for n in range(1, 11)]
+MOTIVOS = ['SEM SISTEMA', 'IMPRESSORA', 'BALANÇA', 'REDE', 'PDV TRAVADO', 'OUTRO']
+
+
+def consultas(hoje):
+    """(nome, queryset) dos formatos de consulta mais usados pelas views."""
+    inicio_mes = hoje - timedelta(days=30)
+    return [
+        ('abertos do dia (chamados_ativos)',
+         Chamado.objects.filter(status='Aberto', aberto_dia=hoje).order_by('-aberto_em')),
+        ('abertos sem data (chamados_ativos)',
+         Chamado.objects.filter(status='Aberto').order_by('-aberto_em')[:50]),
+        ('período de 30 dias (exportar_excel_view)',
+         Chamado.objects.filter(aberto_dia__range=[inicio_mes, hoje])),
+        ('todos_chamados, página seguinte',
+         Chamado.objects.filter(aberto_em__lt=timezone.now() - timedelta(days=200)).order_by('-aberto_em', '-id')[:50]),
+        ('dashboard regional__in + período (resumo)',
+         ResumoDiarioChamado.objects.filter(regional__in=REGIONAIS[:2], dia__range=[inicio_mes, hoje])
+         .values('status').annotate(total=Count('id'))),
+        ('dashboard lider__in (resumo)',
+         ResumoDiarioChamado.objects.filter(lider__in=['LIDER 001', 'LIDER 002'])
+         .values('motivo').annotate(total=Count('id'))),
+    ]
+
+
+def explicar(cursor, queryset, rotulo=''):
+    """(tempo_ms, linhas do plano). PostgreSQL: EXPLAIN ANALYZE; SQLite: QUERY PLAN + execução cronometrada."""
+    sql, params = queryset.query.sql_with_params()
+    # Comentário com o rótulo: evita reaproveitar o plano do statement cache do sqlite3
+    sql = f'{sql} /* {rotulo} */'
+    if connection.vendor == 'postgresql':
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+        plano = [linha[0] for linha in cursor.fetchall()]
+        tempo = next(
+            (float(m.group(1)) for linha in plano if (m := re.search(r'Execution Time: ([\d.]+) ms', linha))),
+            0.0,
+        )
+        return tempo, plano
+
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    plano = [linha[-1] for linha in cursor.fetchall()]
+    inicio = time.perf_counter()
+    cursor.execute(sql, params)
+    cursor.fetchall()
+    return (time.perf_counter() - inicio) * 1000, plano
+
+
+class Command(BaseCommand):
+    help = (
+        "Semeia chamados sintéticos e mostra EXPLAIN ANALYZE das consultas principais "
+        "sem e com os índices dos modelos. Tudo é desfeito no final (não use em produção)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantidade', type=int, default=100_000, help="Chamados sintéticos.")
+        parser.add_argument('--dias', type=int, default=730, help="Dias de histórico simulados.")
+        parser.add_argument('--repeticoes', type=int, default=5, help="Rodadas medidas em cada estado (mediana).")
+        parser.add_argument('--planos', action='store_true', help="Imprime o plano completo de cada consulta.")
+
+    def semear(self, quantidade, dias):
+        aleatorio = random.Random(42)  # mesma massa de dados a cada execução
+        agora = timezone.now()
+        lojas = [(f'LOJA {n:03d}', REGIONAIS[n % len(REGIONAIS)], f'LIDER {n % 60:03d}') for n in range(200)]
+        lote = []
+        for _ in range(quantidade):
+            loja, regional, lider = aleatorio.choice(lojas)
+            aberto_em = agora - timedelta(minutes=aleatorio.randint(0, dias * 24 * 60))
+            aberto = aleatorio.random() < 0.05
+            fechado_em = None if aberto else aberto_em + timedelta(minutes=aleatorio.randint(5, 240))
+            # bulk_create não passa pelo save(): preenche os dias locais aqui
+            lote.append(Chamado(
+                regional=regional, loja=loja, lider=lider, motivo=aleatorio.choice(MOTIVOS),
+                status='Aberto' if aberto else 'Finalizado',
+                aberto_em=aberto_em, aberto_dia=dia_local(aberto_em),
+                fechado_em=fechado_em, fechado_dia=dia_local(fechado_em),
+            ))
+            if len(lote) == 5000:
+                Chamado.objects.bulk_create(lote)
+                lote = []
+        Chamado.objects.bulk_create(lote)
+        reconstruir_resumo()
+
+    def medir(self, cursor, rotulo, hoje):
+        """{nome: (tempo_ms, plano)} de uma passada pelas consultas."""
+        return {nome: explicar(cursor, queryset, rotulo) for nome, queryset in consultas(hoje)}
+
+    def trocar_indices(self, cursor, indices, com_indices):
+        """Recria (com SQL do próprio Index) ou remove os índices dos modelos."""
+        for nome, criar in indices:
+            cursor.execute(criar if com_indices else f'DROP INDEX {connection.ops.quote_name(nome)}')
+        cursor.execute('ANALYZE')
+
+    def handle(self, *args, **options):
+        # SQL de criação gerado antes de qualquer DROP (o schema editor não é
+        # aberto: no SQLite ele não pode ser usado dentro da transação)
+        editor = connection.schema_editor()
+        indices = [
+            (indice.name, str(indice.create_sql(modelo, editor)))
+            for modelo in (Chamado, ResumoDiarioChamado)
+            for indice in modelo._meta.indexes
+        ]
+        hoje = timezone.localdate()
+        repeticoes = max(1, options['repeticoes'])
+
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            self.semear(options['quantidade'], options['dias'])
+            self.stdout.write(
+                f"{options['quantidade']} chamados sintéticos em {time.perf_counter() - inicio:.1f}s "
+                f"({connection.vendor}), {repeticoes} rodadas"
+            )
+
+            tempos = {True: defaultdict(list), False: defaultdict(list)}
+            planos = {}
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+                # Aquecimento descartado: com índices, depois sem
+                self.medir(cursor, 'aquecimento com', hoje)
+                self.trocar_indices(cursor, indices, False)
+                self.medir(cursor, 'aquecimento sem', hoje)
+
+                com_indices = False
+                for rodada in range(repeticoes):
+                    # Começa pelo estado atual: sem→com, com→sem, sem→com...
+                    for estado in (com_indices, not com_indices):
+                        if estado != com_indices:
+                            self.trocar_indices(cursor, indices, estado)
+                            com_indices = estado
+                        for nome, (tempo, plano) in self.medir(cursor, f'rodada {rodada} {estado}', hoje).items():
+                            tempos[estado][nome].append(tempo)
+                            planos[estado, nome] = plano
+
+            # Desfaz os chamados sintéticos e os DROP/CREATE INDEX
+            transaction.set_rollback(True)
+
+        medianas = {
+            estado: {nome: statistics.median(valores) for nome, valores in por_consulta.items()}
+            for estado, por_consulta in tempos.items()
+        }
+        for estado, rotulo in ((True, "COM os índices"), (False, "SEM os índices")):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {rotulo} (mediana) =="))
+            for nome, tempo in medianas[estado].items():
+                self.stdout.write(f"  {tempo:9.2f} ms  {nome}")
+                if options['planos']:
+                    for linha in planos[estado, nome]:
+                        self.stdout.write(f"               {linha}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\n== Resumo =="))
+        for nome, tempo_antes in medianas[False].items():
+            tempo_depois = medianas[True][nome]
+            ganho = tempo_antes / tempo_depois if tempo_depois else float('inf')
+            self.stdout.write(f"  {tempo_antes:9.2f} → {tempo_depois:9.2f} ms  ({ganho:5.1f}x)  {nome}")
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(indices)} índices avaliados; nada foi gravado no banco"))
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Dependências pesadas que não podem ser carregadas no boot (só sob demanda)
+PROIBIDOS_PADRAO = 'pandas,matplotlib,seaborn'
+
+
+def medir(modulos):
+    """
+    Importa `modulos` num interpretador novo com `python -X importtime`.
+    Retorna (total_us, {modulo: cumulativo_us}).
+    """
+    codigo = '; '.join(f'import {modulo}' for modulo in modulos)
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, env=os.environ.copy(), cwd=settings.BASE_DIR,
+    )
+    if processo.returncode != 0:
+        raise CommandError(processo.stderr.strip().splitlines()[-1])
+
+    total = 0
+    cumulativos = {}
+    for linha in processo.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not linha.startswith('import time:') or '|' not in linha:
+            continue
+        _, cumulativo, nome = linha[len('import time:'):].split('|', 2)
+        if not cumulativo.strip().isdigit():
+            continue
+        cumulativo = int(cumulativo)
+        cumulativos[nome.strip()] = cumulativo
+        if not nome.startswith('  '):  # nível mais externo
+            total += cumulativo
+    return total, cumulativos
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo de importação do ASGI (sistema_chamados.asgi + URLconf) com python -X importtime. "
+        "Falha se passar de --limite-ms ou se carregar pandas/matplotlib/seaborn no boot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=3, help="Execuções; vale a mais rápida.")
+        parser.add_argument('--top', type=int, default=15, help="Quantos módulos mais caros listar.")
+        parser.add_argument('--limite-ms', type=float, default=None, help="Tempo máximo aceito (para o CI).")
+        parser.add_argument(
+            '--proibidos', default=PROIBIDOS_PADRAO,
+            help="Pacotes que não podem ser importados no boot (separados por vírgula, vazio desativa).",
+        )
+
+    def handle(self, *args, **options):
+        modulos = ['sistema_chamados.asgi', settings.ROOT_URLCONF]
+
+        total, cumulativos = min(
+            (medir(modulos) for _ in range(max(options['repeticoes'], 1))),
+            key=lambda resultado: resultado[0],
+        )
+
+        self.stdout.write(f"Importação de {', '.join(modulos)}: {total / 1000:.1f} ms")
+        mais_caros = sorted(
+            ((nome.strip(), us) for nome, us in cumulativos.items()),
+            key=lambda item: item[1], reverse=True,
+        )
+        for nome, us in mais_caros[:options['top']]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {nome}")
+
+        proibidos = [p.strip() for p in options['proibidos'].split(',') if p.strip()]
+        carregados = sorted(
+            p for p in proibidos
+            if any(nome.strip() == p or nome.strip().startswith(p + '.') for nome in cumulativos)
+        )
+        if carregados:
+            raise CommandError(f"Importados no boot: {', '.join(carregados)}")
+
+        if options['limite_ms'] is not None and total / 1000 > options['limite_ms']:
+            raise CommandError(f"Importação levou {total / 1000:.1f} ms (limite {options['limite_ms']:.0f} ms)")
+
+        self.stdout.write(self.style.SUCCESS("✅ Importação dentro do esperado"))
@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+
+from chamados.cache_graficos import invalidar_graficos
+from chamados.resumo import reconstruir_resumo
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero o resumo diário de chamados (ResumoDiarioChamado)."
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        linhas = reconstruir_resumo()
+        invalidar_graficos()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Resumo reconstruído: {linhas} linhas em {time.perf_counter() - inicio:.2f}s"
+        ))
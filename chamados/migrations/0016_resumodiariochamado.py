@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:47
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def popular_resumo(apps, schema_editor):
+    """Carga inicial do resumo a partir dos chamados existentes."""
+    Chamado = apps.get_model('chamados', 'Chamado')
+    ResumoDiarioChamado = apps.get_model('chamados', 'ResumoDiarioChamado')
+
+    tempo = ExpressionWrapper(F('fechado_em') - F('aberto_em'), output_field=DurationField())
+    linhas = (
+        Chamado.objects.order_by()
+        .filter(aberto_em__isnull=False)
+        .annotate(dia=TruncDate('aberto_em'), outro=Coalesce('outro_motivo', Value('')))
+        .values('dia', 'regional', 'loja', 'lider', 'motivo', 'outro', 'status')
+        .annotate(n=Count('id'), n_tempo=Count('fechado_em'), soma_tempo=Sum(tempo))
+    )
+    ResumoDiarioChamado.objects.bulk_create(
+        [
+            ResumoDiarioChamado(
+                dia=linha['dia'],
+                regional=linha['regional'],
+                loja=linha['loja'],
+                lider=linha['lider'],
+                motivo=linha['motivo'],
+                outro_motivo=linha['outro'],
+                status=linha['status'],
+                quantidade=linha['n'],
+                com_tempo=linha['n_tempo'],
+                tempo_total=linha['soma_tempo'] or datetime.timedelta(0),
+            )
+            for linha in linhas
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0015_restaurar_usuario_temporario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiarioChamado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('regional', models.CharField(max_length=100)),
+                ('loja', models.CharField(max_length=100)),
+                ('lider', models.CharField(max_length=100)),
+                ('motivo', models.CharField(max_length=200)),
+                ('outro_motivo', models.CharField(blank=True, default='', max_length=200)),
+                ('status', models.CharField(max_length=20)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('com_tempo', models.IntegerField(default=0)),
+                ('tempo_total', models.DurationField(default=datetime.timedelta(0))),
+            ],
+            options={
+                'verbose_name': 'Resumo diário de chamados',
+                'verbose_name_plural': 'Resumos diários de chamados',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'regional', 'loja', 'lider', 'motivo', 'outro_motivo', 'status'), name='resumo_diario_chave_unica')],
+            },
+        ),
+        migrations.RunPython(popular_resumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0016_resumodiariochamado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chamado',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='inventarioexcel',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0017_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['-aberto_em', '-id'], name='chamado_aberto_em_id_idx'),
+        ),
+    ]
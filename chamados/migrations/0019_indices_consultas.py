@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:53
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0018_chamado_aberto_em_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(django.db.models.functions.datetime.TruncDate('aberto_em'), name='chamado_aberto_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(django.db.models.functions.datetime.TruncDate('aberto_em'), models.OrderBy(models.F('aberto_em'), descending=True), condition=models.Q(('status', 'Aberto')), name='chamado_abertos_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(condition=models.Q(('status', 'Aberto')), fields=['-aberto_em'], name='chamado_abertos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumodiariochamado',
+            index=models.Index(fields=['regional', 'dia'], name='resumo_regional_dia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumodiariochamado',
+            index=models.Index(fields=['lider', 'dia'], name='resumo_lider_dia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumodiariochamado',
+            index=models.Index(fields=['motivo', 'dia'], name='resumo_motivo_dia_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:54
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def preencher_dias(apps, schema_editor):
+    """Backfill de aberto_dia/fechado_dia no fuso local, num único UPDATE."""
+    Chamado = apps.get_model('chamados', 'Chamado')
+    fuso = timezone.get_default_timezone()
+    Chamado.objects.update(
+        aberto_dia=TruncDate('aberto_em', tzinfo=fuso),
+        fechado_dia=TruncDate('fechado_em', tzinfo=fuso),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0019_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chamado',
+            name='chamado_aberto_data_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='chamado',
+            name='chamado_abertos_data_idx',
+        ),
+        migrations.AddField(
+            model_name='chamado',
+            name='aberto_dia',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chamado',
+            name='fechado_dia',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(preencher_dias, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['aberto_dia'], name='chamado_aberto_dia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(condition=models.Q(('status', 'Aberto')), fields=['aberto_dia', '-aberto_em'], name='chamado_abertos_dia_idx'),
+        ),
+    ]
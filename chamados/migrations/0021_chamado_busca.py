@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:57
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Só PostgreSQL: configuração de busca em português sem acentos, trigger que
+# mantém chamados_chamado.busca e índice GIN. Em outros bancos a coluna fica
+# vazia e chamados/busca.py usa o fallback com icontains.
+CRIAR_BUSCA = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portugues_sem_acento') THEN
+        CREATE TEXT SEARCH CONFIGURATION portugues_sem_acento (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION portugues_sem_acento
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END $$;
+
+CREATE OR REPLACE FUNCTION chamados_chamado_busca() RETURNS trigger AS $$
+BEGIN
+    NEW.busca :=
+        setweight(to_tsvector('portugues_sem_acento',
+            coalesce(NEW.regional, '') || ' ' || coalesce(NEW.loja, '') || ' ' || coalesce(NEW.lider, '')), 'A') ||
+        setweight(to_tsvector('portugues_sem_acento',
+            coalesce(NEW.motivo, '') || ' ' || coalesce(NEW.outro_motivo, '')), 'B') ||
+        setweight(to_tsvector('portugues_sem_acento', coalesce(NEW.observacao, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER chamados_chamado_busca_trigger
+    BEFORE INSERT OR UPDATE OF regional, loja, lider, motivo, outro_motivo, observacao
+    ON chamados_chamado
+    FOR EACH ROW EXECUTE FUNCTION chamados_chamado_busca();
+
+-- Preenche os chamados existentes (o UPDATE dispara o trigger)
+UPDATE chamados_chamado SET loja = loja;
+
+CREATE INDEX chamado_busca_gin ON chamados_chamado USING gin (busca);
+"""
+
+REMOVER_BUSCA = """
+DROP INDEX IF EXISTS chamado_busca_gin;
+DROP TRIGGER IF EXISTS chamados_chamado_busca_trigger ON chamados_chamado;
+DROP FUNCTION IF EXISTS chamados_chamado_busca();
+DROP TEXT SEARCH CONFIGURATION IF EXISTS portugues_sem_acento;
+"""
+
+
+def executar_no_postgres(sql):
+    def executar(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return executar
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0020_chamado_aberto_dia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chamado',
+            name='busca',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(executar_no_postgres(CRIAR_BUSCA), executar_no_postgres(REMOVER_BUSCA)),
+    ]
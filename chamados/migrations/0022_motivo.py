@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:03
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Cópia congelada de chamados.motivos.MOTIVOS_FIXOS
+MOTIVOS_FIXOS = [
+    'FALHA NA IMPRESSÃO',
+    'IMPRESSORA QUEIMADA',
+    'IMPRESSORA NÃO RECONHECE',
+    'ROUTER NÃO FUNCIONA',
+    'NOTEBOOK NÃO LIGA',
+    'COLETOR NÃO CONECTA NA REDE',
+    'COLETOR NÃO TRANSMITE',
+    'OUTRO',
+]
+
+
+def preencher_motivos(apps, schema_editor):
+    """Motivos fixos + aprendidos, com os usos contados dos chamados existentes."""
+    Chamado = apps.get_model('chamados', 'Chamado')
+    Motivo = apps.get_model('chamados', 'Motivo')
+    usos = dict(
+        Chamado.objects.order_by().exclude(motivo='').values_list('motivo').annotate(n=Count('id'))
+    )
+    Motivo.objects.bulk_create(
+        [Motivo(nome=nome, fixo=True, usos=usos.pop(nome, 0)) for nome in MOTIVOS_FIXOS]
+        + [Motivo(nome=nome, usos=n) for nome, n in usos.items() if nome]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0021_chamado_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Motivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200, unique=True)),
+                ('fixo', models.BooleanField(default=False)),
+                ('usos', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Motivo',
+                'verbose_name_plural': 'Motivos',
+                'ordering': ['-fixo', '-usos', 'nome'],
+            },
+        ),
+        migrations.RunPython(preencher_motivos, migrations.RunPython.noop),
+    ]
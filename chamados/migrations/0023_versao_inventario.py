@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def criar_versao_inicial(apps, schema_editor):
+    """O inventário atual vira a versão 1, já ativa."""
+    VersaoInventario = apps.get_model('chamados', 'VersaoInventario')
+    InventarioExcel = apps.get_model('chamados', 'InventarioExcel')
+    versao = VersaoInventario.objects.create(ativa=True, linhas=InventarioExcel.objects.count())
+    InventarioExcel.objects.update(versao=versao)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0022_motivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('linhas', models.IntegerField(default=0)),
+                ('ativa', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Versão do inventário',
+                'verbose_name_plural': 'Versões do inventário',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('ativa', True)), fields=('ativa',), name='versao_inventario_uma_ativa')],
+            },
+        ),
+        migrations.AddField(
+            model_name='inventarioexcel',
+            name='versao',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='chamados.versaoinventario'),
+        ),
+        migrations.RunPython(criar_versao_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0023_versao_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo', models.CharField(max_length=255)),
+                ('nome_original', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('Na fila', 'Na fila'), ('Em andamento', 'Em andamento'), ('Concluída', 'Concluída'), ('Erro', 'Erro')], default='Na fila', max_length=20)),
+                ('em_aberto', models.BooleanField(default=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('terminado_em', models.DateTimeField(blank=True, null=True)),
+                ('linhas_lidas', models.IntegerField(default=0)),
+                ('linhas', models.IntegerField(default=0)),
+                ('novas', models.IntegerField(default=0)),
+                ('alteradas', models.IntegerField(default=0)),
+                ('removidas', models.IntegerField(default=0)),
+                ('inalteradas', models.IntegerField(default=0)),
+                ('modo', models.CharField(blank=True, max_length=20)),
+                ('backend', models.CharField(blank=True, max_length=20)),
+                ('segundos_gravacao', models.FloatField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='importacoes_inventario', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Importação do inventário',
+                'verbose_name_plural': 'Importações do inventário',
+                'ordering': ['-criado_em'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('em_aberto', True)), fields=('em_aberto',), name='importacao_inventario_uma_em_aberto')],
+            },
+        ),
+    ]
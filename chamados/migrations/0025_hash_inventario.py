@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0024_importacao_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importacaoinventario',
+            name='hash_arquivo',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='versaoinventario',
+            name='hash_arquivo',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='versaoinventario',
+            name='hash_linhas',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -1,9 +1,21 @@
-from django.db import models
+from datetime import timedelta
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.conf import settings
 
 
+def dia_local(momento):
+    """Data no fuso local (TIME_ZONE) de um datetime; None se vazio."""
+    if momento is None:
+        return None
+    if timezone.is_naive(momento):
+        return momento.date()
+    return timezone.localdate(momento)
+
+
 class CustomUser(AbstractUser):
     PAPEL_CHOICES = (
         ('admin', 'Administrador'),
@@ -59,14 +71,49 @@ class Chamado(models.Model):
     data = models.DateField(null=True, blank=True, help_text="Data de referência (legado)")
     usuario = models.CharField(max_length=100, blank=True, null=True, editable=False)
 
+    # === DATAS LOCAIS (America/Sao_Paulo), preenchidas no save() ===
+    # Filtros por dia usam estas colunas em vez de aberto_em__date, que obriga o
+    # banco a converter o fuso de cada linha antes de comparar
+    aberto_dia = models.DateField(null=True, blank=True, editable=False)
+    fechado_dia = models.DateField(null=True, blank=True, editable=False, db_index=True)
+
+    # === BUSCA TEXTUAL (PostgreSQL) ===
+    # Mantida por trigger no banco e indexada com GIN (migração 0021); ver chamados/busca.py
+    busca = SearchVectorField(null=True, editable=False)
+
+    # === CONTROLE DE CACHE (ETag / Last-Modified) ===
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         verbose_name = 'Chamado'
         verbose_name_plural = 'Chamados'
         ordering = ['-aberto_em']
+        indexes = [
+            # Paginação por cursor de todos_chamados (ORDER BY aberto_em DESC, id DESC)
+            models.Index(fields=['-aberto_em', '-id'], name='chamado_aberto_em_id_idx'),
+            # Filtros por dia/período (exportação, listagens)
+            models.Index(fields=['aberto_dia'], name='chamado_aberto_dia_idx'),
+            # Parciais só com os abertos (fração pequena da tabela): chamados_ativos
+            # com e sem filtro de data, já na ordem da listagem
+            models.Index(
+                fields=['aberto_dia', '-aberto_em'],
+                name='chamado_abertos_dia_idx', condition=Q(status='Aberto'),
+            ),
+            models.Index(fields=['-aberto_em'], name='chamado_abertos_idx', condition=Q(status='Aberto')),
+        ]
 
     def __str__(self):
         return f"#{self.pk} - {self.loja} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda a contribuição atual no resumo diário para calcular o delta no save()
+        from .resumo import CAMPOS_RESUMO, contribuicao_resumo
+        if all(campo in instance.__dict__ for campo in CAMPOS_RESUMO):
+            instance._resumo_original = contribuicao_resumo(instance)
+        return instance
+
     def save(self, *args, **kwargs):
         # === AO CRIAR: preenche aberto_por se não estiver definido ===
         if not self.pk and not self.aberto_por:
@@ -91,18 +138,208 @@ class Chamado(models.Model):
             elif not self.duracao:
                 self.duracao = fechamento - abertura
 
-        super().save(*args, **kwargs)
+        # === DATAS LOCAIS ===
+        self.aberto_dia = dia_local(self.aberto_em)
+        self.fechado_dia = dia_local(self.fechado_em)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'aberto_em' in update_fields:
+                update_fields.add('aberto_dia')
+            if 'fechado_em' in update_fields:
+                update_fields.add('fechado_dia')
+            kwargs['update_fields'] = update_fields
+
+        # === RESUMO DIÁRIO: grava o chamado e o delta do resumo na mesma transação ===
+        from .motivos import registrar_uso_motivo
+        from .quadro import notificar_quadro
+        from .resumo import atualizar_resumo, contribuicao_original
+        criado = self._state.adding
+        with transaction.atomic():
+            antes = contribuicao_original(self)
+            super().save(*args, **kwargs)
+            self._resumo_original = atualizar_resumo(antes, self)
+
+            # === CATÁLOGO DE MOTIVOS: contadores de uso ===
+            motivo_antes = antes[0][4] if antes else None
+            if motivo_antes != self.motivo:
+                registrar_uso_motivo(motivo_antes, self.motivo)
+
+            # === QUADRO EM TEMPO REAL: avisa as páginas abertas após o commit ===
+            status_antes = antes[0][-1] if antes else None
+            if criado:
+                notificar_quadro(self, 'criado')
+            elif self.status == 'Finalizado' and status_antes != 'Finalizado':
+                notificar_quadro(self, 'finalizado')
+            else:
+                notificar_quadro(self, 'editado')
+
+class ResumoDiarioChamado(models.Model):
+    """
+    Totais de Chamado por dia de abertura (horário local) e dimensões do dashboard.
+    Mantido incrementalmente por Chamado.save()/delete; reconstruído por
+    `manage.py reconstruir_resumo`.
+    """
+    dia = models.DateField()
+    regional = models.CharField(max_length=100)
+    loja = models.CharField(max_length=100)
+    lider = models.CharField(max_length=100)
+    motivo = models.CharField(max_length=200)
+    outro_motivo = models.CharField(max_length=200, blank=True, default='')
+    status = models.CharField(max_length=20)
+
+    quantidade = models.IntegerField(default=0)
+    com_tempo = models.IntegerField(default=0)  # chamados com fechado_em
+    tempo_total = models.DurationField(default=timedelta(0))  # soma de fechado_em - aberto_em
+
+    class Meta:
+        verbose_name = 'Resumo diário de chamados'
+        verbose_name_plural = 'Resumos diários de chamados'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'regional', 'loja', 'lider', 'motivo', 'outro_motivo', 'status'],
+                name='resumo_diario_chave_unica',
+            ),
+        ]
+        indexes = [
+            # Filtros do dashboard (regional/lider/motivo__in) + período
+            models.Index(fields=['regional', 'dia'], name='resumo_regional_dia_idx'),
+            models.Index(fields=['lider', 'dia'], name='resumo_lider_dia_idx'),
+            models.Index(fields=['motivo', 'dia'], name='resumo_motivo_dia_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.loja} {self.motivo} ({self.status}): {self.quantidade}"
+
+class Motivo(models.Model):
+    """
+    Catálogo de motivos do formulário de chamado: os fixos (MOTIVOS_FIXOS) e os
+    aprendidos dos chamados gravados, com o número de chamados que usam cada um.
+    Mantido por Chamado.save()/delete; lido pelo cache em chamados/motivos.py.
+    """
+    nome = models.CharField(max_length=200, unique=True)
+    fixo = models.BooleanField(default=False)
+    usos = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Motivo'
+        verbose_name_plural = 'Motivos'
+        ordering = ['-fixo', '-usos', 'nome']
+
+    def __str__(self):
+        return self.nome
+
+class VersaoInventario(models.Model):
+    """
+    Uma carga completa do inventário. As linhas de InventarioExcel pertencem a
+    uma versão; só a `ativa` é lida. Uma importação grava a versão nova inteira
+    e troca o ponteiro no mesmo commit; as antigas são apagadas depois, em
+    segundo plano (ver chamados/importacao.py).
+    `hash_arquivo`/`hash_linhas` identificam a planilha que gerou o conteúdo
+    atual (vazios depois de qualquer outra alteração): reenviar o mesmo arquivo
+    não é lido nem gravado de novo.
+    """
+    criado_em = models.DateTimeField(auto_now_add=True)
+    linhas = models.IntegerField(default=0)
+    ativa = models.BooleanField(default=False)
+    hash_arquivo = models.CharField(max_length=64, blank=True, default='')
+    hash_linhas = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        verbose_name = 'Versão do inventário'
+        verbose_name_plural = 'Versões do inventário'
+        constraints = [
+            models.UniqueConstraint(fields=['ativa'], condition=Q(ativa=True), name='versao_inventario_uma_ativa'),
+        ]
+
+    def __str__(self):
+        return f"Inventário v{self.pk} ({self.linhas} linhas{', ativa' if self.ativa else ''})"
 
 class InventarioExcel(models.Model):
+    versao = models.ForeignKey(
+        VersaoInventario,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='itens'
+    )
     loja = models.CharField(max_length=100)
     regional = models.CharField(max_length=100)
     lider = models.CharField(max_length=100)
     data = models.DateField(null=True, blank=True)
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'chamados_inventarioexcel'  # usa a tabela existente no PostgreSQL
 
+class ImportacaoInventario(models.Model):
+    """
+    Uma importação da planilha de inventário, executada em segundo plano
+    (ver chamados/fila_importacao.py). `em_aberto` marca a que está na fila ou
+    em andamento: só pode haver uma, então duas importações nunca se sobrepõem.
+    """
+    STATUS_CHOICES = (
+        ('Na fila', 'Na fila'),
+        ('Em andamento', 'Em andamento'),
+        ('Concluída', 'Concluída'),
+        ('Erro', 'Erro'),
+    )
+
+    arquivo = models.CharField(max_length=255)
+    nome_original = models.CharField(max_length=255, blank=True)
+    hash_arquivo = models.CharField(max_length=64, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Na fila')
+    em_aberto = models.BooleanField(default=True)
+    criado_por = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='importacoes_inventario'
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    terminado_em = models.DateTimeField(null=True, blank=True)
+
+    # === RESULTADO ===
+    linhas_lidas = models.IntegerField(default=0)
+    linhas = models.IntegerField(default=0)
+    novas = models.IntegerField(default=0)
+    alteradas = models.IntegerField(default=0)
+    removidas = models.IntegerField(default=0)
+    inalteradas = models.IntegerField(default=0)
+    modo = models.CharField(max_length=20, blank=True)
+    backend = models.CharField(max_length=20, blank=True)
+    segundos_gravacao = models.FloatField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+        verbose_name = 'Importação do inventário'
+        verbose_name_plural = 'Importações do inventário'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['em_aberto'], condition=Q(em_aberto=True), name='importacao_inventario_uma_em_aberto'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Importação #{self.pk} ({self.status})"
+
+    @property
+    def segundos_espera(self):
+        if self.iniciado_em:
+            return (self.iniciado_em - self.criado_em).total_seconds()
+        return None
+
+    @property
+    def segundos_total(self):
+        if self.terminado_em:
+            return (self.terminado_em - self.criado_em).total_seconds()
+        return None
+
 class ChatMessage(models.Model):
     usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     texto = models.TextField()
@@ -0,0 +1,77 @@
+import time
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Motivo
+
+# ------------------------------
+# Catálogo de motivos
+# ------------------------------
+# O formulário de chamado mostra os motivos fixos + os aprendidos (motivos já
+# gravados em chamados). Em vez de um DISTINCT em Chamado a cada página, a lista
+# de aprendidos vem da tabela Motivo e fica em memória no processo; só é relida
+# quando a versão em cache muda, o que acontece quando um motivo entra ou sai
+# do catálogo. Os contadores de uso são atualizados com F() em Chamado.save().
+
+MOTIVOS_FIXOS = [
+    'FALHA NA IMPRESSÃO',
+    'IMPRESSORA QUEIMADA',
+    'IMPRESSORA NÃO RECONHECE',
+    'ROUTER NÃO FUNCIONA',
+    'NOTEBOOK NÃO LIGA',
+    'COLETOR NÃO CONECTA NA REDE',
+    'COLETOR NÃO TRANSMITE',
+    'OUTRO',
+]
+
+CHAVE_VERSAO = 'motivos:versao'
+
+# (versão, motivos aprendidos) carregados neste processo
+_catalogo = (None, [])
+
+
+def versao_catalogo():
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        cache.add(CHAVE_VERSAO, time.time_ns(), None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar_catalogo():
+    """Nova versão após o commit: antes disso os outros ainda não veem a mudança."""
+    transaction.on_commit(lambda: cache.set(CHAVE_VERSAO, time.time_ns(), None))
+
+
+def motivos_aprendidos():
+    """Motivos não fixos em uso, do mais usado para o menos usado."""
+    global _catalogo
+    versao = versao_catalogo()
+    if _catalogo[0] != versao:
+        nomes = list(
+            Motivo.objects.filter(fixo=False, usos__gt=0)
+            .exclude(nome__in=MOTIVOS_FIXOS)
+            .values_list('nome', flat=True)
+        )
+        _catalogo = (versao, nomes)
+    return _catalogo[1]
+
+
+def registrar_uso_motivo(antes, depois):
+    """Troca um uso de `antes` por um de `depois` (None = nenhum)."""
+    if depois:
+        if not Motivo.objects.filter(nome=depois).update(usos=F('usos') + 1):
+            try:
+                with transaction.atomic():
+                    Motivo.objects.create(nome=depois, usos=1)
+            except IntegrityError:
+                # Outra transação criou o motivo ao mesmo tempo
+                Motivo.objects.filter(nome=depois).update(usos=F('usos') + 1)
+            invalidar_catalogo()
+
+    if antes:
+        Motivo.objects.filter(nome=antes).update(usos=F('usos') - 1)
+        # Aprendido sem nenhum chamado sai do catálogo
+        if Motivo.objects.filter(nome=antes, fixo=False, usos__lte=0).delete()[0]:
+            invalidar_catalogo()
@@ -0,0 +1,64 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+# ------------------------------
+# Paginação por cursor (keyset)
+# ------------------------------
+# Em vez de OFFSET (que lê e descarta todas as linhas anteriores), cada página
+# continua a partir do último (aberto_em, id) visto. Com o índice
+# chamado_aberto_em_id_idx o custo é o mesmo na 1ª ou na milésima página.
+# Na busca textual a chave ganha a relevância na frente: (relevancia, aberto_em, id).
+
+ORDEM_KEYSET = ('-aberto_em', '-id')
+
+
+def codificar_cursor(chamado, por_relevancia=False):
+    partes = [chamado.aberto_em.isoformat(), str(chamado.pk)]
+    if por_relevancia:
+        partes.insert(0, repr(chamado.relevancia))
+    return base64.urlsafe_b64encode('|'.join(partes).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, por_relevancia=False):
+    """[relevancia,] aberto_em, id do cursor, ou None se vazio/inválido (volta ao início)."""
+    if not cursor:
+        return None
+    try:
+        partes = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('|')
+        if len(partes) != (3 if por_relevancia else 2):
+            return None
+        *relevancia, aberto_em, pk = partes
+        posicao = (datetime.fromisoformat(aberto_em), int(pk))
+        return (float(relevancia[0]), *posicao) if por_relevancia else posicao
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def filtro_apos(posicao, por_relevancia=False):
+    """Q das linhas que vêm depois de `posicao` na ordem decrescente."""
+    if por_relevancia:
+        relevancia, *resto = posicao
+        return Q(relevancia__lt=relevancia) | (Q(relevancia=relevancia) & filtro_apos(resto))
+    aberto_em, pk = posicao
+    return Q(aberto_em__lt=aberto_em) | Q(aberto_em=aberto_em, id__lt=pk)
+
+
+def pagina_keyset(qs, cursor=None, tamanho=50, por_relevancia=False):
+    """
+    Retorna (itens, proximo_cursor) de `qs` em ordem (-aberto_em, -id), ou
+    (-relevancia, -aberto_em, -id) se `por_relevancia` (qs anotado por busca.buscar_chamados).
+    proximo_cursor é None na última página.
+    """
+    ordem = ('-relevancia', *ORDEM_KEYSET) if por_relevancia else ORDEM_KEYSET
+    qs = qs.order_by(*ordem)
+    posicao = decodificar_cursor(cursor, por_relevancia)
+    if posicao:
+        qs = qs.filter(filtro_apos(posicao, por_relevancia))
+
+    # Busca um a mais só para saber se existe próxima página
+    itens = list(qs[:tamanho + 1])
+    if len(itens) > tamanho:
+        itens = itens[:tamanho]
+        return itens, codificar_cursor(itens[-1], por_relevancia)
+    return itens, None
@@ -0,0 +1,147 @@
+import itertools
+from contextlib import contextmanager
+from django.conf import settings
+
+# ------------------------------
+# Leitura da planilha de inventário em fluxo
+# ------------------------------
+# pd.read_excel carrega a pasta inteira (todas as ~35 colunas) num DataFrame só
+# para usarmos quatro delas. Aqui a planilha é percorrida linha a linha, só as
+# colunas LOJA ('#'), REGIONAL, LÍDER e a da data ('4' / DATA) são guardadas e
+# as linhas saem em lotes de `tamanho_lote`: a memória fica limitada ao lote.
+# Motores: 'openpyxl' em modo read_only (padrão) ou 'calamine' (python-calamine,
+# em Rust). settings.INVENTARIO_LEITOR escolhe; 'auto' usa o calamine se
+# estiver instalado.
+# O openpyxl read_only vai lendo o XML aos poucos e só monta as células até a
+# última coluna usada: memória constante. O calamine é ~10x mais rápido, mas
+# carrega a aba inteira na memória do Rust (da ordem do pd.read_excel), por
+# isso só entra quando pedido.
+# Os valores saem como no read_excel: número inteiro vira int e célula vazia, None.
+
+LINHA_CABECALHO = 2  # o mesmo header=2 do read_excel (3ª linha)
+COLUNAS_PLANILHA = ['LOJA', 'REGIONAL', 'LÍDER', '4', 'DATA']
+TAMANHO_LOTE_LEITURA = 5000
+MOTORES = ('calamine', 'openpyxl')
+
+
+def calamine_disponivel():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def motor_planilha(motor=None):
+    """Motor pedido (ou o de settings.INVENTARIO_LEITOR, padrão openpyxl); 'auto' usa o calamine se instalado."""
+    motor = motor or getattr(settings, 'INVENTARIO_LEITOR', 'openpyxl')
+    if motor == 'auto':
+        return 'calamine' if calamine_disponivel() else 'openpyxl'
+    if motor not in MOTORES:
+        raise ValueError(f"Leitor de planilha desconhecido: {motor}")
+    return motor
+
+
+def valor_celula(valor):
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def nome_coluna(valor):
+    valor = valor_celula(valor)
+    return '' if valor is None else str(valor).strip().upper()
+
+
+@contextmanager
+def aba_calamine(caminho):
+    from python_calamine import CalamineWorkbook
+
+    aba = CalamineWorkbook.from_path(str(caminho)).get_sheet_by_index(0)
+
+    def linhas(primeira, ultima_coluna=None):
+        # O calamine começa na primeira célula preenchida (aba.start)
+        vazias = aba.start[0] - primeira
+        if vazias > 0:
+            return itertools.chain(itertools.repeat((), vazias), aba.iter_rows())
+        return itertools.islice(aba.iter_rows(), -vazias, None)
+
+    yield linhas
+
+
+@contextmanager
+def aba_openpyxl(caminho):
+    from openpyxl import load_workbook
+
+    pasta = load_workbook(caminho, read_only=True, data_only=True)
+    aba = pasta.worksheets[0]
+
+    def linhas(primeira, ultima_coluna=None):
+        return aba.iter_rows(min_row=primeira + 1, max_col=ultima_coluna, values_only=True)
+
+    try:
+        yield linhas
+    finally:
+        pasta.close()
+
+
+def ler_lotes(caminho, tamanho_lote=TAMANHO_LOTE_LEITURA, motor=None):
+    """
+    DataFrames de até `tamanho_lote` linhas com as colunas de COLUNAS_PLANILHA
+    presentes na planilha ('#' já renomeada para LOJA). Como no read_excel,
+    linhas vazias no fim da aba são descartadas e as do meio viram linhas
+    vazias (com o openpyxl, "vazia" considera só as colunas até a última usada). Levanta ValueError se faltar LOJA, REGIONAL ou LÍDER no cabeçalho.
+    """
+    import pandas as pd
+
+    abrir = aba_calamine if motor_planilha(motor) == 'calamine' else aba_openpyxl
+    with abrir(caminho) as linhas:
+        cabecalho = [nome_coluna(valor) for valor in next(iter(linhas(LINHA_CABECALHO)), ())]
+        cabecalho = ['LOJA' if nome == '#' else nome for nome in cabecalho]
+
+        # Primeira ocorrência de cada coluna, como o df[...] do read_excel
+        posicoes = {}
+        for posicao, nome in enumerate(cabecalho):
+            if nome in COLUNAS_PLANILHA:
+                posicoes.setdefault(nome, posicao)
+        for coluna in COLUNAS_PLANILHA[:3]:
+            if coluna not in posicoes:
+                raise ValueError(f"Coluna '{coluna}' não encontrada no Excel")
+
+        colunas = list(posicoes)
+        indices = list(posicoes.values())
+        lote = []
+        vazias = 0  # linhas vazias ainda não emitidas (só entram se vier conteúdo depois)
+        for linha in linhas(LINHA_CABECALHO + 1, max(indices) + 1):
+            valores = [valor_celula(linha[i]) if i < len(linha) else None for i in indices]
+            if all(valor is None for valor in valores):
+                if all(valor_celula(valor) is None for valor in linha):
+                    vazias += 1
+                    continue
+            pendentes = [[None] * len(indices) for _ in range(vazias)] + [valores]
+            vazias = 0
+            for valores in pendentes:
+                lote.append(valores)
+                if len(lote) >= tamanho_lote:
+                    yield pd.DataFrame(lote, columns=colunas, dtype=object)
+                    lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=colunas, dtype=object)
+
+
+def ler_colunas(caminho, motor=None, progresso=None):
+    """Todas as linhas de ler_lotes num DataFrame só (apenas as colunas usadas)."""
+    import pandas as pd
+
+    lotes = []
+    lidas = 0
+    for lote in ler_lotes(caminho, motor=motor):
+        lotes.append(lote)
+        lidas += len(lote)
+        if progresso:
+            progresso(lidas)
+    if not lotes:
+        return pd.DataFrame(columns=['LOJA', 'REGIONAL', 'LÍDER'], dtype=object)
+    return pd.concat(lotes, ignore_index=True)
@@ -0,0 +1,74 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+# ------------------------------
+# Quadro de chamados em tempo real
+# ------------------------------
+# Chamado.save() publica pequenos eventos (criado / finalizado / editado /
+# excluido) no grupo GRUPO_QUADRO; o QuadroChamadosConsumer repassa para as
+# páginas abertas, que atualizam a tabela de chamados sem recarregar.
+
+GRUPO_QUADRO = 'quadro_chamados'
+
+
+def nome_aberto_por(chamado):
+    """
+    Quem abriu o chamado, como no str() do usuário. Sem consulta se o usuário já
+    veio com o chamado (select_related ou request.user); senão busca só os campos
+    do nome, uma vez, e guarda na instância.
+    """
+    if not chamado.aberto_por_id:
+        return ''
+    campo = chamado._meta.get_field('aberto_por')
+    if not campo.is_cached(chamado):
+        usuario = (
+            campo.related_model.objects.only('username', 'papel')
+            .filter(pk=chamado.aberto_por_id).first()
+        )
+        if usuario is None:
+            return ''
+        campo.set_cached_value(chamado, usuario)
+    return str(chamado.aberto_por)
+
+
+def dados_chamado(chamado, com_autor=True):
+    """Campos que a tabela de chamados abertos exibe. `com_autor=False` não busca o nome de quem abriu."""
+    aberto_em = timezone.localtime(chamado.aberto_em) if chamado.aberto_em else None
+    return {
+        'id': chamado.pk,
+        'regional': chamado.regional,
+        'loja': chamado.loja,
+        'lider': chamado.lider,
+        'motivo': chamado.motivo,
+        'outro_motivo': chamado.outro_motivo or '',
+        'status': chamado.status,
+        'aberto_por_id': chamado.aberto_por_id,
+        'aberto_por': nome_aberto_por(chamado) if com_autor else '',
+        'aberto_em': aberto_em.strftime('%d/%m/%Y %H:%M') if aberto_em else '',
+        'aberto_dia': chamado.aberto_dia.isoformat() if chamado.aberto_dia else '',
+    }
+
+
+def publicar_evento(evento, dados):
+    """Envia o evento ao grupo. Falha do Redis não pode derrubar quem salvou o chamado."""
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(GRUPO_QUADRO, {
+            'type': 'chamado.evento',
+            'evento': evento,
+            'chamado': dados,
+        })
+    except Exception as erro:
+        print(f"[ERRO] Quadro de chamados: não foi possível publicar '{evento}': {erro}")
+
+
+def notificar_quadro(chamado, evento):
+    """Publica o evento só depois do commit (nada de avisar sobre um save desfeito)."""
+    # Finalizados e excluídos só saem do quadro: o nome de quem abriu não é exibido
+    com_autor = chamado.status == 'Aberto' and evento != 'excluido'
+    dados = dados_chamado(chamado, com_autor=com_autor)
+    transaction.on_commit(lambda: publicar_evento(evento, dados))
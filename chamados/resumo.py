@@ -0,0 +1,147 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Chamado, ResumoDiarioChamado, dia_local
+
+# ------------------------------
+# Resumo diário de chamados
+# ------------------------------
+# Cada chamado contribui com 1 unidade na linha (dia, regional, loja, líder,
+# motivo, outro_motivo, status) e, se já tiver fechado_em, com o tempo de
+# atendimento. Ao salvar, subtrai-se a contribuição antiga e soma-se a nova.
+
+CAMPOS_RESUMO = ('aberto_em', 'fechado_em', 'regional', 'loja', 'lider', 'motivo', 'outro_motivo', 'status')
+CHAVE_RESUMO = ('dia', 'regional', 'loja', 'lider', 'motivo', 'outro_motivo', 'status')
+
+
+def contribuicao_resumo(chamado):
+    """(chave, tempo) do chamado no resumo, ou None se ainda não tem abertura."""
+    if not chamado.aberto_em:
+        return None
+
+    chave = (
+        dia_local(chamado.aberto_em),
+        chamado.regional,
+        chamado.loja,
+        chamado.lider,
+        chamado.motivo,
+        chamado.outro_motivo or '',
+        chamado.status,
+    )
+    tempo = chamado.fechado_em - chamado.aberto_em if chamado.fechado_em else None
+    return chave, tempo
+
+
+def contribuicao_original(chamado):
+    """Contribuição já gravada no banco (carregada em from_db ou consultada agora)."""
+    if hasattr(chamado, '_resumo_original'):
+        return chamado._resumo_original
+    if chamado.pk is None:
+        return None
+
+    original = Chamado.objects.filter(pk=chamado.pk).only(*CAMPOS_RESUMO).first()
+    return contribuicao_resumo(original) if original else None
+
+
+def acumular(deltas, contribuicao, sinal):
+    if contribuicao is None:
+        return
+    chave, tempo = contribuicao
+    delta = deltas[chave]
+    delta[0] += sinal
+    if tempo is not None:
+        delta[1] += sinal
+        delta[2] += tempo * sinal
+
+
+def novos_deltas():
+    return defaultdict(lambda: [0, 0, timedelta(0)])
+
+
+def aplicar_deltas(deltas):
+    """Aplica {chave: [quantidade, com_tempo, tempo_total]} com UPDATEs atômicos (F())."""
+    for chave, (quantidade, com_tempo, tempo) in deltas.items():
+        if not (quantidade or com_tempo or tempo):
+            continue
+
+        filtro = dict(zip(CHAVE_RESUMO, chave))
+        atualizar = {
+            'quantidade': F('quantidade') + quantidade,
+            'com_tempo': F('com_tempo') + com_tempo,
+            'tempo_total': F('tempo_total') + tempo,
+        }
+
+        if not ResumoDiarioChamado.objects.filter(**filtro).update(**atualizar):
+            try:
+                with transaction.atomic():
+                    ResumoDiarioChamado.objects.create(
+                        quantidade=quantidade, com_tempo=com_tempo, tempo_total=tempo, **filtro
+                    )
+            except IntegrityError:
+                # Outra transação criou a linha ao mesmo tempo
+                ResumoDiarioChamado.objects.filter(**filtro).update(**atualizar)
+
+        if quantidade < 0:
+            ResumoDiarioChamado.objects.filter(quantidade__lte=0, **filtro).delete()
+
+
+def atualizar_resumo(antes, chamado):
+    """Troca a contribuição `antes` pela atual do chamado. Retorna a nova contribuição."""
+    depois = contribuicao_resumo(chamado)
+    if antes != depois:
+        deltas = novos_deltas()
+        acumular(deltas, antes, -1)
+        acumular(deltas, depois, +1)
+        aplicar_deltas(deltas)
+    return depois
+
+
+def remover_do_resumo(chamado):
+    deltas = novos_deltas()
+    acumular(deltas, contribuicao_original(chamado), -1)
+    aplicar_deltas(deltas)
+
+
+def reconstruir_resumo():
+    """Recalcula o resumo inteiro a partir de Chamado. Retorna o número de linhas."""
+    tempo = ExpressionWrapper(F('fechado_em') - F('aberto_em'), output_field=DurationField())
+    linhas = (
+        Chamado.objects.order_by()
+        .filter(aberto_dia__isnull=False)
+        .annotate(dia=F('aberto_dia'), outro=Coalesce('outro_motivo', Value('')))
+        .values('dia', 'regional', 'loja', 'lider', 'motivo', 'outro', 'status')
+        .annotate(
+            n=Count('id'),
+            n_tempo=Count('fechado_em'),
+            soma_tempo=Sum(tempo),
+        )
+    )
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Bloqueia escritas em chamados enquanto o resumo é refeito
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {Chamado._meta.db_table} IN SHARE MODE')
+
+        ResumoDiarioChamado.objects.all().delete()
+        objetos = [
+            ResumoDiarioChamado(
+                dia=linha['dia'],
+                regional=linha['regional'],
+                loja=linha['loja'],
+                lider=linha['lider'],
+                motivo=linha['motivo'],
+                outro_motivo=linha['outro'],
+                status=linha['status'],
+                quantidade=linha['n'],
+                com_tempo=linha['n_tempo'],
+                tempo_total=linha['soma_tempo'] or timedelta(0),
+            )
+            for linha in linhas.iterator(chunk_size=2000)
+        ]
+        ResumoDiarioChamado.objects.bulk_create(objetos, batch_size=1000)
+
+    return len(objetos)
@@ -1,9 +1,13 @@
 from django.urls import re_path, path
-from .consumers import ChatConsumer
+from .consumers import ChatConsumer, ImportacaoInventarioConsumer, QuadroChamadosConsumer
 
 websocket_urlpatterns = [
     # Rota dinâmica por username
     re_path(r'ws/chat/(?P<username>\w+)/$', ChatConsumer.as_asgi()),
+    # Quadro de chamados (criado/finalizado/editado em tempo real)
+    re_path(r'ws/chamados/$', QuadroChamadosConsumer.as_asgi()),
+    # Progresso de uma importação do inventário (upload_excel)
+    re_path(r'ws/importacao/(?P<pk>\d+)/$', ImportacaoInventarioConsumer.as_asgi()),
     ]
 
     # Rota fixa para admins
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache_graficos import invalidar_graficos
+from .models import Chamado
+from .motivos import registrar_uso_motivo
+from .quadro import notificar_quadro
+from .resumo import remover_do_resumo
+
+
+@receiver(post_save, sender=Chamado)
+@receiver(post_delete, sender=Chamado)
+def chamado_alterado(sender, instance, **kwargs):
+    """Qualquer alteração em Chamado invalida os gráficos do dashboard."""
+    invalidar_graficos()
+
+
+@receiver(post_delete, sender=Chamado)
+def chamado_excluido(sender, instance, **kwargs):
+    """Retira o chamado excluído do resumo diário, do catálogo de motivos e do quadro (o save() cuida das demais alterações)."""
+    remover_do_resumo(instance)
+    registrar_uso_motivo(instance.motivo, None)
+    notificar_quadro(instance, 'excluido')
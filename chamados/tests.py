@@ -1,3 +1,1577 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import json
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import dashboard, fila_importacao, importacao
+from .busca import buscar_chamados
+from .cache_graficos import invalidar_graficos, obter_graficos, salvar_graficos, versao_dados
+from .dashboard import agregar_chamados, agregar_resumo, encerrar_pool_graficos, gerar_graficos, workers_graficos
+from .fila_importacao import ImportacaoEmAndamento, acompanhando, enfileirar_importacao, liberar_importacoes_paradas
+from .exportacao import CAMPOS_EXPORTACAO, exportar_chamados, linhas_exportacao
+from .finalizacao import FINALIZADO, JA_FINALIZADO, NAO_ENCONTRADO, finalizar_em_lote
+from .importacao import (
+    LeitorCsv, backend_importacao, coletar_em_segundo_plano, coletar_versoes_antigas, diferencas_inventario,
+    gravar_copy, importar_inventario, importar_planilha, normalizar_inventario, publicar_inventario,
+    sincronizar_inventario,
+)
+from .inventario import indice_inventario, invalidar_inventario
+from .management.commands.medir_importacao import PROIBIDOS_PADRAO, medir
+from .models import (
+    Chamado, CustomUser, ImportacaoInventario, InventarioExcel, Motivo, ResumoDiarioChamado, VersaoInventario, dia_local,
+)
+from .motivos import MOTIVOS_FIXOS, motivos_aprendidos
+from .paginacao import pagina_keyset
+from .planilha import calamine_disponivel, ler_lotes, motor_planilha
+from .quadro import GRUPO_QUADRO, dados_chamado
+from .resumo import aplicar_deltas, novos_deltas, reconstruir_resumo
+
+
+# ------------------------------
+# Apoio
+# ------------------------------
+
+def momento(dia, hora=12, minuto=0):
+    """Datetime no fuso local (America/Sao_Paulo) em 2024-03-<dia>."""
+    return timezone.make_aware(datetime(2024, 3, dia, hora, minuto))
+
+
+def criar_chamado(**campos):
+    dados = {
+        'regional': 'SUL',
+        'loja': 'L01',
+        'lider': 'Ana',
+        'motivo': 'PDV',
+        'aberto_em': momento(1, 9),
+    }
+    dados.update(campos)
+    return Chamado.objects.create(**dados)
+
+
+class BaseChamadosTest(TestCase):
+    """Limpa os caches de processo (versões de gráficos, inventário e motivos)."""
+
+    def setUp(self):
+        cache.clear()
+        caches['graficos'].clear()
+        self.usuario = CustomUser.objects.create_user('usuario', password='senha', first_name='Ana', last_name='Lima')
+
+    def popular(self):
+        """Chamados variados: empates de contagem, OUTRO com e sem texto, abertos e fechados."""
+        criar_chamado(regional='SUL', loja='L01', lider='Ana', motivo='PDV',
+                      status='Finalizado', fechado_em=momento(1, 10))
+        criar_chamado(regional='SUL', loja='L02', lider='Ana', motivo='PDV',
+                      status='Finalizado', fechado_em=momento(1, 9, 30))
+        criar_chamado(regional='NORTE', loja='L03', lider='Bia', motivo='REDE',
+                      status='Finalizado', fechado_em=momento(2, 9))
+        criar_chamado(regional='NORTE', loja='L03', lider='Bia', motivo='OUTRO', outro_motivo='Balança',
+                      status='Finalizado', fechado_em=momento(1, 9, 45))
+        criar_chamado(regional='LESTE', loja='L04', lider='Caio', motivo='OUTRO', outro_motivo='')
+        criar_chamado(regional='LESTE', loja='L04', lider='Caio', motivo='OUTRO', outro_motivo=None)
+        criar_chamado(regional='SUL', loja='L05', lider='Ana', motivo='REDE')
+
+
+def agregado_dataframe(chamados):
+    """O que o dashboard calculava antes com DataFrame/value_counts, sem pandas."""
+    def contagem(valores):
+        return sorted(Counter(v for v in valores if v is not None).items(), key=lambda i: (-i[1], i[0]))
+
+    duracoes = defaultdict(list)
+    for c in chamados:
+        if c.fechado_em:
+            duracoes[c.motivo].append((c.fechado_em - c.aberto_em).total_seconds() / 60)
+    tempo_medio = sorted(
+        ((motivo, sum(valores) / len(valores)) for motivo, valores in duracoes.items()),
+        key=lambda item: (item[1], item[0]),
+    )
+    return {
+        'total': len(chamados),
+        'status': contagem(c.status for c in chamados),
+        'regionais': contagem(c.regional for c in chamados),
+        'lideres': contagem(c.lider for c in chamados),
+        'motivos': contagem(
+            c.outro_motivo if c.motivo == 'OUTRO' and c.outro_motivo else c.motivo for c in chamados
+        ),
+        'tempo_medio': tempo_medio,
+    }
+
+
+# ------------------------------
+# Dashboard: agregações no banco
+# ------------------------------
+
+class AgregarChamadosTest(BaseChamadosTest):
+
+    def test_mesmos_numeros_do_dataframe(self):
+        self.popular()
+        esperado = agregado_dataframe(list(Chamado.objects.all()))
+        agregado = agregar_chamados(Chamado.objects.all())
+
+        for chave in ('total', 'status', 'regionais', 'lideres', 'motivos'):
+            self.assertEqual(agregado[chave], esperado[chave], chave)
+        self.assertEqual([m for m, _ in agregado['tempo_medio']], [m for m, _ in esperado['tempo_medio']])
+        for (_, minutos), (_, minutos_df) in zip(agregado['tempo_medio'], esperado['tempo_medio']):
+            self.assertAlmostEqual(minutos, minutos_df)
+
+    def test_respeita_filtro_do_queryset(self):
+        self.popular()
+        agregado = agregar_chamados(Chamado.objects.filter(regional='NORTE'))
+        self.assertEqual(agregado['total'], 2)
+        self.assertEqual(agregado['motivos'], [('Balança', 1), ('REDE', 1)])
+
+    def test_sem_chamados(self):
+        agregado = agregar_chamados(Chamado.objects.all())
+        self.assertEqual(agregado['total'], 0)
+        self.assertEqual(agregado['status'], [])
+        self.assertEqual(agregado['tempo_medio'], [])
+
+
+# ------------------------------
+# Cache dos gráficos
+# ------------------------------
+
+class CacheGraficosTest(BaseChamadosTest):
+
+    def test_salva_e_le_por_filtros(self):
+        salvar_graficos({'status': 'png-status', 'motivos': 'png-motivos'}, {'regional': ['SUL', 'NORTE']})
+
+        # Ordem das listas e filtros vazios não mudam a chave
+        filtros = {'regional': ['NORTE', 'SUL'], 'lider': []}
+        self.assertEqual(
+            obter_graficos(['status', 'motivos', 'lideres'], filtros),
+            {'status': 'png-status', 'motivos': 'png-motivos'},
+        )
+        self.assertEqual(obter_graficos(['status'], {'regional': ['SUL']}), {})
+
+    def test_invalidar_troca_a_versao_apos_o_commit(self):
+        salvar_graficos({'status': 'png'}, {})
+        versao = versao_dados()
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar_graficos()
+            self.assertEqual(versao_dados(), versao)
+        self.assertNotEqual(versao_dados(), versao)
+        self.assertEqual(obter_graficos(['status'], {}), {})
+
+    def test_salvar_e_excluir_chamado_invalidam(self):
+        chamado = criar_chamado()
+        salvar_graficos({'status': 'png'}, {})
+
+        chamado.status = 'Finalizado'
+        chamado.fechado_em = momento(1, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado.save()
+        self.assertEqual(obter_graficos(['status'], {}), {})
+
+        salvar_graficos({'status': 'png'}, {})
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado.delete()
+        self.assertEqual(obter_graficos(['status'], {}), {})
+
+    def test_graficos_de_versao_antiga_nao_sao_servidos(self):
+        # Versão lida antes de agregar; os dados mudam enquanto o gráfico é renderizado
+        versao = versao_dados()
+        with self.captureOnCommitCallbacks(execute=True):
+            criar_chamado()
+        salvar_graficos({'status': 'png-antigo'}, {}, versao)
+
+        self.assertEqual(obter_graficos(['status'], {}, versao), {'status': 'png-antigo'})
+        self.assertEqual(obter_graficos(['status'], {}), {})
+
+
+# ------------------------------
+# Dashboard: séries em JSON
+# ------------------------------
+
+class DashboardDataTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.popular()
+        self.url = reverse('chamados:dashboard_data')
+
+    def test_series_do_usuario_sem_tempo_medio(self):
+        self.client.force_login(self.usuario)
+        dados = self.client.get(self.url).json()
+
+        self.assertEqual(dados['total'], 7)
+        self.assertEqual(dados['series']['status'], {'labels': ['Finalizado', 'Aberto'], 'valores': [4, 3]})
+        # Barras em ordem crescente
+        self.assertEqual(dados['series']['regionais'], {'labels': ['LESTE', 'NORTE', 'SUL'], 'valores': [2, 2, 3]})
+        self.assertEqual(dados['series']['motivos']['labels'], ['Balança', 'OUTRO', 'PDV', 'REDE'])
+        self.assertNotIn('tempo_medio', dados['series'])
+
+    def test_admin_recebe_tempo_medio(self):
+        admin = CustomUser.objects.create_user('admin', password='senha', papel='admin')
+        self.client.force_login(admin)
+        tempo_medio = self.client.get(self.url).json()['series']['tempo_medio']
+
+        self.assertEqual(tempo_medio['labels'], ['OUTRO', 'PDV', 'REDE'])
+        self.assertEqual(tempo_medio['valores'], [45.0, 45.0, 1440.0])
+
+    def test_filtros_e_periodo(self):
+        self.client.force_login(self.usuario)
+        dados = self.client.get(self.url, {'regional': ['NORTE', 'LESTE'], 'status': 'Aberto'}).json()
+        self.assertEqual(dados['total'], 2)
+
+        # O resumo é por dia de abertura
+        dados = self.client.get(self.url, {'tipo': 'periodo', 'inicio': '2024-03-01', 'fim': '2024-03-01'}).json()
+        self.assertEqual(dados['total'], 7)
+        dados = self.client.get(self.url, {'tipo': 'periodo', 'inicio': '2024-03-02', 'fim': '2024-03-31'}).json()
+        self.assertEqual(dados['total'], 0)
+
+        resposta = self.client.get(self.url, {'tipo': 'periodo', 'inicio': 'ontem', 'fim': 'hoje'})
+        self.assertEqual(resposta.status_code, 400)
+
+
+# ------------------------------
+# Dashboard: PNGs no pool de processos
+# ------------------------------
+
+class GerarGraficosTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.popular()
+        self.agregado = agregar_chamados(Chamado.objects.all())
+
+    def tearDown(self):
+        encerrar_pool_graficos()
+
+    def assertPng(self, valor):
+        self.assertTrue(base64.b64decode(valor).startswith(b'\x89PNG'))
+
+    @override_settings(DASHBOARD_WORKERS_GRAFICOS=0)
+    def test_em_serie_sem_pool(self):
+        self.assertEqual(workers_graficos(), 0)
+        plots = gerar_graficos(self.agregado, incluir_tempo_medio=False)
+
+        self.assertEqual(set(plots), {'status', 'regionais', 'lideres', 'motivos'})
+        for valor in plots.values():
+            self.assertPng(valor)
+
+    @override_settings(DASHBOARD_WORKERS_GRAFICOS=2)
+    def test_no_pool(self):
+        plots = gerar_graficos(self.agregado)
+
+        self.assertIsNotNone(dashboard._pool)
+        self.assertEqual(set(plots), {'status', 'regionais', 'lideres', 'motivos', 'tempo_medio'})
+        for valor in plots.values():
+            self.assertPng(valor)
+
+    @override_settings(DASHBOARD_WORKERS_GRAFICOS=2, DASHBOARD_TIMEOUT_GRAFICOS=0)
+    def test_pool_sem_resposta_renderiza_no_processo(self):
+        # Sem tempo de espera, os workers (ainda subindo) não respondem a tempo
+        plots = gerar_graficos(self.agregado)
+
+        self.assertIsNone(dashboard._pool)
+        self.assertEqual(set(plots), {'status', 'regionais', 'lideres', 'motivos', 'tempo_medio'})
+        for valor in plots.values():
+            self.assertPng(valor)
+
+    @override_settings(DASHBOARD_WORKERS_GRAFICOS=0)
+    def test_reaproveita_cache_e_so_renderiza_o_que_falta(self):
+        filtros = {'regional': ['SUL']}
+        primeiros = gerar_graficos(self.agregado, incluir_tempo_medio=False, filtros=filtros)
+
+        with mock.patch.object(dashboard, 'renderizar_graficos') as renderizar:
+            self.assertEqual(gerar_graficos(self.agregado, incluir_tempo_medio=False, filtros=filtros), primeiros)
+            renderizar.assert_not_called()
+
+            renderizar.return_value = {'tempo_medio': 'novo'}
+            plots = gerar_graficos(self.agregado, incluir_tempo_medio=True, filtros=filtros)
+            self.assertEqual(list(renderizar.call_args.args[0]), ['tempo_medio'])
+            self.assertEqual(plots['tempo_medio'], 'novo')
+
+
+# ------------------------------
+# Resumo diário
+# ------------------------------
+
+def linhas_resumo():
+    return set(ResumoDiarioChamado.objects.values_list(
+        'dia', 'regional', 'loja', 'lider', 'motivo', 'outro_motivo', 'status',
+        'quantidade', 'com_tempo', 'tempo_total',
+    ))
+
+
+class ResumoDiarioTest(BaseChamadosTest):
+
+    def assertResumoIgualAoRecalculado(self):
+        incremental = linhas_resumo()
+        reconstruir_resumo()
+        self.assertEqual(incremental, linhas_resumo())
+
+    def test_criar_editar_finalizar_e_excluir(self):
+        self.popular()
+        self.assertResumoIgualAoRecalculado()
+
+        aberto = Chamado.objects.filter(status='Aberto', regional='SUL').get()
+        aberto.regional = 'NORTE'
+        aberto.motivo = 'OUTRO'
+        aberto.outro_motivo = 'Impressora'
+        aberto.save()
+        self.assertResumoIgualAoRecalculado()
+
+        aberto.status = 'Finalizado'
+        aberto.fechado_em = momento(3, 8)
+        aberto.save(update_fields=['status', 'fechado_em'])
+        self.assertResumoIgualAoRecalculado()
+
+        # Mudar a abertura troca o dia da linha
+        aberto.aberto_em = momento(2, 8)
+        aberto.save()
+        self.assertResumoIgualAoRecalculado()
+
+        Chamado.objects.get(outro_motivo='Balança').delete()
+        self.assertResumoIgualAoRecalculado()
+
+    def test_mesmas_series_que_os_chamados(self):
+        self.popular()
+        resumo = agregar_resumo(ResumoDiarioChamado.objects.all())
+        chamados = agregar_chamados(Chamado.objects.all())
+
+        for chave in ('total', 'status', 'regionais', 'lideres', 'motivos'):
+            self.assertEqual(resumo[chave], chamados[chave], chave)
+        self.assertEqual([m for m, _ in resumo['tempo_medio']], [m for m, _ in chamados['tempo_medio']])
+        for (_, minutos), (_, minutos_chamados) in zip(resumo['tempo_medio'], chamados['tempo_medio']):
+            self.assertAlmostEqual(minutos, minutos_chamados)
+
+    def test_aplicar_deltas_cria_soma_e_apaga_linha_zerada(self):
+        chave = (momento(1).date(), 'SUL', 'L01', 'Ana', 'PDV', '', 'Finalizado')
+        deltas = novos_deltas()
+        deltas[chave] = [2, 1, timedelta(minutes=30)]
+        aplicar_deltas(deltas)
+        deltas[chave] = [-1, 0, timedelta(0)]
+        aplicar_deltas(deltas)
+
+        linha = ResumoDiarioChamado.objects.get()
+        self.assertEqual((linha.quantidade, linha.com_tempo, linha.tempo_total), (1, 1, timedelta(minutes=30)))
+
+        deltas[chave] = [-1, -1, -timedelta(minutes=30)]
+        aplicar_deltas(deltas)
+        self.assertFalse(ResumoDiarioChamado.objects.exists())
+
+
+# ------------------------------
+# Boot sem dependências pesadas
+# ------------------------------
+
+class ImportacaoAsgiTest(TestCase):
+
+    def test_boot_nao_importa_pandas_nem_matplotlib(self):
+        _, cumulativos = medir(['sistema_chamados.asgi', settings.ROOT_URLCONF])
+        modulos = {nome.strip() for nome in cumulativos}
+
+        self.assertIn('chamados.views', modulos)
+        for pacote in PROIBIDOS_PADRAO.split(','):
+            self.assertFalse(
+                [nome for nome in modulos if nome == pacote or nome.startswith(pacote + '.')], pacote
+            )
+
+
+# ------------------------------
+# GET condicional
+# ------------------------------
+
+class GetCondicionalTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.popular()
+        self.url = reverse('chamados:dashboard_data')
+        self.client.force_login(self.usuario)
+
+    def revalidar(self, etag):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_304_ate_os_dados_mudarem(self):
+        resposta = self.client.get(self.url)
+        etag = resposta['ETag']
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        self.assertEqual(self.revalidar(etag).status_code, 304)
+
+        chamado = Chamado.objects.filter(status='Aberto').first()
+        chamado.lider = 'Davi'
+        chamado.save()
+        resposta = self.revalidar(etag)
+        self.assertEqual(resposta.status_code, 200)
+        etag = resposta['ETag']
+        self.assertEqual(self.revalidar(etag).status_code, 304)
+
+        # Excluir não muda o MAX(atualizado_em); o total, sim. Sem rodar os
+        # on_commit: a versão em memória (cache local deste processo) não muda,
+        # como numa exclusão feita por outro processo
+        versao = versao_dados()
+        with self.captureOnCommitCallbacks():
+            Chamado.objects.filter(status='Finalizado').first().delete()
+        self.assertEqual(versao_dados(), versao)
+        self.assertEqual(self.revalidar(etag).status_code, 200)
+
+    def test_etag_depende_do_usuario_e_dos_filtros(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, {'regional': 'SUL'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        admin = CustomUser.objects.create_user('admin', password='senha', papel='admin')
+        self.client.force_login(admin)
+        self.assertEqual(self.revalidar(etag).status_code, 200)
+
+
+# ------------------------------
+# Paginação por cursor
+# ------------------------------
+
+def todas_as_paginas(qs, tamanho, **kwargs):
+    """Percorre o cursor até o fim; retorna os ids de cada página."""
+    paginas, cursor = [], None
+    while True:
+        itens, cursor = pagina_keyset(qs, cursor, tamanho, **kwargs)
+        paginas.append([c.pk for c in itens])
+        if cursor is None:
+            return paginas
+
+
+class PaginacaoKeysetTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        # Vários chamados com o mesmo aberto_em: o id desempata
+        for i in range(23):
+            criar_chamado(loja=f'L{i:02}', aberto_em=momento(1 + i % 4, 9, 0) + timedelta(microseconds=i % 3))
+
+    def test_sem_repetir_nem_pular_linhas(self):
+        esperado = list(Chamado.objects.order_by('-aberto_em', '-id').values_list('pk', flat=True))
+        for tamanho in (1, 5, 7, 23, 50):
+            paginas = todas_as_paginas(Chamado.objects.all(), tamanho)
+            self.assertEqual(sum(paginas, []), esperado, tamanho)
+            self.assertTrue(all(len(pagina) == tamanho for pagina in paginas[:-1]))
+
+    def test_cursor_invalido_volta_ao_inicio(self):
+        primeira, _ = pagina_keyset(Chamado.objects.all(), None, 5)
+        for cursor in ('lixo', 'bm9wZQ', ''):
+            itens, _ = pagina_keyset(Chamado.objects.all(), cursor, 5)
+            self.assertEqual(itens, primeira)
+
+    def test_carregar_mais(self):
+        self.client.force_login(self.usuario)
+        url = reverse('chamados:todos_chamados')
+        with self.settings(TODOS_CHAMADOS_POR_PAGINA=10):
+            resposta = self.client.get(url)
+            self.assertEqual(len(resposta.context['chamados']), 10)
+            self.assertEqual(resposta.context['total_chamados'], 23)
+
+            dados = self.client.get(url, {'cursor': resposta.context['proximo_cursor'], 'parcial': 1}).json()
+            self.assertEqual(dados['quantidade'], 10)
+            dados = self.client.get(url, {'cursor': dados['proximo_cursor'], 'parcial': 1}).json()
+            self.assertEqual(dados['quantidade'], 3)
+            self.assertIsNone(dados['proximo_cursor'])
+
+
+# ------------------------------
+# Benchmark dos índices
+# ------------------------------
+
+def indices_da_tabela(modelo):
+    with connection.cursor() as cursor:
+        restricoes = connection.introspection.get_constraints(cursor, modelo._meta.db_table)
+    return {nome for nome, info in restricoes.items() if info['index']}
+
+
+class ExplicarConsultasTest(BaseChamadosTest):
+
+    def test_mede_e_desfaz_tudo(self):
+        criar_chamado()
+        antes = {modelo: indices_da_tabela(modelo) for modelo in (Chamado, ResumoDiarioChamado)}
+        for modelo, nomes in antes.items():
+            self.assertTrue({indice.name for indice in modelo._meta.indexes} <= nomes)
+
+        saida = StringIO()
+        call_command('explicar_consultas', quantidade=300, dias=30, repeticoes=2, stdout=saida)
+
+        self.assertIn('nada foi gravado no banco', saida.getvalue())
+        self.assertIn('todos_chamados, página seguinte', saida.getvalue())
+        self.assertEqual(Chamado.objects.count(), 1)
+        self.assertEqual(ResumoDiarioChamado.objects.get().quantidade, 1)
+        for modelo, nomes in antes.items():
+            self.assertEqual(indices_da_tabela(modelo), nomes)
+
+
+# ------------------------------
+# Datas locais gravadas no chamado
+# ------------------------------
+
+class DiaLocalTest(BaseChamadosTest):
+
+    def test_dia_no_fuso_local(self):
+        # 01:30 UTC ainda é o dia anterior em America/Sao_Paulo (UTC-3)
+        utc = datetime(2024, 3, 2, 1, 30, tzinfo=dt_timezone.utc)
+        self.assertEqual(dia_local(utc), date(2024, 3, 1))
+        self.assertEqual(dia_local(datetime(2024, 3, 2, 1, 30)), date(2024, 3, 2))
+        self.assertIsNone(dia_local(None))
+
+    def test_save_preenche_os_dias(self):
+        chamado = criar_chamado(aberto_em=datetime(2024, 3, 2, 1, 30, tzinfo=dt_timezone.utc))
+        chamado.refresh_from_db()
+        self.assertEqual((chamado.aberto_dia, chamado.fechado_dia), (date(2024, 3, 1), None))
+
+        # update_fields também grava o dia correspondente
+        chamado.status = 'Finalizado'
+        chamado.fechado_em = datetime(2024, 3, 3, 2, 0, tzinfo=dt_timezone.utc)
+        chamado.save(update_fields=['status', 'fechado_em'])
+        chamado.refresh_from_db()
+        self.assertEqual(chamado.fechado_dia, date(2024, 3, 2))
+
+        self.assertEqual(Chamado.objects.filter(aberto_dia=date(2024, 3, 1)).count(), 1)
+        self.assertEqual(Chamado.objects.filter(aberto_dia=date(2024, 3, 2)).count(), 0)
+
+
+# ------------------------------
+# Busca textual (fallback icontains fora do PostgreSQL)
+# ------------------------------
+
+class BuscaChamadosTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.loja = criar_chamado(loja='Impressora Centro', motivo='REDE')
+        self.motivo = criar_chamado(loja='L02', motivo='IMPRESSORA', observacao='Toner no fim')
+        self.observacao = criar_chamado(loja='L03', motivo='PDV', observacao='impressora fiscal travada')
+        criar_chamado(loja='L04', motivo='REDE')
+
+    def test_todos_os_termos_e_relevancia_por_campo(self):
+        resultado = buscar_chamados(Chamado.objects.all(), 'impressora')
+        relevancias = dict(resultado.values_list('pk', 'relevancia'))
+        self.assertEqual(relevancias, {self.loja.pk: 1.0, self.motivo.pk: 0.4, self.observacao.pk: 0.2})
+
+        resultado = buscar_chamados(Chamado.objects.all(), 'Impressora, toner!')
+        self.assertEqual(list(resultado.values_list('pk', flat=True)), [self.motivo.pk])
+
+    def test_texto_vazio_nao_retorna_nada(self):
+        self.assertFalse(buscar_chamados(Chamado.objects.all(), '  ?! ').exists())
+
+    def test_paginacao_por_relevancia(self):
+        for i in range(6):
+            criar_chamado(loja=f'L1{i}', motivo='IMPRESSORA', aberto_em=momento(2, 9))
+        qs = buscar_chamados(Chamado.objects.all(), 'impressora')
+        esperado = list(qs.order_by('-relevancia', '-aberto_em', '-id').values_list('pk', flat=True))
+
+        paginas = todas_as_paginas(qs, 2, por_relevancia=True)
+        self.assertEqual(sum(paginas, []), esperado)
+        self.assertEqual(esperado[0], self.loja.pk)
+        self.assertEqual(esperado[-1], self.observacao.pk)
+
+    def test_busca_na_lista(self):
+        self.client.force_login(self.usuario)
+        resposta = self.client.get(reverse('chamados:todos_chamados'), {'q': 'toner'})
+        self.assertEqual([c.pk for c in resposta.context['chamados']], [self.motivo.pk])
+        self.assertIsNone(resposta.context['total_chamados'])
+
+
+# ------------------------------
+# Quadro de chamados em tempo real
+# ------------------------------
+
+CAMADA_MEMORIA = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def ouvir_grupo(grupo):
+    """(camada, canal) inscrito no grupo, para ler o que foi publicado."""
+    camada = get_channel_layer()
+    canal = async_to_sync(camada.new_channel)()
+    async_to_sync(camada.group_add)(grupo, canal)
+    return camada, canal
+
+
+def mensagens_recebidas(camada, canal):
+    async def ler():
+        recebidas = []
+        while True:
+            try:
+                recebidas.append(await asyncio.wait_for(camada.receive(canal), 0.1))
+            except asyncio.TimeoutError:
+                return recebidas
+    return async_to_sync(ler)()
+
+
+@override_settings(CHANNEL_LAYERS=CAMADA_MEMORIA)
+class QuadroChamadosTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.camada, self.canal = ouvir_grupo(GRUPO_QUADRO)
+
+    def eventos(self):
+        return [(m['evento'], m['chamado']['id']) for m in mensagens_recebidas(self.camada, self.canal)]
+
+    def test_publica_so_depois_do_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            chamado = criar_chamado(aberto_por=self.usuario)
+        self.assertEqual(self.eventos(), [])
+
+        for callback in callbacks:
+            callback()
+        mensagem, = mensagens_recebidas(self.camada, self.canal)
+        self.assertEqual(mensagem['type'], 'chamado.evento')
+        self.assertEqual(mensagem['evento'], 'criado')
+        self.assertEqual(mensagem['chamado']['loja'], 'L01')
+        self.assertEqual(mensagem['chamado']['aberto_dia'], '2024-03-01')
+        self.assertEqual(mensagem['chamado']['aberto_em'], '01/03/2024 09:00')
+        self.assertEqual(mensagem['chamado']['aberto_por'], str(self.usuario))
+        self.assertEqual(mensagem['chamado']['aberto_por_id'], self.usuario.pk)
+        self.assertEqual(chamado.pk, mensagem['chamado']['id'])
+
+    def test_nome_de_quem_abriu_sem_consulta_por_save(self):
+        chamado = Chamado.objects.get(pk=criar_chamado(aberto_por=self.usuario).pk)
+
+        # Usuário ainda não carregado: uma busca só, reaproveitada nos próximos saves
+        self.assertEqual(dados_chamado(chamado)['aberto_por'], str(self.usuario))
+        with self.assertNumQueries(0):
+            self.assertEqual(dados_chamado(chamado)['aberto_por'], str(self.usuario))
+
+        # Finalizado sai do quadro: nem busca o usuário
+        chamado = Chamado.objects.get(pk=chamado.pk)
+        chamado.status = 'Finalizado'
+        with self.assertNumQueries(0):
+            self.assertEqual(dados_chamado(chamado, com_autor=False)['aberto_por'], '')
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado.fechado_em = momento(1, 10)
+            chamado.save()
+        mensagem, = mensagens_recebidas(self.camada, self.canal)
+        self.assertEqual(mensagem['chamado']['aberto_por'], '')
+        self.assertEqual(mensagem['chamado']['aberto_por_id'], self.usuario.pk)
+        self.assertFalse(Chamado.aberto_por.is_cached(chamado))
+
+    def test_eventos_de_cada_alteracao(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado = criar_chamado()
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado.observacao = 'Trocado o cabo'
+            chamado.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado.status = 'Finalizado'
+            chamado.fechado_em = momento(1, 10)
+            chamado.save()
+        pk = chamado.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            chamado.delete()
+
+        self.assertEqual(
+            self.eventos(),
+            [('criado', pk), ('editado', pk), ('finalizado', pk), ('excluido', pk)],
+        )
+
+    def test_save_desfeito_nao_publica(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    criar_chamado()
+                    raise RuntimeError('desfaz')
+            except RuntimeError:
+                pass
+        self.assertEqual(self.eventos(), [])
+
+
+# ------------------------------
+# Finalização em lote
+# ------------------------------
+
+class FinalizarEmLoteTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.abertos = [criar_chamado(loja=f'L0{i}', aberto_em=momento(1, 8 + i)) for i in range(3)]
+        self.fechado = criar_chamado(status='Finalizado', fechado_em=momento(1, 10), observacao='antiga')
+
+    def test_status_duracao_e_resumo(self):
+        salvar_graficos({'status': 'png'}, {})
+        ids = [c.pk for c in self.abertos] + [self.fechado.pk, 9999]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            resultados = finalizar_em_lote(ids, self.usuario, observacao='Resolvido em lote')
+
+        self.assertEqual(resultados, {
+            **{c.pk: FINALIZADO for c in self.abertos}, self.fechado.pk: JA_FINALIZADO, 9999: NAO_ENCONTRADO,
+        })
+        # Um aviso ao quadro por chamado finalizado e a nova versão dos gráficos
+        self.assertEqual(len(callbacks), 4)
+        self.assertEqual(obter_graficos(['status'], {}), {'status': 'png'})
+        for callback in callbacks:
+            callback()
+        for original in self.abertos:
+            chamado = Chamado.objects.get(pk=original.pk)
+            self.assertEqual(chamado.status, 'Finalizado')
+            self.assertEqual(chamado.fechado_por, self.usuario)
+            self.assertEqual(chamado.observacao, 'Resolvido em lote')
+            self.assertEqual(chamado.duracao, chamado.fechado_em - chamado.aberto_em)
+            self.assertEqual(chamado.fechado_dia, dia_local(chamado.fechado_em))
+
+        # O já finalizado fica como estava
+        self.assertEqual(Chamado.objects.get(pk=self.fechado.pk).observacao, 'antiga')
+        self.assertEqual(obter_graficos(['status'], {}), {})
+
+        incremental = linhas_resumo()
+        reconstruir_resumo()
+        self.assertEqual(incremental, linhas_resumo())
+
+    def test_tempo_manual_vale_como_duracao(self):
+        finalizar_em_lote([self.abertos[0].pk], self.usuario, tempo_manual=timedelta(minutes=25))
+        chamado = Chamado.objects.get(pk=self.abertos[0].pk)
+        self.assertEqual((chamado.duracao, chamado.tempo_manual), (timedelta(minutes=25), timedelta(minutes=25)))
+        self.assertIsNone(chamado.observacao)
+
+    def test_view_exige_permissao(self):
+        url = reverse('chamados:finalizar_em_lote')
+        ids = [c.pk for c in self.abertos]
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.post(url, {'ids': ids}).status_code, 403)
+
+        gestor = CustomUser.objects.create_user('gestor', password='senha', papel='gestor')
+        self.client.force_login(gestor)
+        self.assertEqual(self.client.post(url, {'ids': ['x']}).status_code, 400)
+        dados = self.client.post(url, {'ids': ids, 'usar_tempo_manual': 'Sim', 'tempo_manual': '15'}).json()
+        self.assertEqual(dados['finalizados'], 3)
+        self.assertEqual(
+            set(Chamado.objects.filter(pk__in=ids).values_list('duracao', flat=True)), {timedelta(minutes=15)}
+        )
+
+
+# ------------------------------
+# Catálogo de motivos
+# ------------------------------
+
+class CatalogoMotivosTest(BaseChamadosTest):
+
+    def usos(self, nome):
+        return Motivo.objects.filter(nome=nome).values_list('usos', flat=True).first()
+
+    def test_fixos_vem_da_migracao(self):
+        self.assertEqual(
+            set(Motivo.objects.filter(fixo=True).values_list('nome', flat=True)), set(MOTIVOS_FIXOS)
+        )
+
+    def test_contadores_acompanham_os_chamados(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            primeiro = criar_chamado(motivo='SCANNER')
+            segundo = criar_chamado(motivo='SCANNER')
+            criar_chamado(motivo='BALANÇA')
+        self.assertEqual(self.usos('SCANNER'), 2)
+        self.assertEqual(motivos_aprendidos(), ['SCANNER', 'BALANÇA'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            primeiro.motivo = 'OUTRO'
+            primeiro.save()
+        self.assertEqual(self.usos('SCANNER'), 1)
+        self.assertEqual(self.usos('OUTRO'), 1)
+        self.assertTrue(Motivo.objects.get(nome='OUTRO').fixo)
+        # Só mudou contador: o catálogo em memória continua valendo
+        self.assertEqual(motivos_aprendidos(), ['SCANNER', 'BALANÇA'])
+
+        # Aprendido sem chamados sai do catálogo; fixo continua
+        with self.captureOnCommitCallbacks(execute=True):
+            segundo.delete()
+            primeiro.delete()
+        self.assertIsNone(self.usos('SCANNER'))
+        self.assertEqual(self.usos('OUTRO'), 0)
+        self.assertEqual(motivos_aprendidos(), ['BALANÇA'])
+
+    def test_catalogo_em_memoria_ate_a_versao_mudar(self):
+        self.assertEqual(motivos_aprendidos(), [])
+        Motivo.objects.create(nome='GAVETA', usos=1)
+        with self.assertNumQueries(0):
+            self.assertEqual(motivos_aprendidos(), [])
+
+        cache.clear()
+        self.assertEqual(motivos_aprendidos(), ['GAVETA'])
+
+    def test_admin_renova_o_catalogo(self):
+        motivo = Motivo.objects.create(nome='GAVETA', usos=1)
+        self.assertEqual(motivos_aprendidos(), ['GAVETA'])
+        motivo_admin = admin.site._registry[Motivo]
+        request = RequestFactory().post('/')
+
+        motivo.nome = 'GAVETA DO PDV'
+        with self.captureOnCommitCallbacks(execute=True):
+            motivo_admin.save_model(request, motivo, None, True)
+        self.assertEqual(motivos_aprendidos(), ['GAVETA DO PDV'])
+
+        motivo.fixo = True
+        with self.captureOnCommitCallbacks(execute=True):
+            motivo_admin.save_model(request, motivo, None, True)
+        self.assertEqual(motivos_aprendidos(), [])
+
+        Motivo.objects.create(nome='SCANNER', usos=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            motivo_admin.delete_queryset(request, Motivo.objects.filter(nome='GAVETA DO PDV'))
+        self.assertEqual(motivos_aprendidos(), ['SCANNER'])
+
+
+# ------------------------------
+# Índice do inventário em memória
+# ------------------------------
+
+DIA_INVENTARIO = date(2024, 3, 1)
+
+LINHAS_INVENTARIO = [
+    # (data, regional, loja, lider)
+    (DIA_INVENTARIO, 'SUL', 'L02', 'Ana'),
+    (DIA_INVENTARIO, 'SUL', 'L01', 'Ana'),
+    (DIA_INVENTARIO, 'NORTE', 'L03', 'Bia'),
+    (DIA_INVENTARIO, 'NORTE', 'L03', 'Caio'),
+    (date(2024, 3, 2), 'LESTE', 'L04', 'Davi'),
+    (None, 'OESTE', 'L05', 'Eva'),
+]
+
+
+def gravar_inventario(linhas, ativa=True):
+    """Versão com as linhas dadas; ativa = substitui a atual (a migração já cria uma)."""
+    if ativa:
+        VersaoInventario.objects.filter(ativa=True).update(ativa=False)
+    versao = VersaoInventario.objects.create(ativa=ativa, linhas=len(linhas))
+    InventarioExcel.objects.bulk_create(
+        InventarioExcel(versao=versao, data=data, regional=regional, loja=loja, lider=lider)
+        for data, regional, loja, lider in linhas
+    )
+    return versao
+
+
+class IndiceInventarioTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        gravar_inventario([(DIA_INVENTARIO, 'ANTIGA', 'L99', 'Zeca')], ativa=False)
+        gravar_inventario(LINHAS_INVENTARIO)
+
+    def test_mesmo_resultado_dos_distinct(self):
+        ativo = InventarioExcel.objects.filter(versao__ativa=True)
+        do_dia = ativo.filter(data=DIA_INVENTARIO)
+        nivel = indice_inventario().nivel(DIA_INVENTARIO)
+
+        self.assertEqual(
+            list(nivel.regionais), list(do_dia.order_by('regional').values_list('regional', flat=True).distinct())
+        )
+        self.assertEqual(list(nivel.lojas_por_regional['NORTE']), ['L03'])
+        # Loja com dois líderes: vale o primeiro gravado
+        self.assertEqual(nivel.lider_por_loja, {'L02': 'Ana', 'L01': 'Ana', 'L03': 'Bia'})
+        self.assertEqual(nivel.primeiro_lider, 'Ana')
+
+        geral = indice_inventario().nivel()
+        self.assertEqual(list(geral.lojas), list(ativo.order_by('loja').values_list('loja', flat=True).distinct()))
+        self.assertNotIn('ANTIGA', geral.regionais)
+        self.assertEqual(indice_inventario().nivel(date(2030, 1, 1)).regionais, ())
+
+    def test_remonta_so_quando_a_versao_muda(self):
+        indice = indice_inventario()
+        with self.assertNumQueries(0):
+            self.assertIs(indice_inventario(), indice)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventarioExcel.objects.filter(loja='L05').delete()
+            invalidar_inventario()
+        self.assertNotIn('OESTE', indice_inventario().nivel().regionais)
+
+    def test_endpoints_ajax(self):
+        self.client.force_login(self.usuario)
+        dados = self.client.get(reverse('chamados:regionais_por_data'), {'data': '2024-03-01'}).json()
+        self.assertEqual(dados['regionais'], ['NORTE', 'SUL'])
+
+        dados = self.client.get(reverse('chamados:lojas_por_regional'), {'regional': 'SUL', 'data': '2024-03-01'}).json()
+        self.assertEqual(dados['lojas'], ['L01', 'L02'])
+
+        dados = self.client.get(reverse('chamados:lider_por_loja'), {'loja': 'L03', 'data': '2024-03-01'}).json()
+        self.assertEqual(dados['lider'], 'Bia')
+
+        # Data inválida: inventário inteiro
+        dados = self.client.get(reverse('chamados:regionais_por_data'), {'data': 'ontem'}).json()
+        self.assertEqual(dados['regionais'], ['LESTE', 'NORTE', 'OESTE', 'SUL'])
+
+
+# ------------------------------
+# Árvore do inventário (endpoint único dos selects)
+# ------------------------------
+
+class ArvoreInventarioTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        gravar_inventario(LINHAS_INVENTARIO)
+        self.url = reverse('chamados:arvore_inventario')
+        self.client.force_login(self.usuario)
+
+    def test_arvore_da_data(self):
+        resposta = self.client.get(self.url, {'data': '2024-03-01'})
+        self.assertEqual(resposta['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(resposta.content), [
+            ['NORTE', [['L03', 'Bia']]],
+            ['SUL', [['L01', 'Ana'], ['L02', 'Ana']]],
+        ])
+
+    def test_etag_e_url_versionada(self):
+        resposta = self.client.get(self.url, {'data': '2024-03-01'})
+        etag = resposta['ETag']
+        self.assertIn('no-cache', resposta['Cache-Control'])
+        self.assertEqual(
+            self.client.get(self.url, {'data': '2024-03-01'}, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        _, hash_arvore = indice_inventario().nivel(DIA_INVENTARIO).arvore()
+        resposta = self.client.get(self.url, {'data': '2024-03-01', 'v': hash_arvore})
+        self.assertIn('immutable', resposta['Cache-Control'])
+
+        # Inventário novo: outro conteúdo, outro ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            gravar_inventario([(DIA_INVENTARIO, 'SUL', 'L01', 'Ana')])
+            invalidar_inventario()
+        resposta = self.client.get(self.url, {'data': '2024-03-01'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(json.loads(resposta.content), [['SUL', [['L01', 'Ana']]]])
+
+
+# ------------------------------
+# Importação do inventário
+# ------------------------------
+
+def dataframe_inventario(linhas, colunas=('#', 'REGIONAL', 'LÍDER', '4')):
+    import pandas as pd
+    return pd.DataFrame(linhas, columns=list(colunas), dtype=object)
+
+
+def linhas_ativas():
+    return list(
+        InventarioExcel.objects.filter(versao__ativa=True).order_by('id')
+        .values_list('loja', 'regional', 'lider', 'data')
+    )
+
+
+class NormalizarInventarioTest(TestCase):
+
+    def test_colunas_textos_e_datas(self):
+        bruto = dataframe_inventario(
+            [
+                [101, ' SUL ', 'Ana ', datetime(2024, 3, 1)],
+                ['L02', 'NORTE', None, '2024-03-02'],
+                [None, 'LESTE', 'Caio', 'sem data'],
+            ],
+            colunas=('#', ' regional', 'LÍDER', '4'),
+        )
+        normalizado = normalizar_inventario(bruto)
+
+        self.assertEqual(list(normalizado.columns), ['loja', 'regional', 'lider', 'data'])
+        self.assertEqual(normalizado.values.tolist(), [
+            ['101', 'SUL', 'Ana', date(2024, 3, 1)],
+            ['L02', 'NORTE', '', date(2024, 3, 2)],
+            ['', 'LESTE', 'Caio', None],
+        ])
+
+    def test_sem_coluna_de_data(self):
+        bruto = dataframe_inventario([['L01', 'SUL', 'Ana']], ('LOJA', 'REGIONAL', 'LÍDER'))
+        normalizado = normalizar_inventario(bruto)
+        self.assertEqual(normalizado['data'].tolist(), [None])
+
+    def test_coluna_obrigatoria(self):
+        with self.assertRaisesMessage(ValueError, "Coluna 'LÍDER' não encontrada no Excel"):
+            normalizar_inventario(dataframe_inventario([['L01', 'SUL']], ('LOJA', 'REGIONAL')))
+
+
+class ImportarInventarioTest(BaseChamadosTest):
+
+    def normalizado(self, linhas):
+        return normalizar_inventario(dataframe_inventario(linhas))
+
+    def test_carga_completa_troca_a_versao_ativa(self):
+        gravar_inventario([(DIA_INVENTARIO, 'ANTIGA', 'L99', 'Zeca')])
+        normalizado = self.normalizado([
+            ['L01', 'SUL', 'Ana', datetime(2024, 3, 1)],
+            ['L02', 'SUL', 'Ana', datetime(2024, 3, 1)],
+            ['L03', 'NORTE', 'Bia', None],
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = importar_inventario(normalizado, backend='bulk_create', coletar=False, incremental=False)
+
+        self.assertEqual(
+            (resultado['modo'], resultado['linhas'], resultado['novas'], resultado['removidas']),
+            ('completo', 3, 3, 1),
+        )
+        self.assertEqual(linhas_ativas(), [
+            ('L01', 'SUL', 'Ana', date(2024, 3, 1)),
+            ('L02', 'SUL', 'Ana', date(2024, 3, 1)),
+            ('L03', 'NORTE', 'Bia', None),
+        ])
+        self.assertEqual(VersaoInventario.objects.get(ativa=True).linhas, 3)
+        self.assertEqual(indice_inventario().nivel().regionais, ('NORTE', 'SUL'))
+
+    def test_erro_no_meio_nao_publica_nada(self):
+        antiga = gravar_inventario([(DIA_INVENTARIO, 'ANTIGA', 'L99', 'Zeca')])
+
+        def linhas():
+            yield ('L01', 'SUL', 'Ana', None)
+            raise ValueError('planilha corrompida')
+
+        with self.assertRaises(ValueError):
+            publicar_inventario(linhas(), backend='bulk_create', coletar=False)
+
+        self.assertEqual(VersaoInventario.objects.get(ativa=True), antiga)
+        self.assertEqual(linhas_ativas(), [('L99', 'ANTIGA', 'Zeca', DIA_INVENTARIO)])
+        self.assertFalse(InventarioExcel.objects.filter(loja='L01').exists())
+
+
+# ------------------------------
+# COPY FROM STDIN (PostgreSQL)
+# ------------------------------
+
+class CopyInventarioTest(BaseChamadosTest):
+
+    LINHAS = [
+        ('L01', 'SUL', 'Ana', date(2024, 3, 1)),
+        ('L "02", centro', 'SUL', '', None),
+        ('L03', 'NOR\nTE', 'Bia', date(2024, 3, 2)),
+    ]
+
+    def registros(self):
+        return [
+            (loja, regional, lider, data.isoformat() if data else '') for loja, regional, lider, data in self.LINHAS
+        ]
+
+    def test_leitor_csv_gera_o_mesmo_texto_em_qualquer_tamanho_de_leitura(self):
+        completo = LeitorCsv(self.registros()).read()
+        for tamanho in (1, 7, 64 * 1024):
+            leitor = LeitorCsv(self.registros())
+            partes = []
+            while trecho := leitor.read(tamanho):
+                self.assertLessEqual(len(trecho), tamanho)
+                partes.append(trecho)
+            self.assertEqual(''.join(partes), completo)
+
+        # Tudo entre aspas: com FORCE_NULL só a data vazia vira NULL
+        self.assertTrue(completo.startswith('"L01","SUL","Ana","2024-03-01"\n'))
+        self.assertEqual(list(csv.reader(completo.splitlines(keepends=True))), [list(r) for r in self.registros()])
+
+    def test_backend_copy_so_no_postgresql(self):
+        with self.settings(INVENTARIO_IMPORTACAO='copy'):
+            self.assertEqual(backend_importacao(), 'copy' if connection.vendor == 'postgresql' else 'bulk_create')
+        with self.settings(INVENTARIO_IMPORTACAO='bulk_create'):
+            self.assertEqual(backend_importacao(), 'bulk_create')
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY só existe no PostgreSQL')
+    def test_copy_grava_como_bulk_create(self):
+        versao = VersaoInventario.objects.create()
+        self.assertEqual(gravar_copy(iter(self.LINHAS), versao), 3)
+        self.assertEqual(
+            list(versao.itens.order_by('id').values_list('loja', 'regional', 'lider', 'data')),
+            self.LINHAS,
+        )
+
+
+# ------------------------------
+# Versões do inventário (troca de ponteiro)
+# ------------------------------
+
+class VersaoInventarioTest(BaseChamadosTest):
+
+    def test_versao_nova_so_fica_visivel_na_troca(self):
+        antiga = gravar_inventario([(DIA_INVENTARIO, 'ANTIGA', 'L99', 'Zeca')])
+        vistas = []
+
+        def linhas():
+            for i in range(3):
+                # Durante a carga quem lê continua vendo só a versão antiga
+                vistas.append(linhas_ativas())
+                yield (f'L0{i}', 'SUL', 'Ana', DIA_INVENTARIO)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            nova = publicar_inventario(linhas(), tamanho_lote=2, backend='bulk_create')
+
+        self.assertEqual(vistas, [[('L99', 'ANTIGA', 'Zeca', DIA_INVENTARIO)]] * 3)
+        self.assertEqual(VersaoInventario.objects.get(ativa=True), nova)
+        self.assertEqual(nova.linhas, 3)
+        self.assertFalse(VersaoInventario.objects.get(pk=antiga.pk).ativa)
+        self.assertIn(coletar_em_segundo_plano, callbacks)
+
+    def test_coleta_apaga_versoes_inativas_em_lotes(self):
+        antiga = gravar_inventario([(DIA_INVENTARIO, 'ANTIGA', f'L{i}', 'Zeca') for i in range(5)])
+        nova = gravar_inventario([(DIA_INVENTARIO, 'SUL', 'L01', 'Ana')])
+
+        self.assertEqual(coletar_versoes_antigas(tamanho_lote=2), 5)
+        self.assertEqual(list(VersaoInventario.objects.values_list('pk', flat=True)), [nova.pk])
+        self.assertFalse(InventarioExcel.objects.filter(versao=antiga.pk).exists())
+        self.assertEqual(linhas_ativas(), [('L01', 'SUL', 'Ana', DIA_INVENTARIO)])
+
+
+# ------------------------------
+# Importação incremental (só as diferenças)
+# ------------------------------
+
+class SincronizarInventarioTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.versao = gravar_inventario([
+            (DIA_INVENTARIO, 'SUL', 'L01', 'Ana'),
+            (DIA_INVENTARIO, 'SUL', 'L02', 'Ana'),
+            (DIA_INVENTARIO, 'NORTE', 'L03', 'Bia'),
+            (DIA_INVENTARIO, 'NORTE', 'L03', 'Bia'),  # repetida: casa 1 a 1
+            (date(2024, 3, 2), 'LESTE', 'L04', 'Caio'),
+        ])
+        VersaoInventario.objects.filter(pk=self.versao.pk).update(hash_arquivo='abc', hash_linhas='def')
+        # Loja repetida: fica o id da última ocorrência
+        self.ids = dict(
+            InventarioExcel.objects.filter(versao=self.versao).order_by('id').values_list('loja', 'id')
+        )
+
+    def normalizado(self, linhas):
+        return normalizar_inventario(dataframe_inventario(
+            [[loja, regional, lider, data] for data, regional, loja, lider in linhas]
+        ))
+
+    def arquivo_novo(self):
+        return self.normalizado([
+            (DIA_INVENTARIO, 'SUL', 'L01', 'Ana'),            # igual
+            (DIA_INVENTARIO, 'SUL', 'L02', 'Bruno'),          # líder mudou
+            (DIA_INVENTARIO, 'NORTE', 'L03', 'Bia'),          # uma das repetidas sumiu
+            (DIA_INVENTARIO, 'OESTE', 'L05', 'Eva'),          # nova
+            (date(2024, 3, 2), 'LESTE', 'L04', 'Caio'),       # igual
+        ])
+
+    def test_diferencas(self):
+        import pandas as pd
+
+        atual = pd.DataFrame(
+            list(InventarioExcel.objects.order_by('id').values_list('id', 'loja', 'regional', 'lider', 'data')),
+            columns=['id', 'loja', 'regional', 'lider', 'data'],
+        )
+        novas, alteradas, removidas, inalteradas = diferencas_inventario(self.arquivo_novo(), atual)
+
+        self.assertEqual(novas['loja'].tolist(), ['L05'])
+        self.assertEqual(alteradas[['id', 'lider']].values.tolist(), [[self.ids['L02'], 'Bruno']])
+        self.assertEqual(removidas, [self.ids['L03']])
+        self.assertEqual(inalteradas, 3)
+
+    def test_sincroniza_na_versao_ativa(self):
+        intocada = InventarioExcel.objects.get(loja='L01').atualizado_em
+        with self.captureOnCommitCallbacks(execute=True):
+            mudancas = sincronizar_inventario(self.arquivo_novo(), backend='bulk_create')
+
+        self.assertEqual(mudancas, {'novas': 1, 'alteradas': 1, 'removidas': 1, 'inalteradas': 3})
+        versao = VersaoInventario.objects.get(ativa=True)
+        self.assertEqual((versao.pk, versao.linhas, versao.hash_arquivo), (self.versao.pk, 5, ''))
+        self.assertEqual(sorted(linhas_ativas()), [
+            ('L01', 'SUL', 'Ana', DIA_INVENTARIO),
+            ('L02', 'SUL', 'Bruno', DIA_INVENTARIO),
+            ('L03', 'NORTE', 'Bia', DIA_INVENTARIO),
+            ('L04', 'LESTE', 'Caio', date(2024, 3, 2)),
+            ('L05', 'OESTE', 'Eva', DIA_INVENTARIO),
+        ])
+        self.assertEqual(InventarioExcel.objects.get(loja='L01').atualizado_em, intocada)
+        self.assertEqual(indice_inventario().nivel(DIA_INVENTARIO).lider_por_loja['L02'], 'Bruno')
+
+    def test_restrito_as_datas(self):
+        # Só o dia 2 no arquivo: o dia 1 não é tocado
+        normalizado = self.normalizado([(date(2024, 3, 2), 'LESTE', 'L04', 'Davi')])
+        mudancas = sincronizar_inventario(normalizado, datas=[date(2024, 3, 2)], backend='bulk_create')
+
+        self.assertEqual(mudancas, {'novas': 0, 'alteradas': 1, 'removidas': 0, 'inalteradas': 0})
+        self.assertEqual(InventarioExcel.objects.filter(versao=self.versao).count(), 5)
+
+    def test_sem_mudancas_nao_grava(self):
+        normalizado = self.normalizado(
+            InventarioExcel.objects.order_by('id').values_list('data', 'regional', 'loja', 'lider')
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = importar_inventario(normalizado, backend='bulk_create')
+        escritas = [q['sql'] for q in consultas if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(escritas, [])
+        self.assertEqual((resultado['modo'], resultado['inalteradas']), ('incremental', 5))
+        self.assertEqual(VersaoInventario.objects.get(ativa=True).hash_arquivo, 'abc')
+
+
+# ------------------------------
+# Leitura da planilha em fluxo
+# ------------------------------
+
+def criar_planilha(caminho, linhas, cabecalho=('#', 'REGIONAL', 'OBS', 'LÍDER', '4'), vazias_no_fim=3):
+    """Planilha no formato do inventário: título, linha em branco e o cabeçalho na 3ª linha."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+
+    pasta = Workbook()
+    aba = pasta.active
+    aba.append(['Inventário de lojas'])
+    aba.append([])
+    aba.append(list(cabecalho))
+    for linha in linhas:
+        aba.append(list(linha))
+    # Linhas só com formatação no fim: o read_excel descarta
+    for i in range(vazias_no_fim):
+        aba.cell(row=aba.max_row + 1, column=1).font = Font(bold=True)
+    pasta.save(caminho)
+    return caminho
+
+
+LINHAS_PLANILHA = [
+    (101, 'SUL', 'x', 'Ana', datetime(2024, 3, 1)),
+    ('L02', ' SUL ', None, 'Ana', datetime(2024, 3, 1)),
+    (None, None, 'só observação', None, None),
+    (None, None, None, None, None),  # vazia no meio: vira linha vazia
+    ('L03', 'NORTE', None, 'Bia', None),
+    (104.0, 'NORTE', None, 'Bia', '2024-03-02'),
+]
+
+
+class LeituraPlanilhaTest(TestCase):
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = pasta.name
+        self.caminho = criar_planilha(f'{self.pasta}/inventario.xlsx', LINHAS_PLANILHA)
+
+    def motores(self):
+        return ['openpyxl', 'calamine'] if calamine_disponivel() else ['openpyxl']
+
+    def test_mesmas_linhas_do_read_excel(self):
+        import pandas as pd
+
+        esperado = normalizar_inventario(pd.read_excel(self.caminho, header=2))
+        for motor in self.motores():
+            with self.subTest(motor=motor):
+                lotes = list(ler_lotes(self.caminho, tamanho_lote=4, motor=motor))
+                self.assertEqual([len(lote) for lote in lotes], [4, 2])
+                self.assertEqual(list(lotes[0].columns), ['LOJA', 'REGIONAL', 'LÍDER', '4'])
+
+                lido = normalizar_inventario(pd.concat(lotes, ignore_index=True))
+                self.assertEqual(lido.values.tolist(), esperado.values.tolist())
+
+    def test_coluna_obrigatoria(self):
+        caminho = criar_planilha(f'{self.pasta}/sem_lider.xlsx', [('L01', 'SUL')], cabecalho=('LOJA', 'REGIONAL'))
+        for motor in self.motores():
+            with self.subTest(motor=motor), self.assertRaisesMessage(ValueError, "Coluna 'LÍDER'"):
+                next(ler_lotes(caminho, motor=motor))
+
+    def test_motor_padrao_e_openpyxl(self):
+        self.assertEqual(motor_planilha(), 'openpyxl')
+        with self.settings(INVENTARIO_LEITOR='auto'):
+            self.assertEqual(motor_planilha(), 'calamine' if calamine_disponivel() else 'openpyxl')
+        with self.assertRaises(ValueError):
+            motor_planilha('xlrd')
+
+
+# ------------------------------
+# Importação em segundo plano
+# ------------------------------
+# TransactionTestCase: a importação roda com commits de verdade e fecha a
+# conexão no fim, como na thread de trabalho.
+
+def executor_sincrono():
+    """Executor que roda a importação na hora (em vez da thread de trabalho)."""
+    return mock.Mock(submit=lambda funcao, *args: funcao(*args))
+
+
+@override_settings(CHANNEL_LAYERS=CAMADA_MEMORIA)
+class FilaImportacaoTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = pasta.name
+        configuracao = override_settings(
+            MEDIA_ROOT=f'{self.pasta}/media', INVENTARIO_CACHE_DIR=f'{self.pasta}/cache'
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        executor = mock.patch.object(fila_importacao, 'executor_importacao', executor_sincrono)
+        executor.start()
+        self.addCleanup(executor.stop)
+
+        self.admin = CustomUser.objects.create_user('admin', password='senha', papel='admin')
+        self.client.force_login(self.admin)
+        self.url = reverse('chamados:upload_excel')
+
+    def arquivo(self, linhas=LINHAS_PLANILHA, **kwargs):
+        caminho = criar_planilha(f'{self.pasta}/envio.xlsx', linhas, **kwargs)
+        with open(caminho, 'rb') as planilha:
+            return SimpleUploadedFile('inventario.xlsx', planilha.read())
+
+    def mensagens(self, resposta):
+        return [str(m) for m in get_messages(resposta.wsgi_request)]
+
+    def test_upload_importa_em_segundo_plano(self):
+        resposta = self.client.post(self.url, {'file': self.arquivo()})
+
+        importacao = ImportacaoInventario.objects.get()
+        self.assertRedirects(resposta, f'{self.url}?importacao={importacao.pk}', fetch_redirect_response=False)
+        self.assertEqual((importacao.status, importacao.em_aberto, importacao.modo), ('Concluída', False, 'completo'))
+        self.assertEqual((importacao.linhas, importacao.linhas_lidas), (6, 6))
+        self.assertEqual(importacao.nome_original, 'inventario.xlsx')
+        self.assertEqual(len(importacao.hash_arquivo), 64)
+        self.assertEqual(InventarioExcel.objects.filter(versao__ativa=True).count(), 6)
+
+        resposta = self.client.get(resposta['Location'])
+        self.assertEqual(resposta.context['dados_importacao']['status'], 'Concluída')
+
+    def test_planilha_invalida_vira_erro(self):
+        self.client.post(self.url, {'file': self.arquivo([('L01', 'SUL')], cabecalho=('LOJA', 'REGIONAL'))})
+        importacao = ImportacaoInventario.objects.get()
+        self.assertEqual((importacao.status, importacao.em_aberto), ('Erro', False))
+        self.assertIn("Coluna 'LÍDER'", importacao.erro)
+
+    def test_uma_importacao_por_vez(self):
+        ImportacaoInventario.objects.create(arquivo='outro.xlsx')
+        with self.assertRaises(ImportacaoEmAndamento):
+            enfileirar_importacao(self.arquivo(), self.admin)
+
+        resposta = self.client.post(self.url, {'file': self.arquivo()})
+        self.assertRedirects(resposta, self.url, fetch_redirect_response=False)
+        self.assertIn('importação do inventário em andamento', self.mensagens(resposta)[0])
+        self.assertEqual(ImportacaoInventario.objects.count(), 1)
+
+    def test_falha_ao_salvar_o_arquivo(self):
+        # MEDIA_ROOT é um arquivo: não dá para criar a pasta de uploads
+        open(f'{self.pasta}/media', 'w').close()
+        resposta = self.client.post(self.url, {'file': self.arquivo()})
+
+        self.assertRedirects(resposta, self.url, fetch_redirect_response=False)
+        self.assertIn('Não foi possível receber o arquivo', self.mensagens(resposta)[0])
+        importacao = ImportacaoInventario.objects.get()
+        self.assertEqual((importacao.status, importacao.em_aberto), ('Erro', False))
+
+    def test_libera_so_a_importacao_parada(self):
+        parada = ImportacaoInventario.objects.create(arquivo='parada.xlsx')
+        ImportacaoInventario.objects.filter(pk=parada.pk).update(
+            atualizado_em=timezone.now() - timedelta(hours=1)
+        )
+        with self.settings(IMPORTACAO_INVENTARIO_TIMEOUT=60):
+            liberar_importacoes_paradas()
+            parada.refresh_from_db()
+            self.assertEqual((parada.status, parada.em_aberto), ('Erro', False))
+
+            viva = ImportacaoInventario.objects.create(arquivo='viva.xlsx')
+            liberar_importacoes_paradas()
+            viva.refresh_from_db()
+            self.assertTrue(viva.em_aberto)
+
+    def test_progresso_grava_sinal_de_vida(self):
+        importacao = ImportacaoInventario.objects.create(arquivo='x.xlsx', status='Em andamento')
+        antes = importacao.atualizado_em
+        with mock.patch.object(fila_importacao, 'INTERVALO_PROGRESSO', 0.01), acompanhando(importacao):
+            importacao.linhas_lidas = 1234
+            time.sleep(0.2)
+
+        importacao.refresh_from_db()
+        self.assertEqual(importacao.linhas_lidas, 1234)
+        self.assertGreater(importacao.atualizado_em, antes)
+
+
+# ------------------------------
+# Reenvio da mesma planilha
+# ------------------------------
+
+class ReimportacaoPorHashTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.pasta = pasta.name
+        configuracao = override_settings(INVENTARIO_CACHE_DIR=f'{self.pasta}/cache')
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.caminho = criar_planilha(f'{self.pasta}/v1.xlsx', LINHAS_PLANILHA)
+        self.primeira = importar_planilha(self.caminho, backend='bulk_create', coletar=False)
+
+    def importar(self, caminho):
+        return importar_planilha(caminho, backend='bulk_create', coletar=False)
+
+    def test_primeira_carga_guarda_os_hashes(self):
+        versao = VersaoInventario.objects.get(ativa=True)
+        self.assertEqual(self.primeira['modo'], 'completo')
+        self.assertEqual(versao.hash_arquivo, importacao.calcular_hash_arquivo(self.caminho))
+        normalizado = importacao.ler_inventario(self.caminho)
+        self.assertEqual(versao.hash_linhas, importacao.calcular_hash_linhas(normalizado))
+
+    def test_mesmo_arquivo_nem_abre_a_planilha(self):
+        with mock.patch.object(importacao, 'ler_lotes', side_effect=AssertionError('leu a planilha')):
+            resultado = self.importar(self.caminho)
+        self.assertEqual((resultado['modo'], resultado['inalteradas']), ('inalterado', 6))
+
+    def test_arquivo_diferente_com_as_mesmas_linhas(self):
+        # Só a coluna que não é importada mudou: bytes diferentes, linhas iguais
+        linhas = [(loja, regional, 'editado', lider, data) for loja, regional, _, lider, data in LINHAS_PLANILHA]
+        caminho = criar_planilha(f'{self.pasta}/v2.xlsx', linhas)
+        versao = VersaoInventario.objects.get(ativa=True)
+
+        resultado = self.importar(caminho)
+
+        self.assertEqual(resultado['modo'], 'inalterado')
+        atual = VersaoInventario.objects.get(ativa=True)
+        self.assertEqual(atual.pk, versao.pk)
+        self.assertEqual(atual.hash_arquivo, importacao.calcular_hash_arquivo(caminho))
+        self.assertEqual(atual.hash_linhas, versao.hash_linhas)
+
+    def test_conteudo_novo_e_importado(self):
+        caminho = criar_planilha(f'{self.pasta}/v3.xlsx', LINHAS_PLANILHA + [('L05', 'OESTE', None, 'Eva', None)])
+        resultado = self.importar(caminho)
+
+        self.assertEqual((resultado['modo'], resultado['novas'], resultado['inalteradas']), ('incremental', 1, 6))
+        versao = VersaoInventario.objects.get(ativa=True)
+        self.assertEqual(versao.hash_arquivo, importacao.calcular_hash_arquivo(caminho))
+        # E o reenvio do mesmo arquivo agora é pulado
+        self.assertEqual(self.importar(caminho)['modo'], 'inalterado')
+
+    def test_edicao_no_admin_esquece_o_hash(self):
+        modelo_admin = admin.site._registry[InventarioExcel]
+        request = RequestFactory().post('/')
+        request.user = self.usuario
+        item = InventarioExcel.objects.filter(versao__ativa=True).first()
+        item.lider = 'Outro'
+        modelo_admin.save_model(request, item, None, True)
+
+        self.assertEqual(VersaoInventario.objects.filter(ativa=True, hash_arquivo='').count(), 1)
+        resultado = self.importar(self.caminho)
+        self.assertEqual((resultado['modo'], resultado['alteradas']), ('incremental', 1))
+
+
+# ------------------------------
+# Exportação para Excel
+# ------------------------------
+
+def ler_xlsx(conteudo):
+    from openpyxl import load_workbook
+
+    aba = load_workbook(BytesIO(conteudo), read_only=True).worksheets[0]
+    return [list(linha) for linha in aba.iter_rows(values_only=True)]
+
+
+class ExportacaoExcelTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        self.popular()
+        criar_chamado(loja='L09', aberto_em=momento(1, 9) + timedelta(days=31))  # abril
+        self.url = reverse('chamados:exportar_excel')
+        self.client.force_login(self.usuario)
+
+    def test_planilha_em_streaming(self):
+        with self.settings(EXPORTACAO_TAMANHO_LOTE=2):
+            resposta = self.client.get(self.url, {'mes': '2024-03', 'campos': ['loja', 'status', 'id']})
+
+        self.assertTrue(resposta.streaming)
+        self.assertIn('Lista de Chamados_2024-03.xlsx', resposta['Content-Disposition'])
+        linhas = ler_xlsx(b''.join(resposta.streaming_content))
+        self.assertEqual(linhas[0], ['Loja', 'Status', 'ID'])
+        self.assertEqual(
+            linhas[1:],
+            [[c.loja, c.status, c.pk] for c in Chamado.objects.filter(aberto_dia__month=3).order_by('id')],
+        )
+
+    def test_todas_as_colunas_por_padrao(self):
+        resposta = self.client.get(self.url, {'inicio': '2024-04-01', 'fim': '2024-04-30'})
+        linhas = ler_xlsx(b''.join(resposta.streaming_content))
+        self.assertEqual(linhas[0], list(CAMPOS_EXPORTACAO.values()))
+        self.assertEqual(len(linhas), 2)
+
+    def test_sem_chamados(self):
+        resposta = self.client.get(self.url, {'mes': '2023-01'})
+        self.assertEqual(resposta.content.decode(), 'Nenhum chamado encontrado para os filtros aplicados.')
+
+    def test_arquivo_pronto_para_ler(self):
+        arquivo, linhas = exportar_chamados(Chamado.objects.order_by('id'), ['id'], tamanho_lote=3)
+        with arquivo:
+            self.assertEqual(linhas, 8)
+            self.assertEqual(arquivo.tell(), 0)
+            self.assertEqual(len(ler_xlsx(arquivo.read())), 9)
+
+
+# ------------------------------
+# Exportação: colunas projetadas no SQL
+# ------------------------------
+
+def linha_exportacao_antiga(c, colunas):
+    """Linha como o laço antigo montava a partir da instância de Chamado."""
+    duracao = c.tempo_manual or c.duracao or timedelta(0)
+    total_minutos = int(duracao.total_seconds() // 60)
+    valores = {
+        'id': c.id,
+        'regional': c.regional,
+        'loja': c.loja,
+        'lider': c.lider,
+        'motivo': (
+            f"OUTRO ({c.outro_motivo})" if c.motivo and c.motivo.upper() == "OUTRO" and c.outro_motivo
+            else c.motivo or ""
+        ),
+        'abertura': c.aberto_em.strftime('%d/%m/%Y %H:%M:%S') if c.aberto_em else '',
+        'fechamento': c.fechado_em.strftime('%d/%m/%Y %H:%M:%S') if c.fechado_em else '',
+        'aberto_por': c.aberto_por.get_full_name() if c.aberto_por else "Usuário excluído",
+        'fechado_por': c.fechado_por.get_full_name() if c.fechado_por else "",
+        'status': c.status,
+        'duracao': f"{total_minutos // 60}h {total_minutos % 60}min",
+        'tempo_manual': str(c.tempo_manual) if c.tempo_manual else "",
+        'observacao': c.observacao or "",
+    }
+    return [valores[coluna] for coluna in colunas]
+
+
+class ProjecaoExportacaoTest(BaseChamadosTest):
+
+    def setUp(self):
+        super().setUp()
+        so_nome = CustomUser.objects.create_user('bia', first_name='Bia')
+        sem_nome = CustomUser.objects.create_user('anonimo')
+        criar_chamado(aberto_por=self.usuario, motivo='OUTRO', outro_motivo='Balança', observacao='ok')
+        criar_chamado(aberto_por=so_nome, motivo='outro', outro_motivo='Gaveta')
+        criar_chamado(aberto_por=None, motivo='OUTRO', outro_motivo='')
+        criar_chamado(aberto_por=sem_nome, status='Finalizado', fechado_por=so_nome,
+                      fechado_em=momento(1, 11, 30))
+        criar_chamado(status='Finalizado', fechado_por=self.usuario, fechado_em=momento(1, 10),
+                      tempo_manual=timedelta(minutes=95))
+        # Tempo manual zerado não vale: fica a duração calculada
+        criar_chamado(status='Finalizado', fechado_em=momento(2, 9, 5), tempo_manual=timedelta(0))
+
+    def test_mesmos_valores_do_laco_antigo(self):
+        colunas = list(CAMPOS_EXPORTACAO)
+        chamados = Chamado.objects.order_by('id')
+        esperado = [
+            linha_exportacao_antiga(c, colunas) for c in chamados.select_related('aberto_por', 'fechado_por')
+        ]
+
+        self.assertEqual(list(linhas_exportacao(chamados, colunas, tamanho_lote=2)), esperado)
+
+    def test_ordem_e_colunas_repetidas(self):
+        colunas = ['observacao', 'id', 'observacao']
+        chamados = Chamado.objects.order_by('id')
+        self.assertEqual(
+            list(linhas_exportacao(chamados, colunas, tamanho_lote=10)),
+            [linha_exportacao_antiga(c, colunas) for c in chamados],
+        )
+
+    def test_consulta_so_com_as_colunas_marcadas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            list(linhas_exportacao(Chamado.objects.all(), ['loja', 'status'], tamanho_lote=10))
+        sql, = [q['sql'] for q in consultas]
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('observacao', sql)
+
+        with CaptureQueriesContext(connection) as consultas:
+            list(linhas_exportacao(Chamado.objects.all(), ['aberto_por'], tamanho_lote=10))
+        self.assertEqual(len(consultas), 1)
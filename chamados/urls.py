@@ -23,6 +23,7 @@ urlpatterns = [
     # ------------------------------
     path('', views.sistema_chamados_view, name='sistema_chamados'),
     path('ativos/', views.chamados_ativos, name='chamados_ativos'),
+    path('finalizar/lote/', views.finalizar_em_lote_view, name='finalizar_em_lote'),
     path('finalizar/<int:pk>/', views.finalizar_chamado_view, name='finalizar_chamado'),
     path('todos/', views.todos_chamados, name='todos_chamados'),
     path('usuarios/', views.gerenciar_usuarios, name='gerenciar_usuarios'),
@@ -35,6 +36,7 @@ urlpatterns = [
     path('ajax/regionais/', views.regionais_por_data, name='regionais_por_data'),
     path('ajax/lojas/', views.lojas_por_regional, name='lojas_por_regional'),
     path('ajax/lider/', views.lider_por_loja, name='lider_por_loja'),
+    path('ajax/inventario/', views.arvore_inventario, name='arvore_inventario'),
 
     # ------------------------------
     # Upload / Export Excel
@@ -46,6 +48,7 @@ urlpatterns = [
     # Dashboard
     # ------------------------------
     path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('dashboard/data/', views.dashboard_data, name='dashboard_data'),
     path('dashboard_admin/filtrar/', views.filtrar_dashboard, name='filtrar_dashboard'),
     path('exportar/', exportar_excel_form, name='exportar_excel_form'),
     path('exportar/download/', exportar_excel_view, name='exportar_excel'),
@@ -1,6 +1,5 @@
-import pandas as pd
 from django.core.files.storage import default_storage
-from .models import InventarioExcel
+from .importacao import arquivo_ja_importado, inventario_normalizado, sincronizar_inventario
 
 def carregar_chamados_excel(data_filtro=None, sobrescrever=False):
     """
@@ -9,36 +8,27 @@ def carregar_chamados_excel(data_filtro=None, sobrescrever=False):
     - sobrescrever: se True, sobrescreve os registros existentes no banco.
     """
 
+    import pandas as pd
+
     try:
         path = default_storage.path('uploads/chamados.xlsx')
-        df = pd.read_excel(path, header=2)
-
-        # Padroniza nomes das colunas
-        df.columns = [str(c).strip().upper() for c in df.columns]
-
-        # Renomeia coluna '#' para LOJA
-        if '#' in df.columns:
-            df.rename(columns={'#': 'LOJA'}, inplace=True)
-
-        # Cria coluna DATA se não existir e houver coluna "4" (Data no Excel)
-        if 'DATA' not in df.columns and '4' in df.columns:
-            df['DATA'] = pd.to_datetime(df['4'], errors='coerce')
-
-        # Seleciona apenas colunas essenciais
-        cols = ['LOJA', 'REGIONAL', 'LÍDER']
-        if 'DATA' in df.columns:
-            cols.append('DATA')
-        df = df[cols]
+        # Normalizado (loja/regional/lider/data) do cache Parquet, se o arquivo não mudou
+        normalizado, hash_arquivo = inventario_normalizado(path)
+        df = pd.DataFrame({
+            'LOJA': normalizado['loja'],
+            'REGIONAL': normalizado['regional'],
+            'LÍDER': normalizado['lider'],
+            'DATA': normalizado['data'],
+        })
 
         # Remove linhas inválidas
-        df = df.dropna(subset=['LOJA', 'REGIONAL', 'LÍDER'])
         df = df[(df['LOJA'] != '') & (df['REGIONAL'] != '') & (df['LÍDER'] != '')]
 
-        # Converte DATA para tipo date, removendo NaT
-        if 'DATA' in df.columns:
-            df['DATA'] = pd.to_datetime(df['DATA'], errors='coerce')
-            df = df[~df['DATA'].isna()]
-            df['DATA'] = df['DATA'].dt.date
+        # Sem data válida a linha sai; planilha sem nenhuma data fica sem a coluna DATA
+        if df['DATA'].notna().any():
+            df = df[df['DATA'].notna()]
+        else:
+            df = df.drop(columns='DATA')
 
         # Filtra por data, se fornecida
         if data_filtro and 'DATA' in df.columns:
@@ -46,30 +36,17 @@ def carregar_chamados_excel(data_filtro=None, sobrescrever=False):
                 data_filtro = pd.to_datetime(data_filtro).date()
             df = df[df['DATA'] == data_filtro]
 
-        # Limpa espaços em branco
-        for col in ['LOJA', 'REGIONAL', 'LÍDER']:
-            df[col] = df[col].astype(str).str.strip()
-
-        # --- Atualiza o banco, se solicitado ---
-        if sobrescrever and not df.empty:
-            # Deleta registros existentes do mesmo período, se DATA existir
-            if 'DATA' in df.columns:
-                datas = df['DATA'].dropna().unique()
-                InventarioExcel.objects.filter(data__in=datas).delete()
-            else:
-                InventarioExcel.objects.all().delete()
-
-            # Cria novos registros
-            objetos = [
-                InventarioExcel(
-                    loja=row['LOJA'],
-                    regional=row['REGIONAL'],
-                    lider=row['LÍDER'],
-                    data=row['DATA'] if 'DATA' in row else None
-                )
-                for _, row in df.iterrows()
-            ]
-            InventarioExcel.objects.bulk_create(objetos)
+        # --- Atualiza o banco, se solicitado (nada a fazer se este arquivo já foi importado) ---
+        if sobrescrever and not df.empty and not arquivo_ja_importado(hash_arquivo):
+            normalizado = pd.DataFrame({
+                'loja': df['LOJA'],
+                'regional': df['REGIONAL'],
+                'lider': df['LÍDER'],
+                'data': df['DATA'] if 'DATA' in df.columns else None,
+            })
+            # Grava só o que mudou: nos dias da planilha, se houver DATA; senão, no inventário inteiro
+            datas = list(df['DATA'].dropna().unique()) if 'DATA' in df.columns else None
+            sincronizar_inventario(normalizado, datas)
 
         return df.reset_index(drop=True)
 
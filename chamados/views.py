@@ -1,19 +1,31 @@
-import matplotlib
-matplotlib.use("Agg")  # backend sem GUI
-import matplotlib.patheffects as path_effects
 from . import views
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.utils import timezone
 from django.conf import settings
 from django.urls import reverse
 from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
+from django.utils.cache import patch_cache_control
+from urllib.parse import urlencode
+from django.template.loader import render_to_string
+from django.db.models import Sum
 from .utils import carregar_chamados_excel
+from .condicional import condicional
+from .cache_graficos import versao_dados
+from .dashboard import agregar_resumo, dados_graficos, gerar_graficos
+from .exportacao import colunas_exportacao, exportar_chamados
+from .busca import buscar_chamados
+from .paginacao import pagina_keyset
+from .finalizacao import FINALIZADO, finalizar_em_lote
+from .motivos import motivos_aprendidos
+from .inventario import indice_inventario, marca_inventario
+from .fila_importacao import ImportacaoEmAndamento, dados_importacao, enfileirar_importacao
 from .forms import LoginForm, ChamadoForm, UploadExcelForm
-from .models import Chamado, CustomUser, InventarioExcel
+from .models import Chamado, CustomUser, ImportacaoInventario, ResumoDiarioChamado
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.dateparse import parse_date
 from datetime import timedelta
@@ -21,14 +33,7 @@ import threading
 import time
 from django.utils import timezone
 from .models import Chamado
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
-import base64
-import os
-import matplotlib.ticker as mticker
 from datetime import datetime, date, timedelta
-import pandas as pd
 from django.contrib import messages
 from django.shortcuts import render, redirect
 from .forms import ChamadoForm
@@ -36,12 +41,13 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from .models import CustomUser
-from matplotlib.patheffects import withStroke
 from django.http import HttpResponse
 from django.utils import timezone
-import pandas as pd
 
 
+# Árvore do inventário com ?v=<hash>: o conteúdo daquela URL nunca muda
+ARVORE_MAX_AGE = 60 * 60 * 24 * 365
+
 # ------------------------------
 # Funções auxiliares
 # ------------------------------
@@ -49,12 +55,21 @@ import pandas as pd
 def is_admin(user):
     return user.is_authenticated and getattr(user, "papel", "") == "admin"
 
-def imagem_para_base64(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode("utf-8")
+
+def pode_finalizar(user):
+    """Só admin (staff) ou gestor finaliza chamados."""
+    return user.is_staff or getattr(user, 'papel', '').lower() == 'gestor'
+
+
+def tempo_manual_do_post(request):
+    """Tempo manual (minutos > 0) informado no modal de finalização, ou None."""
+    if request.POST.get('usar_tempo_manual') != 'Sim':
+        return None
+    try:
+        minutos = int(request.POST.get('tempo_manual', '').strip())
+    except ValueError:
+        return None
+    return timedelta(minutes=minutos) if minutos > 0 else None
 
 # ------------------------------
 # Autenticação
@@ -174,7 +189,7 @@ def sistema_chamados_view(request):
         data_selecionada = timezone.now().date()
 
     # Filtrar chamados pela data
-    chamados = Chamado.objects.filter(aberto_em__date=data_selecionada, status='Aberto')
+    chamados = Chamado.objects.filter(aberto_dia=data_selecionada, status='Aberto')
 
     context = {
         'data_selecionada': data_selecionada.strftime('%Y-%m-%d'),  # ← STRING PARA O INPUT
@@ -184,132 +199,6 @@ def sistema_chamados_view(request):
     }
     return render(request, 'chamados/sistema_chamados.html', context)
 
-    # ------------------------------
-    # Regional, Loja e Líder selecionados
-    # ------------------------------
-    regional_selecionada = request.GET.get('regional', '')
-    loja_selecionada = request.GET.get('loja', '')
-    lider_selecionado = request.GET.get('lider', '')
-
-    # ------------------------------
-    # Carrega dados do InventarioExcel
-    # ------------------------------
-    inventario_qs = InventarioExcel.objects.all().order_by('regional', 'loja')
-    if data_filtro:
-        inventario_qs = inventario_qs.filter(data=data_filtro)
-
-    df_excel = pd.DataFrame(list(inventario_qs.values('regional', 'loja', 'lider')))
-    if not df_excel.empty:
-        df_excel[['regional', 'loja', 'lider']] = df_excel[['regional', 'loja', 'lider']].astype(str).apply(lambda x: x.str.strip())
-
-    # ------------------------------
-    # Listas únicas para filtros
-    # ------------------------------
-    regionais = sorted(df_excel['regional'].dropna().unique()) if not df_excel.empty else []
-
-    if regional_selecionada and not df_excel.empty:
-        lojas_filtradas = sorted(df_excel[df_excel['regional'] == regional_selecionada]['loja'].dropna().unique())
-        if loja_selecionada:
-            lideres_filtrados = sorted(df_excel[df_excel['loja'] == loja_selecionada]['lider'].dropna().unique())
-        else:
-            lideres_filtrados = sorted(df_excel[df_excel['regional'] == regional_selecionada]['lider'].dropna().unique())
-    else:
-        lojas_filtradas = sorted(df_excel['loja'].dropna().unique()) if not df_excel.empty else []
-        lideres_filtrados = sorted(df_excel['lider'].dropna().unique()) if not df_excel.empty else []
-
-    # ------------------------------
-    # Busca chamados reais do banco
-    # ------------------------------
-    chamados_qs = Chamado.objects.filter(status='Aberto').order_by('-data')
-    if data_filtro:
-        chamados_qs = chamados_qs.filter(data=data_filtro)
-    if regional_selecionada:
-        chamados_qs = chamados_qs.filter(regional=regional_selecionada)
-    if loja_selecionada:
-        chamados_qs = chamados_qs.filter(loja=loja_selecionada)
-
-    chamados_df = pd.DataFrame(list(chamados_qs.values()))
-
-    # ------------------------------
-    # Lista de motivos do banco
-    # ------------------------------
-    motivos_db = list(
-        chamados_qs.exclude(motivo__isnull=True).exclude(motivo='').values_list('motivo', flat=True).distinct()
-    )
-
-    # ------------------------------
-    # Formulário Chamado
-    # ------------------------------
-    motivo_atual = request.POST.get('motivo') if request.method == 'POST' else None
-    form = ChamadoForm(
-        request.POST or None,
-        regionais=regionais,
-        lojas=lojas_filtradas,
-        lideres=lideres_filtrados,
-        motivos_db=motivos_db,
-        initial={
-            'motivo': motivo_atual,
-            'lider': lider_selecionado
-        }
-    )
-
-    # ------------------------------
-    # Salva chamado se POST válido
-    # ------------------------------
-    if request.method == 'POST' and form.is_valid():
-        chamado = form.save(commit=False)
-        chamado.usuario = request.user
-        if chamado.motivo == 'OUTRO' and form.cleaned_data.get('outro_motivo'):
-            chamado.outro_motivo = form.cleaned_data['outro_motivo'].upper()
-            chamado.motivo = 'OUTRO'
-        else:
-            chamado.outro_motivo = ''
-        if form.cleaned_data.get('lider'):
-            chamado.lider = form.cleaned_data['lider'].upper()
-        chamado.save()
-        messages.success(request, "✅ Chamado cadastrado!")
-
-        return redirect(
-            f"{request.path}?data={data_str}&regional={regional_selecionada}&loja={loja_selecionada}&lider={form.cleaned_data.get('lider', '')}"
-        )
-
-    # ------------------------------
-    # Debug detalhado de usuários
-    # ------------------------------
-    from django.contrib.auth import get_user_model
-    CustomUser = get_user_model()
-
-    todos_usuarios = CustomUser.objects.all()
-    admins = CustomUser.objects.filter(is_staff=True)
-    usuarios_comuns = CustomUser.objects.filter(is_staff=False)
-
-    print(f"DEBUG: request.user = {request.user.username}, is_staff = {request.user.is_staff}")
-    print(f"DEBUG: Total usuários no banco = {todos_usuarios.count()}")
-    print(f"DEBUG: Admins = {list(admins)}")
-    print(f"DEBUG: Usuários comuns = {list(usuarios_comuns)}")
-
-    if request.user.is_staff:
-        usuarios = usuarios_comuns
-        print(f"DEBUG: usuários enviados para o contexto (excluindo admins) = {list(usuarios)}")
-    else:
-        usuarios = []
-
-    # ------------------------------
-    # Renderiza template
-    # ------------------------------
-    return render(request, 'chamados/sistema_chamados.html', {
-        'form': form,
-        'dados_excel': df_excel.to_dict('records'),
-        'data_selecionada': data_str,
-        'regionais': regionais,
-        'lojas': lojas_filtradas,
-        'lideres': lideres_filtrados,
-        'regional_selecionada': regional_selecionada,
-        'loja_selecionada': loja_selecionada,
-        'chamados': chamados_df.to_dict('records') if not chamados_df.empty else [],
-        'usuarios': usuarios,
-    })
-
 
 @login_required
 def chamados_ativos(request):
@@ -321,24 +210,19 @@ def chamados_ativos(request):
         except (ValueError, TypeError):
             pass
 
-    # --- Carrega inventário para os filtros dinâmicos ---
-    inventario_qs = InventarioExcel.objects.all()
-    if data_filtro:
-        inventario_qs = inventario_qs.filter(data=data_filtro)
-
-    regionais = sorted(inventario_qs.values_list('regional', flat=True).distinct())
-    lideres = sorted(inventario_qs.values_list('lider', flat=True).distinct())
-    lojas = sorted(inventario_qs.values_list('loja', flat=True).distinct())
+    # --- Inventário para os filtros dinâmicos (índice em memória) ---
+    inventario = indice_inventario().nivel(data_filtro)
+    regionais = inventario.regionais
+    lideres = inventario.lideres
+    lojas = inventario.lojas
 
-    motivos_db = Chamado.objects.values_list('motivo', flat=True).distinct()
+    motivos_db = motivos_aprendidos()
 
     # --- Cadastro de novo chamado ---
     if request.method == "POST":
         form = ChamadoForm(
             request.POST,
-            regionais=regionais,
-            lojas=lojas,
-            lideres=lideres,
+            inventario=inventario,
             motivos_db=motivos_db
         )
 
@@ -356,16 +240,14 @@ def chamados_ativos(request):
             messages.warning(request, "Erro ao cadastrar chamado. Verifique os campos.")
     else:
         form = ChamadoForm(
-            regionais=regionais,
-            lojas=lojas,
-            lideres=lideres,
+            inventario=inventario,
             motivos_db=motivos_db
         )
 
     # --- Lista de chamados abertos ---
     chamados = Chamado.objects.filter(status='Aberto')
     if data_filtro:
-        chamados = chamados.filter(aberto_em__date=data_filtro)
+        chamados = chamados.filter(aberto_dia=data_filtro)
 
     chamados = chamados.select_related('aberto_por', 'fechado_por').order_by('-aberto_em')
 
@@ -376,6 +258,7 @@ def chamados_ativos(request):
         'lideres': lideres,
         'lojas': lojas,
         'data_selecionada': data_str or '',
+        'url_arvore': url_arvore_inventario(data_filtro),
     })
 @login_required
 def finalizar_chamado_view(request, pk):
@@ -388,7 +271,7 @@ def finalizar_chamado_view(request, pk):
 
     if request.method == 'POST':
         # Validação: só admin ou gestor pode finalizar
-        if not (request.user.is_staff or getattr(request.user, 'papel', '').lower() == 'gestor'):
+        if not pode_finalizar(request.user):
             messages.error(request, "Você não tem permissão para finalizar chamados.")
             return redirect_to_chamados_ativos(request)
 
@@ -399,18 +282,7 @@ def finalizar_chamado_view(request, pk):
         chamado.observacao = request.POST.get('observacao', chamado.observacao or '')
 
         # === TEMPO MANUAL ===
-        if request.POST.get('usar_tempo_manual') == 'Sim':
-            minutos_str = request.POST.get('tempo_manual', '').strip()
-            try:
-                minutos = int(minutos_str)
-                if minutos > 0:
-                    chamado.tempo_manual = timedelta(minutes=minutos)
-                else:
-                    chamado.tempo_manual = None
-            except ValueError:
-                chamado.tempo_manual = None
-        else:
-            chamado.tempo_manual = None
+        chamado.tempo_manual = tempo_manual_do_post(request)
 
         # save() vai calcular duracao automaticamente
         chamado.save()
@@ -425,6 +297,33 @@ def finalizar_chamado_view(request, pk):
     return redirect_to_chamados_ativos(request)
 
 
+@login_required
+def finalizar_em_lote_view(request):
+    """Finaliza vários chamados de uma vez (ids[] + observação/tempo manual em comum)."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método não permitido'}, status=405)
+    if not pode_finalizar(request.user):
+        return JsonResponse({'error': 'Você não tem permissão para finalizar chamados.'}, status=403)
+
+    try:
+        ids = [int(pk) for pk in request.POST.getlist('ids')]
+    except ValueError:
+        return JsonResponse({'error': 'IDs inválidos'}, status=400)
+    if not ids:
+        return JsonResponse({'error': 'Nenhum chamado selecionado'}, status=400)
+
+    resultados = finalizar_em_lote(
+        ids,
+        request.user,
+        observacao=request.POST.get('observacao', '').strip(),
+        tempo_manual=tempo_manual_do_post(request),
+    )
+    return JsonResponse({
+        'finalizados': sum(1 for r in resultados.values() if r == FINALIZADO),
+        'resultados': {str(pk): r for pk, r in resultados.items()},
+    })
+
+
 # === FUNÇÃO AUXILIAR ===
 def redirect_to_chamados_ativos(request):
     """Mantém os filtros da URL"""
@@ -439,198 +338,116 @@ def redirect_to_chamados_ativos(request):
 
 @login_required
 def todos_chamados(request):
-    chamados = Chamado.objects.all().order_by('-aberto_em')
-    return render(request, 'todos_chamados.html', {'chamados': chamados})
+    """Lista paginada por cursor; ?cursor=... continua de onde a página anterior parou. ?q= busca."""
+    qs = Chamado.objects.select_related('aberto_por', 'fechado_por')
+    termo = request.GET.get('q', '').strip()
+    if termo:
+        qs = buscar_chamados(qs, termo)
+
+    chamados, proximo_cursor = pagina_keyset(
+        qs, request.GET.get('cursor'), getattr(settings, 'TODOS_CHAMADOS_POR_PAGINA', 50),
+        por_relevancia=bool(termo),
+    )
+
+    #  "Carregar mais" (fetch): devolve só as linhas novas
+    if request.GET.get('parcial'):
+        return JsonResponse({
+            'html': render_to_string('todos_chamados_linhas.html', {'chamados': chamados}, request=request),
+            'quantidade': len(chamados),
+            'proximo_cursor': proximo_cursor,
+        })
+
+    #  Total vem do resumo diário (não conta a tabela inteira de chamados)
+    total = None if termo else ResumoDiarioChamado.objects.aggregate(total=Sum('quantidade'))['total'] or 0
+    return render(request, 'todos_chamados.html', {
+        'chamados': chamados,
+        'proximo_cursor': proximo_cursor,
+        'total_chamados': total,
+        'primeira_pagina': not request.GET.get('cursor'),
+        'termo_busca': termo,
+    })
 
 # ------------------------------
 # AJAX para filtros
 # ------------------------------
 @login_required
+@condicional(marca_func=marca_inventario)
 def regionais_por_data(request):
-    """Retorna regionais disponíveis para a data (InventarioExcel)"""
-    data_str = request.GET.get('data')
-    inventario_qs = InventarioExcel.objects.all()
-
-    if data_str:
-        try:
-            data_filtro = datetime.strptime(data_str, "%Y-%m-%d").date()
-            inventario_qs = inventario_qs.filter(data=data_filtro)
-        except ValueError:
-            pass
-
-    regionais = sorted(inventario_qs.values_list('regional', flat=True).distinct())
-    return JsonResponse({'regionais': regionais})
+    """Retorna regionais disponíveis para a data (índice do inventário)"""
+    inventario = nivel_inventario_da_data(request.GET.get('data'))
+    return JsonResponse({'regionais': list(inventario.regionais)})
 
+@condicional(marca_func=marca_inventario)
 def lojas_por_regional(request):
-    """Retorna lojas de uma regional específica (InventarioExcel)"""
+    """Retorna lojas de uma regional específica (índice do inventário)"""
     regional = request.GET.get('regional')
-    data_str = request.GET.get('data')
-    inventario_qs = InventarioExcel.objects.all()
-
-    if data_str:
-        try:
-            data_filtro = datetime.strptime(data_str, "%Y-%m-%d").date()
-            inventario_qs = inventario_qs.filter(data=data_filtro)
-        except ValueError:
-            pass
+    inventario = nivel_inventario_da_data(request.GET.get('data'))
 
     if regional:
-        inventario_qs = inventario_qs.filter(regional=regional)
-
-    lojas = sorted(inventario_qs.values_list('loja', flat=True).distinct())
-    return JsonResponse({'lojas': lojas})
+        lojas = inventario.lojas_por_regional.get(regional, ())
+    else:
+        lojas = inventario.lojas
+    return JsonResponse({'lojas': list(lojas)})
 
+@condicional(marca_func=marca_inventario)
 def lider_por_loja(request):
-    """Retorna o líder da loja selecionada (InventarioExcel)"""
-    data_str = request.GET.get('data')
+    """Retorna o líder da loja selecionada (índice do inventário)"""
     loja = request.GET.get('loja')
-    inventario_qs = InventarioExcel.objects.all()
-
-    if data_str:
-        try:
-            data_filtro = datetime.strptime(data_str, "%Y-%m-%d").date()
-            inventario_qs = inventario_qs.filter(data=data_filtro)
-        except ValueError:
-            pass
+    inventario = nivel_inventario_da_data(request.GET.get('data'))
 
     if loja:
-        inventario_qs = inventario_qs.filter(loja=loja)
-
-    lider_nome = inventario_qs.values_list('lider', flat=True).first() or ''
+        lider_nome = inventario.lider_por_loja.get(loja, '')
+    else:
+        lider_nome = inventario.primeiro_lider
     return JsonResponse({'lider': lider_nome})
 
 
-# ------------------------------
-# Dashboard
-# ------------------------------
-def gerar_grafico_pie(df, coluna, titulo, icone="ChartPie"):
-    if coluna not in df or df[coluna].empty:
-        return None
-
-    df_count = df[coluna].value_counts()
-    top = df_count.head(5)
-    outros = df_count.iloc[5:].sum()
-    if outros > 0:
-        top = top.copy()
-        top["Outros"] = outros
-
-    colors = sns.color_palette("husl", len(top))
-
-    fig, ax = plt.subplots(figsize=(6, 6), facecolor='white')
-    wedges, texts, autotexts = ax.pie(
-        top.values,
-        labels=top.index,
-        autopct=lambda p: f'{p:.1f}%' if p > 3 else '',
-        startangle=90,
-        colors=colors,
-        wedgeprops=dict(width=0.4, edgecolor='white', linewidth=2),
-        textprops=dict(color="black", fontsize=9, weight='medium')
-    )
-
-    # Estiliza % com fundo de contraste
-    for autotext in autotexts:
-        if autotext.get_text():
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(9)
-            autotext.set_path_effects([
-                path_effects.Stroke(linewidth=2, foreground='black'),
-                path_effects.Normal()
-            ])
-
-    ax.set_title(f"{titulo}", fontsize=14, weight='bold', pad=20, loc='center')
-
-    fig.patch.set_facecolor('#f8fafc')
-    ax.set_facecolor('#f8fafc')
-
-    plt.tight_layout()
-    return imagem_para_base64(fig)
-
-def gerar_grafico_bar(df, coluna, titulo, icone="ChartBar"):
-    if coluna not in df or df[coluna].empty:
-        return None
-
-    df_count = df[coluna].value_counts().head(10).sort_values()
-    colors = sns.color_palette("viridis", len(df_count))
-
-    fig, ax = plt.subplots(figsize=(8, 5), facecolor='white')
-
-    bars = ax.barh(df_count.index, df_count.values, color=colors, height=0.7, edgecolor='white', linewidth=1)
-
-    ax.set_xlabel("Quantidade", fontsize=11, weight='600')
-    ax.set_title(titulo, fontsize=14, weight='bold', pad=20)
-
-    # Grid suave
-    ax.grid(axis='x', alpha=0.3, linestyle='--', linewidth=0.7)
-    ax.set_axisbelow(True)
-
-    # Números dentro da barra
-    for i, (bar, val) in enumerate(zip(bars, df_count.values)):
-        if val > 0:
-            ax.text(
-                val - (val * 0.02), bar.get_y() + bar.get_height() / 2,
-                str(int(val)),
-                va='center', ha='right', color='white', fontweight='bold', fontsize=10
-            )
-
-    ax.invert_yaxis()
-    plt.tight_layout()
-    fig.patch.set_facecolor('#f8fafc')
-    ax.set_facecolor('#f8fafc')
-
-    return imagem_para_base64(fig)
-
-def gerar_grafico_tempo_medio(df, titulo="Tempo Médio de Suporte"):
-    # CAMPOS ATUALIZADOS
-    if 'aberto_em' not in df.columns or 'fechado_em' not in df.columns or 'motivo' not in df.columns:
-        return None
-
-    df_finalizados = df.dropna(subset=['aberto_em', 'fechado_em', 'motivo']).copy()
-    if df_finalizados.empty:
-        return None
-
-    # CONVERSÃO COM PDT (mais seguro)
-    df_finalizados['aberto_em'] = pd.to_datetime(df_finalizados['aberto_em'], errors='coerce')
-    df_finalizados['fechado_em'] = pd.to_datetime(df_finalizados['fechado_em'], errors='coerce')
-
-    # Filtra linhas inválidas
-    df_finalizados = df_finalizados.dropna(subset=['aberto_em', 'fechado_em'])
-    if df_finalizados.empty:
-        return None
-
-    df_finalizados['tempo_minutos'] = (df_finalizados['fechado_em'] - df_finalizados['aberto_em']).dt.total_seconds() / 60
-
-    df_medio = df_finalizados.groupby('motivo')['tempo_minutos'].mean().sort_values()
-    if df_medio.empty:
-        return None
-
-    colors = sns.color_palette("mako", len(df_medio))
-
-    fig, ax = plt.subplots(figsize=(8, 6), facecolor='white')
-    bars = ax.barh(df_medio.index, df_medio.values, color=colors, height=0.7, edgecolor='white')
+@login_required
+def arvore_inventario(request):
+    """
+    Árvore regional → loja → líder da data numa só resposta; os selects são
+    filtrados no navegador (static/chamados/inventario.js). ETag = hash do
+    conteúdo; com ?v=<hash atual> a URL é imutável e pode ficar em cache longo.
+    """
+    corpo, hash_arvore = nivel_inventario_da_data(request.GET.get('data')).arvore()
+
+    @condition(etag_func=lambda request: hash_arvore)
+    def responder(request):
+        return HttpResponse(corpo, content_type='application/json')
+
+    response = responder(request)
+    if request.GET.get('v') == hash_arvore:
+        patch_cache_control(response, private=True, max_age=ARVORE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-    ax.set_xlabel("Minutos", fontsize=11, weight='600')
-    ax.set_title(titulo, fontsize=14, weight='bold', pad=20)
 
-    ax.grid(axis='x', alpha=0.3, linestyle='--')
-    ax.set_axisbelow(True)
+def url_arvore_inventario(data_filtro=None):
+    """URL versionada da árvore (muda quando o inventário do dia muda)."""
+    _, hash_arvore = indice_inventario().nivel(data_filtro).arvore()
+    params = {'v': hash_arvore}
+    if data_filtro:
+        params['data'] = data_filtro.isoformat()
+    return f"{reverse('chamados:arvore_inventario')}?{urlencode(params)}"
 
-    # Números com fundo
-    for bar, val in zip(bars, df_medio.values):
-        ax.text(
-            val + 2, bar.get_y() + bar.get_height()/2,
-            f"{val:.0f} min",
-            va='center', ha='left', color='#1f2937', fontweight='bold', fontsize=10
-        )
 
-    ax.invert_yaxis()
-    plt.tight_layout()
-    fig.patch.set_facecolor('#f8fafc')
-    ax.set_facecolor('#f8fafc')
+def nivel_inventario_da_data(data_str):
+    """Nível do índice para ?data=YYYY-MM-DD; data ausente ou inválida = inventário inteiro."""
+    data_filtro = None
+    if data_str:
+        try:
+            data_filtro = datetime.strptime(data_str, "%Y-%m-%d").date()
+        except ValueError:
+            pass
+    return indice_inventario().nivel(data_filtro)
 
-    return imagem_para_base64(fig)
 
-def filtrar_dashboard(request):
+# ------------------------------
+# Dashboard
+# ------------------------------
+def periodo_dashboard(request):
+    """Resolve (inicio, fim) a partir de ?tipo=semana|quinzena|mes|periodo. Retorna (inicio, fim, erro)."""
     tipo = request.GET.get('tipo')
     inicio = request.GET.get('inicio')
     fim = request.GET.get('fim')
@@ -652,55 +469,40 @@ def filtrar_dashboard(request):
                 inicio = date.fromisoformat(inicio)
                 fim = date.fromisoformat(fim)
             except ValueError:
-                return JsonResponse({'error': 'Datas inválidas'}, status=400)
+                return None, None, JsonResponse({'error': 'Datas inválidas'}, status=400)
         else:
-            return JsonResponse({'error': 'Informe o período'}, status=400)
+            return None, None, JsonResponse({'error': 'Informe o período'}, status=400)
     else:
-        return JsonResponse({'error': 'Tipo de filtro inválido'}, status=400)
+        return None, None, JsonResponse({'error': 'Tipo de filtro inválido'}, status=400)
 
-    # 🔹 Filtra os chamados
-    chamados = Chamado.objects.filter(aberto_em__date__range=[inicio, fim])
+    return inicio, fim, None
 
-    # 🔹 Converte em DataFrame
-    df = pd.DataFrame(list(chamados.values()))
+@condicional(Chamado)
+def filtrar_dashboard(request):
+    inicio, fim, erro = periodo_dashboard(request)
+    if erro:
+        return erro
 
-    if df.empty:
-        return JsonResponse({'error': 'Nenhum dado encontrado'}, status=404)
+    # 🔹 Agrega a partir do resumo diário (não varre o histórico de chamados);
+    # a versão do cache é lida antes, para não gravar gráficos antigos na nova
+    versao = versao_dados()
+    agregado = agregar_resumo(ResumoDiarioChamado.objects.filter(dia__range=[inicio, fim]))
 
-    # 🔹 Remove timezone dos campos datetime
-    for col in df.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
-        try:
-            df[col] = df[col].dt.tz_localize(None)
-        except TypeError:
-            notna_mask = df[col].notna()
-            df.loc[notna_mask, col] = df.loc[notna_mask, col].dt.tz_convert(None)
-
-    # 🔹 Adapta motivo personalizado
-    df['motivo_grafico'] = df.apply(
-        lambda row: row['outro_motivo'] if row.get('motivo') == 'OUTRO' and row.get('outro_motivo') else row.get('motivo'),
-        axis=1
-    )
+    if not agregado['total']:
+        return JsonResponse({'error': 'Nenhum dado encontrado'}, status=404)
 
-    # 🔹 Gera gráficos (mesma lógica do dashboard_view)
-    plots = {
-        'status': gerar_grafico_pie(df, 'status', 'Status dos Chamados'),
-        'lideres': gerar_grafico_bar(df, 'lider', 'Principais Líderes'),
-        'motivos': gerar_grafico_bar(df, 'motivo_grafico', 'Principais Motivos'),
-        'regionais': gerar_grafico_bar(df, 'regional', 'Chamados por Regional'),
-        'tempo_medio': gerar_grafico_tempo_medio(df),
-    }
+    # 🔹 Gera gráficos (mesma lógica do dashboard_view), reaproveitando o cache
+    plots = gerar_graficos(agregado, filtros={'inicio': inicio, 'fim': fim}, versao=versao)
 
     # 🔹 Retorna em JSON
     return JsonResponse({'plots': plots})
 
-@login_required
-def dashboard_view(request):
-    #  Pega filtros do GET
-    filtros = {col: request.GET.getlist(col) for col in ['regional', 'status', 'motivo', 'lider']}
-    qs = Chamado.objects.all()
+def filtros_dashboard(request):
+    """Filtros ?regional=&status=&motivo=&lider= (múltiplos) do dashboard."""
+    return {col: request.GET.getlist(col) for col in ['regional', 'status', 'motivo', 'lider']}
 
-    #  Aplica filtros dinâmicos
+def aplicar_filtros_dashboard(qs, filtros):
+    """Vale para Chamado e ResumoDiarioChamado (mesmos nomes de campo)."""
     if filtros['regional']:
         qs = qs.filter(regional__in=filtros['regional'])
     if filtros['status']:
@@ -710,26 +512,54 @@ def dashboard_view(request):
     if filtros['lider']:
         qs = qs.filter(lider__in=filtros['lider'])
 
-    #  Converte queryset em DataFrame
-    df = pd.DataFrame(list(qs.values()))
+    return qs
 
-    #  Converte colunas datetime para string, evitando NaT
-    for col in df.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+def graficos_em_png(request):
+    """Renderização no servidor (PNG) só quando pedida: ?graficos=png ou DASHBOARD_GRAFICOS_PNG."""
+    return request.GET.get('graficos') == 'png' or getattr(settings, 'DASHBOARD_GRAFICOS_PNG', False)
 
-        try:
-            df[col] = df[col].dt.tz_localize(None)
-        except TypeError:
-            notna_mask = df[col].notna()
-            df.loc[notna_mask, col] = df.loc[notna_mask, col].dt.tz_convert(None)
+@login_required
+@condicional(Chamado)
+def dashboard_data(request):
+    """Séries agregadas dos gráficos em JSON; o navegador desenha os gráficos."""
+    resumo = aplicar_filtros_dashboard(ResumoDiarioChamado.objects.all(), filtros_dashboard(request))
+
+    if request.GET.get('tipo'):
+        inicio, fim, erro = periodo_dashboard(request)
+        if erro:
+            return erro
+        resumo = resumo.filter(dia__range=[inicio, fim])
+
+    agregado = agregar_resumo(resumo)
+    incluir_tempo_medio = getattr(request.user, 'papel', '') == 'admin'
+
+    return JsonResponse({
+        'total': agregado['total'],
+        'series': dados_graficos(agregado, incluir_tempo_medio=incluir_tempo_medio),
+    })
+
+@login_required
+@condicional(Chamado, por_sessao=True)
+def dashboard_view(request):
+    #  Pega e aplica os filtros do GET
+    filtros = filtros_dashboard(request)
+    resumo = aplicar_filtros_dashboard(ResumoDiarioChamado.objects.all(), filtros)
+
+    #  Agrega a partir do resumo diário (contagens e tempo médio), sem carregar chamados;
+    #  a versão do cache de gráficos é lida antes de agregar
+    versao = versao_dados()
+    agregado = agregar_resumo(resumo)
 
     #  Filtros disponíveis
     filtros_disponiveis = {
-        col: df[col].dropna().unique().tolist()
-        for col in ['regional', 'status', 'motivo', 'lider']
-    } if not df.empty else {}
+        'regional': [valor for valor, _ in agregado['regionais']],
+        'status': [valor for valor, _ in agregado['status']],
+        'motivo': list(resumo.order_by().values_list('motivo', flat=True).distinct()),
+        'lider': [valor for valor, _ in agregado['lideres']],
+    } if agregado['total'] else {}
 
     plots = {}
+    series = {}
     template = 'chamados/dashboard_usuario.html'
 
     # ============================
@@ -744,29 +574,25 @@ def dashboard_view(request):
     # ============================
 
     #  Admin tem todos os gráficos
-    if not df.empty:
-        df_grafico = df.copy()
+    if agregado['total']:
+        is_admin_dashboard = getattr(request.user, 'papel', '') == 'admin'
 
-        df_grafico['motivo_grafico'] = df_grafico.apply(
-            lambda row: row['outro_motivo'] if row['motivo'] == 'OUTRO' and row['outro_motivo'] else row['motivo'],
-            axis=1
-        )
-
-        plots['status'] = gerar_grafico_pie(df_grafico, 'status', 'Status dos Chamados')
-        plots['lideres'] = gerar_grafico_bar(df_grafico, 'lider', 'Principais Líderes')
-        plots['motivos'] = gerar_grafico_bar(df_grafico, 'motivo_grafico', 'Principais Motivos')
-        plots['regionais'] = gerar_grafico_bar(df_grafico, 'regional', 'Chamados por Regional')
-
-        if getattr(request.user, 'papel', '') == 'admin':
-            plots['tempo_medio'] = gerar_grafico_tempo_medio(df_grafico)
+        if is_admin_dashboard:
             template = 'chamados/dashboard_admin.html'
 
+        #  Admin: o navegador desenha a partir das séries (PNG só como fallback)
+        if is_admin_dashboard and not graficos_em_png(request):
+            series = dados_graficos(agregado)
+        else:
+            plots = gerar_graficos(agregado, incluir_tempo_medio=is_admin_dashboard, filtros=filtros, versao=versao)
+
     return render(request, template, {
         'plots': plots,
+        'series': series,
         'graficos': graficos,     # ✅ ENVIADO PARA O TEMPLATE
         'filters': filtros_disponiveis,
         'filters_selected': filtros,
-        'chamados': df.to_dict('records') if not df.empty else [],
+        'total_chamados': agregado['total'],
     })
 
 # ------------------------------
@@ -779,57 +605,36 @@ def upload_excel(request):
     if request.method == "POST":
         form = UploadExcelForm(request.POST, request.FILES)
         if form.is_valid():
-            arquivo = form.cleaned_data['file']
-            upload_dir = os.path.join(settings.MEDIA_ROOT, "uploads")
-            os.makedirs(upload_dir, exist_ok=True)
-            file_path = os.path.join(upload_dir, "chamados.xlsx")
-            with open(file_path, "wb+") as destino:
-                for chunk in arquivo.chunks():
-                    destino.write(chunk)
-
-            # Lê Excel
-            df = pd.read_excel(file_path, header=2)
-            df.columns = [str(c).strip().upper() for c in df.columns]
-            if '#' in df.columns:
-                df.rename(columns={'#': 'LOJA'}, inplace=True)
-            if '4' in df.columns:
-                df['DATA'] = pd.to_datetime(df['4'], errors='coerce').dt.date
-
-            required_cols = ['LOJA', 'REGIONAL', 'LÍDER']
-            for col in required_cols:
-                if col not in df.columns:
-                    messages.error(request, f"Coluna '{col}' não encontrada no Excel")
-                    return redirect("chamados:upload_excel")
-            df = df[required_cols + (['DATA'] if 'DATA' in df.columns else [])].fillna('')
-
-            # Limpa apenas os registros antigos de InventarioExcel
-            InventarioExcel.objects.all().delete()
-
-            # Salva no InventarioExcel (Excel como base, não chamados reais)
-            for _, row in df.iterrows():
-                data_valor = row.get('DATA')
-
-                # Trata células vazias ou inválidas
-                if pd.isna(data_valor) or str(data_valor).strip() == "":
-                    data_valor = None
-                else:
-                    try:
-                        data_valor = pd.to_datetime(data_valor).date()
-                    except Exception:
-                        data_valor = None  # se a data não for válida, ignora
-
-                InventarioExcel.objects.create(
-                    loja=str(row.get('LOJA', '')).strip(),
-                    regional=str(row.get('REGIONAL', '')).strip(),
-                    lider=str(row.get('LÍDER', '')).strip(),
-                    data=data_valor,
-                )
-
-            messages.success(request, f"✅ {len(df)} registros de inventário importados com sucesso!")
-            return redirect("chamados:upload_excel")
+            # Leitura e gravação rodam em segundo plano; o progresso chega por WebSocket
+            try:
+                importacao = enfileirar_importacao(form.cleaned_data['file'], request.user)
+            except ImportacaoEmAndamento as erro:
+                messages.warning(request, str(erro))
+                return redirect("chamados:upload_excel")
+            except Exception as erro:
+                # Falha ao salvar o arquivo: a importação já foi marcada como erro
+                print(f"[ERRO] Upload do inventário: {erro}")
+                messages.error(request, f"❌ Não foi possível receber o arquivo: {erro}")
+                return redirect("chamados:upload_excel")
+
+            messages.info(request, "⏳ Arquivo recebido! A importação do inventário começou.")
+            return redirect(f"{reverse('chamados:upload_excel')}?importacao={importacao.pk}")
     else:
         form = UploadExcelForm()
-    return render(request, "upload_excel.html", {"form": form})
+
+    # Importação acompanhada: a pedida na URL ou a que estiver em aberto
+    importacoes = ImportacaoInventario.objects.select_related('criado_por')
+    pedida = request.GET.get('importacao')
+    importacao = (
+        importacoes.filter(pk=pedida).first() if pedida and pedida.isdigit()
+        else importacoes.filter(em_aberto=True).first()
+    )
+    return render(request, "upload_excel.html", {
+        "form": form,
+        "importacao": importacao,
+        "dados_importacao": dados_importacao(importacao) if importacao else None,
+        "importacoes": importacoes[:5],
+    })
 
 @login_required
 def exportar_excel_view(request):
@@ -859,7 +664,7 @@ def exportar_excel_view(request):
                 fim_mes = timezone.make_aware(datetime(ano, mes_num + 1, 1)) - timedelta(days=1)
 
             chamados = chamados.filter(
-                aberto_em__date__range=[inicio_mes.date(), fim_mes.date()]
+                aberto_dia__range=[inicio_mes.date(), fim_mes.date()]
             )
         except Exception:
             pass
@@ -871,7 +676,7 @@ def exportar_excel_view(request):
             fim_dt = datetime.strptime(fim, "%Y-%m-%d").date()
 
             chamados = chamados.filter(
-                aberto_em__date__range=[inicio_dt, fim_dt]
+                aberto_dia__range=[inicio_dt, fim_dt]
             )
         except Exception:
             pass
@@ -880,120 +685,20 @@ def exportar_excel_view(request):
     # 2. SELEÇÃO DE COLUNAS
     # -----------------------------
 
-    campos_permitidos = {
-        'id': 'ID',
-        'regional': 'Regional',
-        'loja': 'Loja',
-        'lider': 'Líder',
-        'motivo': 'Motivo',
-        'abertura': 'Abertura',
-        'fechamento': 'Fechamento',
-        'aberto_por': 'Aberto por',
-        'fechado_por': 'Fechado por',
-        'status': 'Status',
-        'duracao': 'Duração',
-        'tempo_manual': 'Tempo Manual',
-        'observacao': 'Observação',
-    }
-
     # AGORA FUNCIONA COM CHECKBOXES!
-    campos_solicitados = request.GET.getlist('campos')
-
-    if campos_solicitados:
-        colunas_selecionadas = [
-            c for c in campos_solicitados if c in campos_permitidos
-        ]
-    else:
-        colunas_selecionadas = list(campos_permitidos.keys())  # padrão: todas
+    colunas_selecionadas = colunas_exportacao(request.GET.getlist('campos'))
 
     # -----------------------------
-    # 3. MONTAR DADOS
+    # 3. GERAR EXCEL
     # -----------------------------
 
-    data = []
-
-    for c in chamados.select_related('aberto_por', 'fechado_por'):
-
-        duracao = c.tempo_manual or c.duracao or timedelta(0)
-        total_minutos = int(duracao.total_seconds() // 60)
-        horas = total_minutos // 60
-        minutos = total_minutos % 60
-
-        motivo_relatorio = (
-            f"OUTRO ({c.outro_motivo})"
-            if c.motivo and c.motivo.upper() == "OUTRO" and c.outro_motivo
-            else c.motivo or ""
-        )
-
-        row = {}
-
-        # Apenas colunas pedidas
-        if 'id' in colunas_selecionadas:
-            row['ID'] = c.id
-
-        if 'regional' in colunas_selecionadas:
-            row['Regional'] = c.regional
+    # Linha a linha num .xlsx temporário (memória constante), enviado em streaming
+    arquivo, linhas = exportar_chamados(chamados, colunas_selecionadas)
 
-        if 'loja' in colunas_selecionadas:
-            row['Loja'] = c.loja
-
-        if 'lider' in colunas_selecionadas:
-            row['Líder'] = c.lider
-
-        if 'motivo' in colunas_selecionadas:
-            row['Motivo'] = motivo_relatorio
-
-        if 'abertura' in colunas_selecionadas:
-            row['Abertura'] = (
-                c.aberto_em.strftime('%d/%m/%Y %H:%M:%S') if c.aberto_em else ''
-            )
-
-        if 'fechamento' in colunas_selecionadas:
-            row['Fechamento'] = (
-                c.fechado_em.strftime('%d/%m/%Y %H:%M:%S') if c.fechado_em else ''
-            )
-
-        if 'aberto_por' in colunas_selecionadas:
-            row['Aberto por'] = (
-                c.aberto_por.get_full_name() if c.aberto_por else "Usuário excluído"
-            )
-
-        if 'fechado_por' in colunas_selecionadas:
-            row['Fechado por'] = (
-                c.fechado_por.get_full_name() if c.fechado_por else ""
-            )
-
-        if 'status' in colunas_selecionadas:
-            row['Status'] = c.status
-
-        if 'duracao' in colunas_selecionadas:
-            row['Duração'] = f"{horas}h {minutos}min"
-
-        if 'tempo_manual' in colunas_selecionadas:
-            row['Tempo Manual'] = str(c.tempo_manual) if c.tempo_manual else ""
-
-        if 'observacao' in colunas_selecionadas:
-            row['Observação'] = c.observacao or ""
-
-        data.append(row)
-
-    # -----------------------------
-    # 4. GERAR EXCEL
-    # -----------------------------
-
-    if not data:
+    if not linhas:
+        arquivo.close()
         return HttpResponse("Nenhum chamado encontrado para os filtros aplicados.", content_type="text/plain")
 
-    df = pd.DataFrame(data)
-
-    # Respeitar ordem dos campos solicitados
-    df = df[[campos_permitidos[c] for c in colunas_selecionadas]]
-
-    # Criar response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-
     nome_arquivo = "Lista de Chamados"
 
     if mes:
@@ -1001,9 +706,12 @@ def exportar_excel_view(request):
     elif inicio and fim:
         nome_arquivo += f"_{inicio}_a_{fim}"
 
-    response['Content-Disposition'] = f'attachment; filename=\"{nome_arquivo}.xlsx\"'
-    df.to_excel(response, index=False)
-    return response
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=f"{nome_arquivo}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
 
 def exportar_excel_form(request):
     colunas = [
@@ -1031,6 +739,8 @@ def exportar_excel_download(request):
 
         dados = Chamado.objects.values(*colunas_selecionadas)
 
+        from openpyxl import Workbook
+
         wb = Workbook()
         ws = wb.active
 
@@ -95,6 +95,58 @@ CHANNEL_LAYERS = {
     },
 }
 
+# ------------------------------
+# CACHE
+# ------------------------------
+# 'graficos' guarda os PNGs do dashboard (LRU por MAX_ENTRIES + expiração por TIMEOUT)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'graficos': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'graficos',
+        'TIMEOUT': config('GRAFICOS_CACHE_TIMEOUT', default=3600, cast=int),
+        'OPTIONS': {'MAX_ENTRIES': config('GRAFICOS_CACHE_MAX', default=200, cast=int)},
+    },
+}
+
+# Dashboard: por padrão o navegador desenha os gráficos a partir de /dashboard/data/.
+# True volta a renderizar PNGs no servidor (também disponível por ?graficos=png).
+DASHBOARD_GRAFICOS_PNG = config('DASHBOARD_GRAFICOS_PNG', default=False, cast=bool)
+
+# Processos usados para renderizar os PNGs em paralelo (vazio = automático pelas CPUs, 0 = desativa)
+DASHBOARD_WORKERS_GRAFICOS = config(
+    'DASHBOARD_WORKERS_GRAFICOS', default='', cast=lambda v: int(v) if v != '' else None
+)
+
+# Segundos de espera pelos PNGs do pool; depois disso o request renderiza no próprio processo
+DASHBOARD_TIMEOUT_GRAFICOS = config('DASHBOARD_TIMEOUT_GRAFICOS', default=30, cast=float)
+
+# Lista "Todos os Chamados": linhas por página (paginação por cursor)
+TODOS_CHAMADOS_POR_PAGINA = config('TODOS_CHAMADOS_POR_PAGINA', default=50, cast=int)
+
+# Exportação para Excel: chamados lidos do banco por vez (a planilha sai em streaming)
+EXPORTACAO_TAMANHO_LOTE = config('EXPORTACAO_TAMANHO_LOTE', default=2000, cast=int)
+
+# Importação do inventário: 'copy' (COPY FROM STDIN, só PostgreSQL; nos outros
+# bancos cai para bulk_create) ou 'bulk_create'
+INVENTARIO_IMPORTACAO = config('INVENTARIO_IMPORTACAO', default='copy')
+
+# Leitura da planilha de inventário: 'openpyxl' (read_only, memória constante),
+# 'calamine' (python-calamine: ~10x mais rápido, mas carrega a aba inteira na
+# memória) ou 'auto' (calamine se estiver instalado, senão openpyxl)
+INVENTARIO_LEITOR = config('INVENTARIO_LEITOR', default='openpyxl')
+
+# Cache em Parquet do inventário normalizado, por hash do arquivo (só com pyarrow
+# instalado; sem ele a planilha é relida quando muda). Mantém os INVENTARIO_CACHE_MAX mais recentes
+INVENTARIO_CACHE_DIR = config('INVENTARIO_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'inventario'))
+INVENTARIO_CACHE_MAX = config('INVENTARIO_CACHE_MAX', default=3, cast=int)
+
+# Importação do inventário em segundo plano: aberta sem sinal de vida por mais
+# que isto (segundos) é considerada interrompida e libera a fila
+IMPORTACAO_INVENTARIO_TIMEOUT = config('IMPORTACAO_INVENTARIO_TIMEOUT', default=30 * 60, cast=int)
+
 # ------------------------------
 # AUTENTICAÇÃO CUSTOMIZADA
 # ------------------------------
@@ -0,0 +1,48 @@
+// ==================== ÁRVORE DO INVENTÁRIO ====================
+// Uma única requisição (/ajax/inventario/) traz regional → loja → líder da data;
+// os selects em cascata são filtrados aqui, sem novas idas ao servidor.
+// Com a URL versionada (?v=<hash>) o navegador reaproveita o cache; sem ela,
+// revalida pelo ETag (304 quando o inventário não mudou).
+const ArvoreInventario = (() => {
+    const carregadas = {};
+
+    function carregar(url) {
+        if (!carregadas[url]) {
+            carregadas[url] = fetch(url, { credentials: 'same-origin' })
+                .then(res => {
+                    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                    return res.json();
+                })
+                .then(montar)
+                .catch(erro => {
+                    delete carregadas[url];  // tenta de novo na próxima chamada
+                    throw erro;
+                });
+        }
+        return carregadas[url];
+    }
+
+    function urlDaData(data) {
+        return data ? `/ajax/inventario/?data=${encodeURIComponent(data)}` : '/ajax/inventario/';
+    }
+
+    // [[regional, [[loja, lider], ...]], ...] → consultas por Map
+    function montar(arvore) {
+        const lojasPorRegional = new Map();
+        const liderPorLoja = new Map();
+        arvore.forEach(([regional, lojas]) => {
+            lojasPorRegional.set(regional, lojas.map(([loja]) => loja));
+            lojas.forEach(([loja, lider]) => {
+                if (!liderPorLoja.has(loja)) liderPorLoja.set(loja, lider);
+            });
+        });
+        const todasLojas = [...liderPorLoja.keys()].sort();
+        return {
+            regionais: () => [...lojasPorRegional.keys()],
+            lojas: (regional) => regional ? (lojasPorRegional.get(regional) || []) : todasLojas,
+            lider: (loja) => liderPorLoja.get(loja) || '',
+        };
+    }
+
+    return { carregar, urlDaData };
+})();
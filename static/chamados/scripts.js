@@ -65,25 +65,23 @@ document.addEventListener('DOMContentLoaded', function () {
         };
     }
 
-    // 🔹 Atualiza lojas e líderes via AJAX
+    // 🔹 Atualiza lojas e líderes pela árvore do inventário (uma requisição, filtrada localmente)
     if (selectRegional && selectLoja && selectLider) {
         const atualizarLojasELideres = () => {
             const regional = selectRegional.value;
             const data = document.getElementById("data")?.value || "";
 
-            // Lojas
-            fetch(`/ajax/lojas/?data=${data}&regional=${encodeURIComponent(regional)}`)
-                .then(res => res.json())
-                .then(resp => {
-                    selectLoja.innerHTML = '<option value="">Selecione uma Loja</option>';
-                    resp.lojas.forEach(loja => {
-                        const opt = document.createElement("option");
-                        opt.value = loja;
-                        opt.textContent = loja;
-                        selectLoja.appendChild(opt);
-                    });
-                    selectLoja.dispatchEvent(new Event("change"));
+            ArvoreInventario.carregar(ArvoreInventario.urlDaData(data)).then(arvore => {
+                // Lojas
+                selectLoja.innerHTML = '<option value="">Selecione uma Loja</option>';
+                arvore.lojas(regional).forEach(loja => {
+                    const opt = document.createElement("option");
+                    opt.value = loja;
+                    opt.textContent = loja;
+                    selectLoja.appendChild(opt);
                 });
+                selectLoja.dispatchEvent(new Event("change"));
+            });
 
             // Limpa líderes
             selectLider.innerHTML = '<option value="">Selecione um Líder</option>';